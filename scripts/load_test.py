@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""送信処理の負荷試験スクリプト
+
+ローカルの Dify スタブサーバー（src.lib.dify_stub）を起動し、指定件数の小さな Markdown
+ファイルを生成して、同時送信数ごとに src.cli.main.main() を --force で実行します。
+実行ごとにスタブの計測値（リクエスト数・ステータス別件数・注入したエラー・同時処理数の最大値）と
+ドキュメント/秒を表示するため、送信側のスループットとリトライ動作を実際の Dify なしで比較できます。
+
+同時送信数 1 は逐次送信（upload_settings.pipelining 無効）、2 以上は並列送信パイプラインの
+上限（upload_settings.max_concurrency）として扱います。
+
+使い方:
+    python scripts/load_test.py [--documents 2000] [--size-kb 4] [--concurrency 1 4 8 16]
+                                [--latency-ms 50 --distribution lognormal] [--error-429 0.02] [--json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.lib.dify_stub import DifyStubServer, add_stub_arguments, stub_settings_from_args  # noqa: E402
+
+API_KEY = "load-test"
+DATASET_ID = "load-test"
+
+
+def _write_documents(folder: str, count: int, size_kb: float) -> None:
+    paragraph = "負荷試験用の本文です。Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n\n"
+    body = paragraph * max(1, int(size_kb * 1024 / len(paragraph.encode("utf-8"))))
+    for i in range(count):
+        subfolder = os.path.join(folder, f"folder{i % 20:02d}")
+        os.makedirs(subfolder, exist_ok=True)
+        with open(os.path.join(subfolder, f"document_{i:06d}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Document {i}\n\n{body}")
+
+
+def _write_config(work_dir: str, input_folder: str, url: str, concurrency: int, workers: int) -> str:
+    config = {
+        "input_folder": input_folder,
+        "dify_url": url,
+        "api_key": API_KEY,
+        "dataset_id": DATASET_ID,
+        "log_dir": os.path.join(work_dir, "log"),
+        "backup_folder": os.path.join(work_dir, "backup"),
+        "file_extensions": [".md"],
+        "worker_settings": {"workers": workers},
+        "upload_settings": {
+            "pipelining": concurrency > 1,
+            "max_document_kb": 1024 * 1024,
+            "max_concurrency": max(1, concurrency),
+        },
+    }
+    path = os.path.join(work_dir, f"config-c{concurrency}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def _reset_state(input_folder: str) -> None:
+    """前回の実行のメタデータ・コストモデルを削除する（毎回同じ条件で計測するため）。"""
+    for name in os.listdir(input_folder):
+        if name.startswith("."):
+            path = os.path.join(input_folder, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+
+def run(args: argparse.Namespace) -> list:
+    from src.cli.main import main
+
+    settings = stub_settings_from_args(args, API_KEY)
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="dify-load-test-")
+    input_folder = os.path.join(work_dir, "input")
+    os.makedirs(input_folder, exist_ok=True)
+    _write_documents(input_folder, args.documents, args.size_kb)
+
+    results = []
+    try:
+        with DifyStubServer(settings) as stub:
+            for concurrency in args.concurrency:
+                _reset_state(input_folder)
+                stub.reset()
+                config_path = _write_config(work_dir, input_folder, stub.url, concurrency, args.workers)
+                started = time.monotonic()
+                exit_code = main([config_path, "--force"])
+                elapsed = time.monotonic() - started
+                stats = stub.stats()
+                results.append({
+                    "concurrency": concurrency,
+                    "exit_code": exit_code,
+                    "elapsed": round(elapsed, 3),
+                    "documents_per_second": round(stats["documents"] / elapsed, 2) if elapsed > 0 else 0.0,
+                    "stub": stats,
+                })
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def _format(results: list, documents: int) -> str:
+    lines = [
+        f"{'concurrency':>11} {'elapsed(s)':>10} {'docs/s':>8} {'stored':>7} {'requests':>8} "
+        f"{'429':>5} {'5xx':>5} {'dup':>5} {'peak':>5} exit",
+    ]
+    for result in results:
+        stub = result["stub"]
+        errors_5xx = sum(count for status, count in stub["by_status"].items() if status.startswith("5"))
+        lines.append(
+            f"{result['concurrency']:>11} {result['elapsed']:>10.2f} {result['documents_per_second']:>8.1f} "
+            f"{stub['documents']:>7} {stub['requests']:>8} {stub['by_status'].get('429', 0):>5} "
+            f"{errors_5xx:>5} {stub['duplicate_creates']:>5} {stub['peak_inflight']:>5} {result['exit_code']}"
+        )
+    lines.append(f"(documents generated: {documents}; stored = documents in the stub dataset after the run)")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test the uploader against a local Dify stub")
+    parser.add_argument("--documents", type=int, default=2000, help="Number of Markdown files (default: 2000)")
+    parser.add_argument("--size-kb", type=float, default=4, help="Approximate size of each file in KB (default: 4)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16],
+                        help="Upload concurrency levels to run (1 = sequential; default: 1 4 8 16)")
+    parser.add_argument("--workers", type=int, default=0, help="Converter worker processes (0 = CPU count)")
+    parser.add_argument("--work-dir", help="Use this folder for inputs/logs instead of a temporary one (kept)")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary folder (logs, backups)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    if args.documents < 1 or any(c < 1 for c in args.concurrency):
+        parser.error("--documents and --concurrency must be >= 1")
+    try:
+        stub_settings_from_args(args)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    results = run(args)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print(_format(results, args.documents))
+    return 0 if all(result["exit_code"] == 0 for result in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""追跡ファイルのメモリ使用量計測スクリプト
+
+FileTracker.get_all_metadata() の結果（JSON から読み込んだ辞書のエントリ）をそのまま
+保持した場合（変更前の DiscoverySweep）と、DiscoverySweep が FileRecord（__slots__、
+フォルダ部分を intern）に変換して保持した場合で、指定件数（既定 500,000 件）の
+メモリ使用量を比較します。
+
+使い方:
+    python scripts/measure_record_memory.py [--count 500000] [--folders 2000]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.lib.orphan_sweep import DiscoverySweep, normalize_path  # noqa: E402
+
+
+def _tracker_json(count: int, folders: int) -> str:
+    """.file_metadata.json と同じ形の JSON 文字列を作る。"""
+    now = datetime.now().isoformat()
+    entries = {}
+    for i in range(count):
+        path = os.path.join("/mnt/share", f"dept{i % 12:02d}", f"folder{i % folders:05d}", f"document_{i:07d}.docx")
+        entries[path] = {
+            "file_path": path,
+            "last_processed": now,
+            "file_size": 1000 + i,
+            "last_modified": now,
+            "content_hash": f"{i:064x}",
+            "processing_status": "success",
+            "dify_document_id": f"doc-{i:032x}",
+        }
+    return json.dumps(entries)
+
+
+def _hold_dicts(text: str):
+    """変更前: エントリの辞書と 正規化パス → キー の辞書・未マーク集合を保持する。"""
+    tracked = json.loads(text)
+    keys = {normalize_path(key): key for key in tracked}
+    return tracked, keys, set(keys)
+
+
+def _hold_records(text: str):
+    """変更後: DiscoverySweep が FileRecord に変換して保持する（エントリの辞書は破棄される）。"""
+    return DiscoverySweep(json.loads(text))
+
+
+def _measure(holder, text: str):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    data = holder(text)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current, peak, elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare memory held for tracked files: dict entries vs FileRecord")
+    parser.add_argument("--count", type=int, default=500_000, help="Number of tracked files")
+    parser.add_argument("--folders", type=int, default=2000, help="Number of distinct folders")
+    args = parser.parse_args(argv)
+
+    text = _tracker_json(args.count, args.folders)
+    print(f"entries: {args.count:,}  folders: {args.folders:,}")
+    results = {}
+    for label, holder in (("dict (before)", _hold_dicts), ("records (after)", _hold_records)):
+        size, peak, elapsed = _measure(holder, text)
+        results[label] = size
+        print(f"{label:>16}: {size / 1024 / 1024:8.1f} MiB held  {peak / 1024 / 1024:8.1f} MiB peak  "
+              f"build {elapsed:6.2f}s")
+
+    before, after = results["dict (before)"], results["records (after)"]
+    print(f"{'reduction':>16}: {(1 - after / before) * 100:8.1f} %")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
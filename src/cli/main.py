@@ -6,165 +6,976 @@
 - ファイル更新検知による効率的な処理
 - Dify への送信
 
+複数の設定ファイル（またはジョブ一覧形式の設定ファイル）を指定すると、
+探索結果・変換ワーカー・HTTP接続を共有して1プロセスで順番に公平に処理します。
+`--shard i/N` を指定すると、ファイルをN個に分割したうちi番目だけを処理します
+（複数ホストでの分散実行。`--work-queue` で共有キューを介した作業の融通も可能）。
+`--reconcile` を指定すると、トラッカーに記録したドキュメントがデータセットに存在するかを
+照合し、失われたドキュメントのみ再送信します（参照されないドキュメントは
+`--delete-strays` を併せて指定した場合のみ削除します）。
+`--watch SECONDS` を指定すると常駐し、指定間隔で同期を繰り返します。設定ファイルの
+更新は次の同期から反映し、変換に影響する設定が変わったファイルは再変換します。
+
 使い方（簡易）:
     python -m src.cli.main path/to/config.yaml
+    python -m src.cli.main dept-a.yaml dept-b.yaml jobs.yaml
+    python -m src.cli.main config.yaml --shard 0/4 --work-queue /share/queue.sqlite3
+    python -m src.cli.main config.yaml --merge-shards 4
+    python -m src.cli.main config.yaml --watch 300
 """
 from __future__ import annotations
 
 import argparse
 import os
+import socket
 import sys
+import time
 from pathlib import Path
 
-from src.lib.config import load_config
-from src.lib.converter import convert_file_to_markdown, discover_files, extract_markdown_metadata
-from src.lib.dify_client import DifyClient
+from src.lib.batch_runner import SharedResources, folder_depth
+from src.lib.config import Config, ConfigWatcher, load_job_configs
+from src.lib.document_index import DocumentIndex, index_path_for
 from src.lib.file_tracker import FileTracker
-from src.lib.backup_manager import BackupManager
-from src.lib.logging import get_logger
+from src.lib.backup_catalog import BackupCatalog, rebuild_catalog
+from src.lib.lazy_import import build_startup_report, format_startup_report, loaded_document_libraries
+from src.lib.logging import get_logger, shutdown_loggers
+from src.lib.orphan_sweep import (
+    DiscoverySweep, delete_documents_bulk, metadata_operation, normalize_path, update_renamed_metadata,
+)
+from src.lib.planner import JobPlan, format_plan, plan_job, summarize_plans
+from src.lib.records import DocumentMetadata
+from src.lib.sharding import (
+    ShardSpec, merge_shard_summaries, owned_entries, parse_shard, shard_key, shard_metadata_file, write_shard_summary,
+)
+
+# 変換ワーカー・Difyクライアント等は処理対象ファイルがある場合のみ SharedResources から読み込む
+# （変更の無い定期実行の起動時間を短く保つため）
+
+
+class SyncJob:
+    """1つの設定（入力フォルダ → データセット）の同期処理。
+
+    prepare() で処理対象を決め、変換結果ごとに handle() を呼び、最後に finish() で
+    削除の反映とメタデータのクリーンアップを行う。変換ワーカー等は SharedResources で共有する。
+    """
+
+    def __init__(self, cfg: Config, shared: SharedResources, job_id: str, metadata_file: str,
+                 key: str, shard: ShardSpec | None = None):
+        self.cfg = cfg
+        self.shared = shared
+        # ホスト間で共通のジョブ識別子（共有ワークキューで使用）
+        self.key = key
+        self.shard = shard
+        self.logger = get_logger("dify_batch", job_id=job_id, log_dir=cfg.log_dir,
+                                 level=cfg.log_level, settings=cfg.log_settings)
+        # ファイル更新検知機能を初期化（メタデータファイルはinput_folderに配置）
+        self.file_tracker = FileTracker(metadata_file)
+        # 変換時に収集した文書情報（再変換せずにメタデータを更新するために保持）
+        self.document_index = DocumentIndex(index_path_for(metadata_file))
+        self.backup_manager = None
+        self.sweep = None
+        self.all_files: list[str] = []
+        self.files_to_process: list[str] = []
+        self.renames = []
+        self.doc_api = None
+        self.successes = 0
+        self.failures = 0
+        self.backups_created = 0
+        self.deleted = 0
+        self.metadata_refreshed = 0
+        # --reconcile で再送信したファイル数・削除した参照されないドキュメント数
+        self.reuploaded_missing = 0
+        self.strays_deleted = 0
+        # 共有ワークキュー使用時に他シャードから引き受けた件数・他ホストが処理した件数
+        self.stolen = 0
+        self.processed_by_peers = 0
+
+    def _document_api(self):
+        if self.doc_api is None:
+            self.doc_api = self.shared.document_api(self.cfg)
+        return self.doc_api
+
+    def cost_model(self):
+        """過去の実行時間から学習したコストモデル（入力フォルダごとに共有）。"""
+        return self.shared.cost_model(os.path.join(self.cfg.input_folder, ".conversion_costs.json"))
+
+    def prepare(self, force: bool, dry_run: bool = False) -> bool:
+        """ファイルを探索し、処理対象のファイルを決定する。
+
+        Args:
+            force: 変更検知を無効にして全ファイルを処理する場合True
+            dry_run: 実行計画の作成のみ行う場合True（移動の反映・バックアップ準備を行わない）
+
+        Returns:
+            入力フォルダが存在せず実行できない場合False
+        """
+        cfg, logger, file_tracker = self.cfg, self.logger, self.file_tracker
+
+        # 探索対象拡張子
+        exts = cfg.file_extensions or [".md", ".txt", ".docx"]
+
+        if not os.path.isdir(cfg.input_folder):
+            logger.info({"event": "error", "message": f"input_folder not found: {cfg.input_folder}"})
+            return False
+
+        # バックアップマネージャーを初期化（統計・クリーンアップはカタログで行う）
+        if not dry_run:
+            self.backup_manager = self.shared.backup_manager(cfg)
+
+        # すべてのファイルを発見（同じフォルダ・親フォルダを探索済みの場合は結果を再利用）
+        # 探索と同時に、追跡中のファイルのうち見つかったものをマークする（削除検出用）
+        # シャーディング時は担当シャードのファイル・トラッカーエントリのみを対象とする
+        tracked = file_tracker.get_all_metadata()
+        discovered = self.shared.discovery.discover(cfg.input_folder, exts)
+        if self.shard is not None:
+            tracked = owned_entries(tracked, cfg.input_folder, self.shard)
+            discovered = [p for p in discovered if self.shard.owns(p, cfg.input_folder)]
+        self.sweep = sweep = DiscoverySweep(tracked)
+        self.all_files = all_files = list(sweep.watch(discovered))
+
+        # 変更されたファイルのみに絞り込み（--forceフラグで無効化可能）
+        if force:
+            files_to_process = all_files
+            logger.info({"event": "force_mode", "message": "Processing all files (force mode)", "total_files": len(all_files)})
+        else:
+            files_to_process = []
+            for file_path in all_files:
+                if file_tracker.is_file_changed(file_path):
+                    files_to_process.append(file_path)
+
+            # 変換に影響する設定が前回の送信時から変わったファイルは、内容が同じでも再変換する
+            changed = set(files_to_process)
+            stale = self.document_index.stale((p for p in all_files if p not in changed), cfg.fingerprint)
+            if stale:
+                logger.info({"event": "settings_changed", "fingerprint": cfg.fingerprint, "files": len(stale)})
+                files_to_process.extend(stale)
+
+            skipped_count = len(all_files) - len(files_to_process)
+            logger.info({
+                "event": "file_filtering",
+                "total_files": len(all_files),
+                "files_to_process": len(files_to_process),
+                "skipped_unchanged": skipped_count
+            })
+
+        # 移動（名前変更）の検出: 消えたファイルと新しいファイルを内容ハッシュで照合し、
+        # 既存のDifyドキュメントを引き継いで再変換・再登録を省く
+        new_files = [p for p in files_to_process if not sweep.is_tracked(p)]
+        self.renames = renames = (sweep.detect_renames(new_files)
+                                  if cfg.detect_renames and cfg.dataset_id and new_files else [])
+        if renames and dry_run:
+            renamed_paths = {rename.new_path for rename in renames}
+            files_to_process = [p for p in files_to_process if p not in renamed_paths]
+        elif renames:
+            doc_api = self._document_api()
+            renamed_paths = set()
+            for rename in renames:
+                try:
+                    if rename.new_name:
+                        doc_api.rename_document(cfg.dataset_id, rename.document_id, rename.new_name)
+                    file_tracker.update_metadata(rename.new_path, "success", rename.document_id)
+                    self.document_index.move(rename.old_key, rename.new_path, rename.document_id)
+                    renamed_paths.add(rename.new_path)
+                    logger.info({"event": "file_renamed", "from": rename.old_key, "to": rename.new_path,
+                                 "document_id": rename.document_id, "new_name": rename.new_name})
+                except Exception as exc:
+                    # 引き継げなかった場合は通常の新規登録・削除として扱う
+                    sweep.cancel_rename(rename)
+                    logger.info({"event": "rename_error", "from": rename.old_key, "to": rename.new_path, "error": str(exc)})
+            files_to_process = [p for p in files_to_process if p not in renamed_paths]
+
+            # 名前の変更だけでは source_path 等のメタデータが移動前のパスのまま残るため、まとめて更新する
+            moved = [rename for rename in renames if rename.new_path in renamed_paths]
+            try:
+                updated, failed = update_renamed_metadata(doc_api, cfg.dataset_id, moved, self.document_index.get)
+                logger.info({"event": "renamed_metadata_updated", "documents": updated, "failed": failed})
+            except Exception as exc:
+                logger.info({"event": "rename_metadata_error", "documents": len(moved), "error": str(exc)})
+
+        self.files_to_process = files_to_process
+        if not files_to_process:
+            logger.info({"event": "no_changes", "message": "No files need processing"})
+            # 処理するファイルがなくてもクリーンアップは実行する
+        return True
+
+    def handle(self, path: str, outcome, track: bool = True, done=None) -> tuple[str, str | None] | None:
+        """1ファイル分の変換結果をバックアップ・送信し、メタデータを更新する。
+
+        upload_settings.pipelining が有効な場合、小さなドキュメントは並列送信パイプラインに
+        投入し、送信完了後（SharedResources.flush_uploads() 等の中）にメタデータを更新する。
+
+        Args:
+            path: このジョブで発見したファイルパス
+            outcome: ConversionOutcome（他のジョブと共有される場合がある）
+            track: トラッカーを更新する場合True（他シャードから引き受けたファイルはFalse）
+            done: 並列送信したファイルの (処理結果, DifyドキュメントID) を受け取る関数
+
+        Returns:
+            (処理結果 success / error, DifyドキュメントID)。並列送信に投入した場合はNone
+        """
+        from src.lib.upload_pipeline import PendingUpload
+
+        cfg, logger = self.cfg, self.logger
+        try:
+            md = outcome.result()
+
+            # 変換結果のバックアップを作成
+            try:
+                backup_path = self.backup_manager.backup_markdown(path, md, cfg.input_folder)
+                self.backups_created += 1
+                logger.info({"event": "backup_created", "source": path, "backup": backup_path})
+            except Exception as backup_exc:
+                logger.info({"event": "backup_error", "path": path, "error": str(backup_exc)})
+                # バックアップ失敗でも処理は継続
+
+            # タイトル等は変換時に収集済み（Markdown を改めて解析しない）
+            info = outcome.info
+            title = info.title or Path(path).stem
+
+            # dataset_idが設定されている場合は新しいAPIエンドポイントを使用
+            metadata = DocumentMetadata(path, info.title, cfg.dataset_id).as_dict()
+
+            # 小さなドキュメントは往復時間を重ね合わせるため並列に送信する
+            settings = cfg.upload_settings
+            if settings.pipelining and len(md.encode("utf-8")) <= settings.max_document_kb * 1024:
+                def on_uploaded(resp, exc, elapsed):
+                    result = self._uploaded(path, outcome, track, resp, exc, elapsed)
+                    if done is not None:
+                        done(*result)
+
+                upload = PendingUpload(path, title, md, metadata, cfg.chunk_settings)
+                self.shared.upload_pipeline(cfg).submit(upload, on_uploaded)
+                return None
+
+            # v2.2.0新機能: チャンク設定をDifyClientに渡す
+            upload_started = time.monotonic()
+            resp = self.shared.dify_client(cfg).push_markdown(
+                title,
+                md,
+                metadata=metadata,
+                chunk_settings=cfg.chunk_settings
+            )
+        except Exception as exc:
+            return self._failed(path, outcome, track, exc)
+        return self._uploaded(path, outcome, track, resp, None, time.monotonic() - upload_started)
+
+    def _uploaded(self, path: str, outcome, track: bool, resp, exc, elapsed: float) -> tuple[str, str | None]:
+        """送信結果をコストモデル・トラッカー・文書情報インデックスに反映する。"""
+        if exc is not None:
+            return self._failed(path, outcome, track, exc)
+        try:
+            self.cost_model().record_upload(path, elapsed)
+
+            # 成功時：ファイルメタデータを更新
+            if track:
+                self.file_tracker.update_metadata(path, "success", resp.get("document_id"))
+                self.document_index.update(path, resp.get("document_id"), outcome.info, self.cfg.fingerprint)
+            self.successes += 1
+            self.logger.info({"event": "uploaded", "path": path, "response": resp})
+            return "success", resp.get("document_id")
+        except Exception as exc:
+            return self._failed(path, outcome, track, exc)
+
+    def _failed(self, path: str, outcome, track: bool, exc: Exception) -> tuple[str, None]:
+        """変換・送信の失敗を記録する。"""
+        from src.lib.converter_pool import ConversionFailed
+
+        # 失敗時：エラー状態でメタデータを更新
+        if track:
+            try:
+                self.file_tracker.update_metadata(path, "error")
+            except Exception:
+                # メタデータ更新が失敗しても処理は継続
+                pass
+
+        self.failures += 1
+        reason = exc.reason if isinstance(exc, ConversionFailed) else None
+        self.logger.info({"event": "error", "path": path, "error": str(exc), "reason": reason,
+                          "killed": outcome.killed, "elapsed": round(outcome.elapsed, 3)})
+        return "error", None
+
+    def apply_peer_results(self, results) -> None:
+        """他ホストが処理したこのシャードのファイルの結果をトラッカーに反映する。
+
+        Args:
+            results: 共有ワークキューの TaskResult のリスト（このジョブの分）
+        """
+        for result in results:
+            path = os.path.join(self.cfg.input_folder, *result.path.split("/"))
+            try:
+                self.file_tracker.update_metadata(path, result.status, result.document_id)
+                self.processed_by_peers += 1
+            except Exception as exc:
+                self.logger.info({"event": "error", "path": path, "error": str(exc)})
+
+    def document_title(self, path: str) -> str:
+        """送信時のドキュメント名（変換時に収集したタイトル、無ければファイル名）を返す。"""
+        info = self.document_index.get(path)
+        return (info.title if info is not None else None) or Path(path).stem
+
+    def apply_reconcile(self, plan) -> None:
+        """データセットとの照合結果を反映する。
+
+        IDを付け替えられるファイルはトラッカー・文書情報インデックスのIDを更新し、
+        ドキュメントが失われたファイルは処理対象に加える。削除されたファイル・
+        既に処理対象のファイルは通常の処理に任せる。
+
+        Args:
+            plan: ReconcilePlan
+        """
+        files = {normalize_path(path): path for path in self.all_files}
+        queued = {normalize_path(path) for path in self.files_to_process}
+        relinked = 0
+        for key, document_id in plan.relinked:
+            path = files.get(normalize_path(key))
+            if path is None or normalize_path(key) in queued:
+                continue
+            try:
+                self.file_tracker.update_metadata(path, "success", document_id)
+                self.document_index.move(path, path, document_id)
+                relinked += 1
+            except Exception as exc:
+                self.logger.info({"event": "error", "path": path, "error": str(exc)})
+
+        missing = [files[key] for key in map(normalize_path, plan.missing) if key in files and key not in queued]
+        self.files_to_process.extend(missing)
+        self.reuploaded_missing = len(missing)
+        self.logger.info({"event": "reconcile_job", "missing": len(missing), "relinked": relinked,
+                          "referenced": len(plan.referenced)})
+
+    def refresh_metadata(self, batch_size: int = 100) -> None:
+        """変更の無いファイルについて、保存済みの文書情報から Dify のメタデータを更新する。
+
+        再変換・本文の再送信は行わない。データセットに定義されているメタデータ項目のみ送信する。
+
+        Args:
+            batch_size: 1リクエストでまとめて更新するドキュメント数
+        """
+        cfg, logger = self.cfg, self.logger
+        if not cfg.dataset_id:
+            return
+        changed = set(self.files_to_process)
+        entries = list(self.document_index.entries(p for p in self.all_files if p not in changed))
+        if not entries:
+            return
+
+        doc_api = self._document_api()
+        try:
+            field_ids = doc_api.list_metadata_fields(cfg.dataset_id)
+        except Exception as exc:
+            logger.info({"event": "metadata_refresh_error", "error": str(exc)})
+            return
+
+        operations = [operation for operation in (
+            metadata_operation(document_id, path, info, field_ids) for path, document_id, info in entries)
+            if operation is not None]
+
+        for start in range(0, len(operations), batch_size):
+            batch = operations[start:start + batch_size]
+            try:
+                doc_api.update_documents_metadata(cfg.dataset_id, batch)
+                self.metadata_refreshed += len(batch)
+            except Exception as exc:
+                logger.info({"event": "metadata_refresh_error", "documents": len(batch), "error": str(exc)})
+        logger.info({"event": "metadata_refreshed", "documents": self.metadata_refreshed,
+                     "indexed": len(entries), "fields": sorted(field_ids)})
+
+    def plan(self) -> JobPlan:
+        """prepare(dry_run=True) の結果から実行計画を作成する。"""
+        cfg = self.cfg
+        return plan_job(
+            self.key,
+            self.all_files,
+            self.files_to_process,
+            self.sweep.is_tracked,
+            renames=len(self.renames),
+            deleted_files=len(self.sweep.sweep()),
+            deleted_documents=len(self.sweep.deleted_documents()),
+            delete_remote=bool(cfg.delete_removed_documents and cfg.dataset_id),
+            cost_model=self.cost_model(),
+        )
+
+    def summary(self) -> dict:
+        """シャードサマリ用のジョブごとの集計を返す。"""
+        return {
+            "name": self.key,
+            "files": len(self.all_files),
+            "to_process": len(self.files_to_process),
+            "successes": self.successes,
+            "failures": self.failures,
+            "deleted": self.deleted,
+            "metadata_refreshed": self.metadata_refreshed,
+            "reuploaded_missing": self.reuploaded_missing,
+            "strays_deleted": self.strays_deleted,
+            "stolen": self.stolen,
+            "processed_by_peers": self.processed_by_peers,
+        }
+
+    def finish(self) -> None:
+        """削除されたファイルを反映し、孤立したメタデータをクリーンアップする。"""
+        cfg, logger, sweep = self.cfg, self.logger, self.sweep
+
+        if self.files_to_process:
+            # summary
+            logger.info({"event": "summary", "successes": self.successes, "failures": self.failures,
+                         "backups_created": self.backups_created})
+
+        # 孤立したメタデータのクリーンアップ
+        # 探索時にマークされなかった追跡ファイルを削除済みとして扱う（追加のファイルアクセスは行わない）
+        try:
+            deleted_files = sweep.sweep()
+            self.deleted = len(deleted_files)
+            for metadata_file_path in deleted_files:
+                logger.info({"event": "file_deleted", "path": metadata_file_path})
+
+            if deleted_files:
+                # 削除されたファイルに対応するDifyドキュメントをまとめて削除（オプション）
+                deleted_documents = sweep.deleted_documents()
+                if cfg.delete_removed_documents and cfg.dataset_id and deleted_documents:
+                    delete_started = time.monotonic()
+                    removed_ids, failed_ids = delete_documents_bulk(
+                        self._document_api(), cfg.dataset_id, [document_id for _, document_id in deleted_documents])
+                    self.cost_model().record_delete(len(removed_ids), time.monotonic() - delete_started)
+                    logger.info({"event": "documents_deleted", "deleted": len(removed_ids), "failed": failed_ids})
+
+                removed_count = self.file_tracker.cleanup_orphaned_metadata(set(self.all_files))
+                self.document_index.prune(self.all_files)
+                if removed_count > 0:
+                    logger.info({"event": "metadata_cleanup", "removed_orphaned_entries": removed_count})
+        except Exception as exc:
+            logger.info({"event": "cleanup_error", "error": str(exc)})
+
+        try:
+            self.document_index.save()
+        except OSError as exc:
+            logger.info({"event": "document_index_error", "error": str(exc)})
+
+
+def _metadata_files(configs: list[Config], shard: ShardSpec | None = None) -> list[str]:
+    """ジョブごとのメタデータファイルのパスを返す。
+
+    同じ入力フォルダを複数のジョブが対象とする場合は、先頭のジョブが従来どおり
+    .file_metadata.json を使い、2つ目以降のジョブはデータセットごとのファイルに分ける
+    （ジョブを追加したときに既存ジョブの変更検知がリセットされて全件再送信にならないように）。
+    シャーディング時はシャードごとに分ける。
+    """
+    seen: set[str] = set()
+    paths = []
+    for index, cfg in enumerate(configs):
+        key = normalize_path(os.path.abspath(cfg.input_folder))
+        name = ".file_metadata.json"
+        if key in seen:
+            name = f".file_metadata.{cfg.dataset_id or index}.json"
+        seen.add(key)
+        path = os.path.join(cfg.input_folder, name)
+        paths.append(shard_metadata_file(path, shard) if shard is not None else path)
+    return paths
+
+
+def _reconcile(jobs: list[SyncJob], failed: list[SyncJob], delete_strays: bool = False,
+               page_concurrency: int = 8) -> None:
+    """トラッカーとデータセットのドキュメント一覧を照合する（--reconcile）。
+
+    同じデータセットを対象とするジョブはまとめて照合し、どのジョブのファイルからも
+    参照されず、どのファイルとも名前が一致しないドキュメントを削除候補とする。
+    削除候補のIDは常にログに出力し、削除は delete_strays が指定された場合のみ行う。
+    同じデータセットを対象とするジョブに準備に失敗したものがある場合は、そのジョブの
+    ドキュメントを判別できないため削除しない。
+
+    Args:
+        jobs: prepare() 済みのジョブのリスト
+        failed: prepare() に失敗したジョブのリスト
+        delete_strays: 削除候補のドキュメントを削除する場合True（--delete-strays）
+        page_concurrency: ドキュメント一覧を並列に取得するリクエスト数
+    """
+    from src.lib.reconcile import find_strays, index_documents, plan_reconcile, referenced_ids
+
+    groups: dict[tuple[str, str], list[SyncJob]] = {}
+    for job in jobs:
+        if job.cfg.dataset_id:
+            groups.setdefault((job.cfg.dify_url, job.cfg.dataset_id), []).append(job)
+    incomplete = {(job.cfg.dify_url, job.cfg.dataset_id) for job in failed}
+
+    for (dify_url, dataset_id), group in groups.items():
+        logger = group[0].logger
+        started = time.monotonic()
+        doc_api = group[0]._document_api()
+        try:
+            documents = doc_api.list_all_documents(dataset_id, max_workers=page_concurrency)
+        except Exception as exc:
+            logger.info({"event": "reconcile_error", "dataset_id": dataset_id, "error": str(exc)})
+            continue
+        listed = time.monotonic() - started
+
+        # ID・名前をキーにした辞書でトラッカーのエントリと突き合わせる
+        by_id, by_name = index_documents(documents)
+        tracked = [job.file_tracker.get_all_metadata() for job in group]
+        claimed = set().union(*(referenced_ids(entries, by_id) for entries in tracked))
+        referenced: set[str] = set()
+        for job, entries in zip(group, tracked):
+            plan = plan_reconcile(entries, by_id, by_name, job.document_title, claimed)
+            job.apply_reconcile(plan)
+            referenced |= plan.referenced
+
+        # エラー状態のエントリ・未送信のファイルと同じ名前のドキュメントは削除候補にしない
+        names = {job.document_title(key) for job, entries in zip(group, tracked) for key in entries}
+        names.update(job.document_title(path) for job in group for path in job.all_files)
+        strays = find_strays(by_id, referenced, names)
+        deleted, delete_failed = [], {}
+        if strays:
+            blocked = (dify_url, dataset_id) in incomplete
+            logger.info({
+                "event": "reconcile_strays",
+                "dataset_id": dataset_id,
+                "document_ids": strays,
+                "names": [by_id[document_id].get("name") for document_id in strays],
+                "delete": delete_strays and not blocked,
+                "skipped_reason": "job_prepare_failed" if delete_strays and blocked else None,
+            })
+            if delete_strays and not blocked:
+                deleted, delete_failed = delete_documents_bulk(doc_api, dataset_id, strays,
+                                                               max_workers=page_concurrency)
+                group[0].strays_deleted = len(deleted)
+        logger.info({
+            "event": "reconcile",
+            "dataset_id": dataset_id,
+            "remote_documents": len(by_id),
+            "tracked": sum(len(entries) for entries in tracked),
+            "missing": sum(job.reuploaded_missing for job in group),
+            "strays": len(strays),
+            "strays_deleted": len(deleted),
+            "strays_failed": delete_failed,
+            "list_seconds": round(listed, 3),
+            "elapsed": round(time.monotonic() - started, 3),
+        })
+
+
+def _convert(jobs: list[SyncJob], entries: list[tuple[int, str]], shared: SharedResources,
+             backend_imports: dict[str, float]):
+    """ファイルを共有ワーカープールで変換し、対象とするジョブごとに結果を返す。
+
+    複数のジョブが同じファイルを同じ変換設定で対象とする場合は1回だけ変換する。
+    変換はジョブ間でラウンドロビンに投入し、ジョブ内ではコストの大きいファイルから投入する。
+    変換設定の異なるジョブがある場合は、設定ごとに順に変換する。
+
+    Args:
+        jobs: ジョブのリスト
+        entries: (ジョブ番号, ファイルパス) のリスト
+
+    Yields:
+        (ジョブ番号, ファイルパス, ConversionOutcome)
+    """
+    # 変換設定のフィンガープリント → (変換設定, 正規化パス → [(ジョブ番号, そのジョブで発見したパス)], パス)
+    batches: dict[str, tuple] = {}
+    for index, path in entries:
+        settings = jobs[index].cfg.conversion_settings
+        _, owners, paths = batches.setdefault(settings.fingerprint, (settings, {}, []))
+        key = normalize_path(os.path.abspath(path))
+        if key not in owners:
+            owners[key] = []
+            paths.append(path)
+        owners[key].append((index, path))
+
+    for settings, owners, paths in batches.values():
+        def owners_of(path: str, owners=owners) -> list[tuple[int, str]]:
+            return owners[normalize_path(os.path.abspath(path))]
+
+        # 過去の実行時間から学習したコストモデルで、重いファイルから先に変換する
+        cost = lambda path: jobs[owners_of(path)[0][0]].cost_model().estimate(path)  # noqa: E731
+        group = lambda path: owners_of(path)[0][0]  # noqa: E731
+
+        # 変換はタイムアウト・メモリ上限付きのワーカープロセスで実行し、完了順に送信する
+        for outcome in shared.pool().imap_unordered(paths, cost=cost, group=group, settings=settings):
+            for name, seconds in outcome.imports.items():
+                backend_imports[name] = max(seconds, backend_imports.get(name, 0.0))
+            if outcome.ok:
+                models = {id(model): model
+                          for model in (jobs[index].cost_model() for index, _ in owners_of(outcome.path))}
+                for model in models.values():
+                    model.record(outcome.path, outcome.elapsed)
+            for index, path in owners_of(outcome.path):
+                yield index, path, outcome
+
+
+def _convert_and_upload(jobs: list[SyncJob], shared: SharedResources, backend_imports: dict[str, float]) -> None:
+    """全ジョブの処理対象ファイルを変換し、各ジョブで送信する。"""
+    entries = [(index, path) for index, job in enumerate(jobs) for path in job.files_to_process]
+    for index, path, outcome in _convert(jobs, entries, shared, backend_imports):
+        jobs[index].handle(path, outcome)
+    _flush_uploads(jobs, shared)
+
+
+def _flush_uploads(jobs: list[SyncJob], shared: SharedResources) -> None:
+    """並列送信中のドキュメントの完了を待ち、送信統計を出力する。"""
+    for stats in shared.flush_uploads():
+        if stats["submitted"]:
+            jobs[0].logger.info({"event": "upload_pipeline", **stats})
+
+
+def _queue_path(path: str, root: str) -> str:
+    """共有ワークキューに記録する相対パス（大文字小文字はそのまま、区切り文字は "/"）。"""
+    try:
+        relative = os.path.relpath(path, root)
+    except ValueError:
+        # Windowsで別ドライブの場合
+        relative = path
+    return relative.replace(os.sep, "/")
+
+
+def _convert_and_upload_queued(jobs: list[SyncJob], shared: SharedResources, backend_imports: dict[str, float],
+                               queue_path: str, shard: ShardSpec, lease_seconds: float,
+                               poll_seconds: float = 5.0) -> None:
+    """共有ワークキューを介して、他ホストと作業を融通しながら変換・送信する。
+
+    自分のシャードの処理対象をキューに登録し、自分の分を優先してリースしながら処理する。
+    自分の分が無くなったら他シャードの未処理分を引き受け、自分のシャードの作業が
+    すべて完了するまで待つ。他ホストが処理した自分のシャードの結果はトラッカーに反映する。
+    """
+    from src.lib.work_queue import LeaseQueue
+
+    if not jobs:
+        return
+    by_key = {job.key: index for index, job in enumerate(jobs)}
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    with LeaseQueue(queue_path, owner, shard.count, lease_seconds) as queue:
+        for job in jobs:
+            items = []
+            for path in job.files_to_process:
+                try:
+                    stat = os.stat(path)
+                    signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+                except OSError:
+                    signature = ""
+                items.append((job.key, shard_key(path, job.cfg.input_folder), _queue_path(path, job.cfg.input_folder),
+                              signature, job.cost_model().estimate(path)))
+            queue.enqueue(shard.index, items)
+
+        batch_size = max(1, shared.pool().workers * 2)
+        while True:
+            tasks = queue.claim(shard.index, batch_size, list(by_key))
+            if not tasks:
+                # 並列送信中の作業を完了させてから、自分のシャードの残りを確認する
+                shared.flush_uploads()
+                if queue.outstanding(shard.index, list(by_key)) == 0:
+                    break
+                # 自分のシャードの残りは他ホストがリース中: 完了またはリース失効を待つ
+                time.sleep(poll_seconds)
+                continue
+
+            # (ジョブ番号, 正規化パス) → 作業
+            pending = {}
+            entries = []
+            for task in tasks:
+                index = by_key[task.job]
+                path = os.path.join(jobs[index].cfg.input_folder, *task.path.split("/"))
+                pending[(index, normalize_path(os.path.abspath(path)))] = task
+                entries.append((index, path))
+
+            for index, path, outcome in _convert(jobs, entries, shared, backend_imports):
+                task = pending[(index, normalize_path(os.path.abspath(path)))]
+                own = task.shard == shard.index
+                if not own:
+                    jobs[index].stolen += 1
+
+                def complete(status, document_id, task=task, index=index, path=path, outcome=outcome, own=own):
+                    if not queue.complete(task, status, document_id, outcome.error, applied=own):
+                        jobs[index].logger.info({"event": "lease_lost", "path": path})
+
+                result = jobs[index].handle(path, outcome, track=own, done=complete)
+                if result is not None:
+                    complete(*result)
+        _flush_uploads(jobs, shared)
+
+        # 他ホストが処理した自分のシャードのファイルをトラッカーに反映する
+        results = queue.unapplied_results(shard.index)
+        for job in jobs:
+            job.apply_peer_results([result for result in results if result.job == job.key])
+        queue.mark_applied([result for result in results if result.job in by_key])
+        jobs[0].logger.info({"event": "work_queue", "shard": shard.label, "stats": queue.stats()})
+
+
+def _finish_backups(jobs: list[SyncJob], shared: SharedResources) -> None:
+    """バックアップフォルダごとに統計出力・クリーンアップを行い、マネージャーを閉じる。"""
+    loggers = {}
+    for job in jobs:
+        if job.backup_manager is not None:
+            loggers.setdefault(id(job.backup_manager), job.logger)
+
+    for backup_manager, retention_days in shared.backup_managers.values():
+        logger = loggers[id(backup_manager)]
+        # バックアップ統計情報とクリーンアップ
+        try:
+            backup_stats = backup_manager.get_backup_stats()
+            logger.info({"event": "backup_stats", "stats": backup_stats})
+
+            # 保持期間より古いバックアップをクリーンアップ
+            cleaned_count = backup_manager.cleanup_old_backups(days_to_keep=retention_days)
+            if cleaned_count > 0:
+                logger.info({"event": "backup_cleanup", "removed_old_backups": cleaned_count})
+
+        except Exception as exc:
+            logger.info({"event": "backup_cleanup_error", "error": str(exc)})
+
+        # バックグラウンド書き込みを完了させてカタログを閉じる
+        backup_manager.close()
+        for error in getattr(backup_manager, "errors", []):
+            logger.info({"event": "backup_error", "error": error})
 
 
 def main(argv: list[str] | None = None) -> int:
+    try:
+        return _run(argv)
+    finally:
+        # バックグラウンドで書き込み中のログをすべて出力してから終了する
+        shutdown_loggers()
+
+
+def _run(argv: list[str] | None) -> int:
     parser = argparse.ArgumentParser(description="Dify batch uploader")
-    parser.add_argument("config", help="Path to configuration file (YAML or JSON)")
-    parser.add_argument("--force", "-f", action="store_true", 
+    parser.add_argument("config", nargs="+",
+                       help="Path to configuration file(s) (YAML or JSON); a file may define a list of jobs")
+    parser.add_argument("--force", "-f", action="store_true",
                        help="Force processing all files (ignore change detection)")
+    parser.add_argument("--startup-report", action="store_true",
+                       help="Report import time of the CLI and lazily loaded converter backends")
+    parser.add_argument("--rebuild-backup-catalog", action="store_true",
+                       help="Rebuild the backup catalog by scanning backup_folder, then exit")
+    parser.add_argument("--refresh-metadata", action="store_true",
+                       help="Update Dify metadata of unchanged documents from the stored document index (no reconversion)")
+    parser.add_argument("--plan", action="store_true",
+                       help="Dry run: discover and detect changes only, then report planned actions and estimated duration")
+    parser.add_argument("--shard", metavar="I/N",
+                       help="Process only shard I of N (files are partitioned by a stable hash of their path)")
+    parser.add_argument("--work-queue", metavar="PATH",
+                       help="Shared SQLite work queue so sharded hosts can take over each other's pending files")
+    parser.add_argument("--lease-seconds", type=float, default=900,
+                       help="Lease duration for work queue items (default: 900)")
+    parser.add_argument("--shard-dir", metavar="DIR",
+                       help="Folder for shard summaries (default: <input_folder>/.shards)")
+    parser.add_argument("--merge-shards", type=int, metavar="N",
+                       help="Merge the summaries written by N shards, then exit")
+    parser.add_argument("--reconcile", action="store_true",
+                       help="Check tracked documents against the Dify dataset; re-upload missing ones and "
+                            "log the IDs of unreferenced ones")
+    parser.add_argument("--delete-strays", action="store_true",
+                       help="With --reconcile, delete the unreferenced documents (skipped for a dataset "
+                            "when any job targeting it failed to start)")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                       help="Keep running and sync every SECONDS; config file changes are applied to the next sync")
     args = parser.parse_args(argv)
 
-    cfg = load_config(args.config)
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as exc:
+            parser.error(str(exc))
+    if args.work_queue and shard is None:
+        parser.error("--work-queue requires --shard")
+    if args.watch is not None and (args.plan or args.rebuild_backup_catalog or args.merge_shards):
+        parser.error("--watch cannot be combined with --plan, --rebuild-backup-catalog or --merge-shards")
+    if args.reconcile and (shard is not None or args.plan or args.watch is not None):
+        # 他シャードのトラッカーを参照できないため、参照されないドキュメントを判定できない
+        parser.error("--reconcile cannot be combined with --shard, --plan or --watch")
+    if args.delete_strays and not args.reconcile:
+        parser.error("--delete-strays requires --reconcile")
+    if args.watch is not None and args.watch <= 0:
+        parser.error("--watch must be > 0")
+
+    configs = [cfg for path in args.config for cfg in load_job_configs(path)]
+    shard_dir = args.shard_dir or os.path.join(configs[0].input_folder, ".shards")
 
-    # 簡易ジョブID: timestamp
-    job_id = f"job-{int(__import__('time').time())}"
-    logger = get_logger("dify_batch", job_id=job_id, log_dir=cfg.log_dir)
+    # 簡易ジョブID: timestamp（シャーディング時はシャードを付与）
+    batch_id = f"job-{int(time.time())}"
+    if shard is not None:
+        batch_id = f"{batch_id}-{shard.label}"
 
-    client = DifyClient(cfg.dify_url, cfg.api_key)
+    # 不正な設定をデフォルト値に置き換えて処理を進めないよう、起動時に停止する
+    # （--watch で読み込み直す場合と同じく、不正な設定は適用しない）
+    errors = [f"{cfg.job_name or '(default)'}: {error}" for cfg in configs for error in cfg.errors]
+    if errors:
+        logger = get_logger("dify_batch", job_id=batch_id, log_dir=configs[0].log_dir,
+                            level=configs[0].log_level, settings=configs[0].log_settings)
+        logger.error({"event": "config_invalid", "errors": errors})
+        return 2
 
-    # ファイル更新検知機能を初期化（メタデータファイルはinput_folderに配置）
-    metadata_file = os.path.join(cfg.input_folder, ".file_metadata.json")
-    file_tracker = FileTracker(metadata_file)
-    
-    # バックアップマネージャーを初期化
-    backup_manager = BackupManager(cfg.backup_folder)
+    # コーディネーター: 各シャードのサマリを集計するのみのモード
+    if args.merge_shards:
+        logger = get_logger("dify_batch", job_id=f"{batch_id}-merge", log_dir=configs[0].log_dir,
+                            level=configs[0].log_level, settings=configs[0].log_settings)
+        merged = merge_shard_summaries(shard_dir, args.merge_shards)
+        logger.info({"event": "shard_summary", **merged})
+        return 1 if merged["missing"] or merged["failed"] else 0
 
-    # 探索対象拡張子
-    exts = cfg.file_extensions or [".md", ".txt", ".docx"]
+    if args.watch is not None:
+        return _watch(args, configs, batch_id, shard, shard_dir)
+    return _run_cycle(args, configs, batch_id, shard, shard_dir, args.force)
 
-    if not os.path.isdir(cfg.input_folder):
-        logger.info({"event": "error", "message": f"input_folder not found: {cfg.input_folder}"})
-        return 2
 
-    # すべてのファイルを発見
-    all_files = list(discover_files(cfg.input_folder, exts))
-    
-    # 変更されたファイルのみに絞り込み（--forceフラグで無効化可能）
-    if args.force:
-        files_to_process = all_files
-        logger.info({"event": "force_mode", "message": "Processing all files (force mode)", "total_files": len(all_files)})
-    else:
-        files_to_process = []
-        for file_path in all_files:
-            if file_tracker.is_file_changed(file_path):
-                files_to_process.append(file_path)
-        
-        skipped_count = len(all_files) - len(files_to_process)
-        logger.info({
-            "event": "file_filtering", 
-            "total_files": len(all_files),
-            "files_to_process": len(files_to_process), 
-            "skipped_unchanged": skipped_count
-        })
+def _watch(args: argparse.Namespace, configs: list[Config], batch_id: str, shard: ShardSpec | None,
+           shard_dir: str) -> int:
+    """常駐して args.watch 秒ごとに同期を繰り返す（Ctrl+C で終了）。
 
-    if not files_to_process:
-        logger.info({"event": "no_changes", "message": "No files need processing"})
-        # 処理するファイルがなくてもクリーンアップは実行する
-    else:
-        successes = 0
-        failures = 0
-        backups_created = 0
-        for path in files_to_process:
+    設定ファイルが更新された場合は待ち時間を打ち切り、読み込み直した設定で次の同期を行う。
+    不正な設定は適用せず、直前の設定で同期を続ける。--force は最初の同期にのみ適用する。
+    ログは常駐期間を通して同じファイル（batch_id）に出力する。
+    """
+    watcher = ConfigWatcher(args.config)
+    logger = get_logger("dify_batch", job_id=batch_id, log_dir=configs[0].log_dir,
+                        level=configs[0].log_level, settings=configs[0].log_settings)
+    force = args.force
+    cycles = 0
+    try:
+        while True:
+            cycle_started = time.monotonic()
             try:
-                # 変換前にバックアップを作成
-                backup_path = None
-                try:
-                    md = convert_file_to_markdown(path)
-                    backup_path = backup_manager.backup_markdown(path, md, cfg.input_folder)
-                    backups_created += 1
-                    logger.info({"event": "backup_created", "source": path, "backup": backup_path})
-                except Exception as backup_exc:
-                    logger.info({"event": "backup_error", "path": path, "error": str(backup_exc)})
-                    # バックアップ失敗でも処理は継続
-                    md = convert_file_to_markdown(path)
-                
-                extracted = extract_markdown_metadata(md)
-                title = extracted.get("title") or Path(path).stem
-                
-                # dataset_idが設定されている場合は新しいAPIエンドポイントを使用
-                if cfg.dataset_id:
-                    metadata = {"dataset_id": cfg.dataset_id, "source_path": path, "extracted_title": extracted.get("title")}
-                else:
-                    metadata = {"source_path": path, "extracted_title": extracted.get("title")}
-                
-                # v2.2.0新機能: チャンク設定をDifyClientに渡す
-                resp = client.push_markdown(
-                    title, 
-                    md, 
-                    metadata=metadata,
-                    chunk_settings=cfg.chunk_settings
-                )
-                
-                # 成功時：ファイルメタデータを更新
-                file_tracker.update_metadata(path, "success", resp.get("document_id"))
-                successes += 1
-                logger.info({"event": "uploaded", "path": path, "response": resp})
-                
+                exit_code = _run_cycle(args, configs, batch_id, shard, shard_dir, force)
             except Exception as exc:
-                # 失敗時：エラー状態でメタデータを更新
+                exit_code = 1
+                logger.exception({"event": "watch_cycle_error", "error": str(exc)})
+            force = False
+            cycles += 1
+            logger.info({"event": "watch_cycle", "cycle": cycles, "exit_code": exit_code,
+                         "elapsed": round(time.monotonic() - cycle_started, 3)})
+
+            # 次の同期まで待つ（設定ファイルの更新を1秒ごとに確認する）
+            deadline = cycle_started + args.watch
+            while time.monotonic() < deadline and not watcher.changed():
+                time.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+            if watcher.changed():
                 try:
-                    file_tracker.update_metadata(path, "error")
-                except Exception:
-                    # メタデータ更新が失敗しても処理は継続
-                    pass
-                
-                failures += 1
-                logger.info({"event": "error", "path": path, "error": str(exc)})
-
-        # summary
-        logger.info({"event": "summary", "successes": successes, "failures": failures, "backups_created": backups_created})
-
-    # 孤立したメタデータのクリーンアップ
-    # メタデータに記録されている全ファイルをチェックして、実際に存在しないものを削除
-    try:
-        valid_files = set(all_files)
-        # メタデータにあるファイルで実際に存在しないものも含めてチェック
-        all_metadata = file_tracker.get_all_metadata()
-        for metadata_file_path in all_metadata:
-            if not os.path.exists(metadata_file_path):
-                logger.info({"event": "file_deleted", "path": metadata_file_path})
-        
-        removed_count = file_tracker.cleanup_orphaned_metadata(valid_files)
-        if removed_count > 0:
-            logger.info({"event": "metadata_cleanup", "removed_orphaned_entries": removed_count})
-    except Exception as exc:
-        logger.info({"event": "cleanup_error", "error": str(exc)})
-
-    # バックアップ統計情報とクリーンアップ
+                    configs = watcher.reload()
+                    logger.info({"event": "config_reloaded", "jobs": len(configs),
+                                 "fingerprints": [cfg.fingerprint for cfg in configs]})
+                except (OSError, ValueError) as exc:
+                    logger.warning({"event": "config_reload_error", "error": str(exc)})
+    except KeyboardInterrupt:
+        logger.info({"event": "watch_stopped", "cycles": cycles})
+        return 0
+
+
+def _run_cycle(args: argparse.Namespace, configs: list[Config], batch_id: str, shard: ShardSpec | None,
+               shard_dir: str, force: bool) -> int:
+    """全ジョブの同期を1回行う（--plan / --rebuild-backup-catalog の場合はそれのみ）。
+
+    Returns:
+        終了コード
+    """
+    # 複数ジョブの場合はジョブ名を付与したジョブID
+    job_ids = [batch_id] if len(configs) == 1 else [
+        f"{batch_id}-{cfg.job_name or index}" for index, cfg in enumerate(configs)
+    ]
+
+    # 変換ワーカーの設定は最初のジョブのものを使う
+    shared = SharedResources(configs[0].worker_settings.as_dict())
+    jobs = [SyncJob(cfg, shared, job_id, metadata_file, cfg.job_name or str(index), shard)
+            for index, (cfg, job_id, metadata_file)
+            in enumerate(zip(configs, job_ids, _metadata_files(configs, shard)))]
+
+    # バックアップカタログの再構築のみを行うモード
+    if args.rebuild_backup_catalog:
+        rebuilt = set()
+        for job in jobs:
+            folder = os.path.abspath(job.cfg.backup_folder)
+            if folder in rebuilt:
+                continue
+            rebuilt.add(folder)
+            catalog = BackupCatalog(job.cfg.backup_folder)
+            try:
+                count = rebuild_catalog(catalog)
+                job.logger.info({"event": "backup_catalog_rebuilt", "backups": count, "stats": catalog.stats()})
+            finally:
+                catalog.close()
+        return 0
+
+    # 実行計画のみを作成するモード（変換・送信・削除・トラッカー更新は行わない）
+    if args.plan:
+        planned = []
+        exit_code = 0
+        for job in sorted(jobs, key=lambda job: folder_depth(job.cfg.input_folder)):
+            if job.prepare(force, dry_run=True):
+                planned.append(job)
+            else:
+                exit_code = 2
+        planned.sort(key=jobs.index)
+        workers = shared.worker_settings.get("workers") or os.cpu_count() or 1
+        summary = summarize_plans([job.plan() for job in planned], workers)
+        jobs[0].logger.info({"event": "plan", **summary})
+        print(format_plan(summary))
+        return exit_code
+
+    exit_code = 0
+    backend_imports: dict[str, float] = {}
+    started = time.time()
+    ready: list[SyncJob] = []
     try:
-        backup_stats = backup_manager.get_backup_stats()
-        logger.info({"event": "backup_stats", "stats": backup_stats})
-        
-        # 30日より古いバックアップをクリーンアップ
-        cleaned_count = backup_manager.cleanup_old_backups(days_to_keep=30)
-        if cleaned_count > 0:
-            logger.info({"event": "backup_cleanup", "removed_old_backups": cleaned_count})
-            
-    except Exception as exc:
-        logger.info({"event": "backup_cleanup_error", "error": str(exc)})
-
-    # summary
-    if 'successes' in locals() and 'failures' in locals():
-        logger.info({"event": "summary", "successes": successes, "failures": failures, "backups_created": backups_created if 'backups_created' in locals() else 0})
-
-    return 0
+        # 親フォルダのジョブから探索し、配下のフォルダのジョブは探索結果を再利用する
+        for job in sorted(jobs, key=lambda job: folder_depth(job.cfg.input_folder)):
+            if job.prepare(force):
+                ready.append(job)
+            else:
+                exit_code = 2
+        ready.sort(key=jobs.index)
+
+        if args.reconcile:
+            _reconcile(ready, [job for job in jobs if job not in ready], args.delete_strays)
+
+        if args.refresh_metadata:
+            for job in ready:
+                job.refresh_metadata()
+
+        if args.work_queue:
+            _convert_and_upload_queued(ready, shared, backend_imports, args.work_queue, shard, args.lease_seconds)
+        else:
+            _convert_and_upload(ready, shared, backend_imports)
+        for message in shared.save_cost_models():
+            jobs[0].logger.info({"event": "cost_model_error", "error": message})
+
+        for job in ready:
+            job.finish()
+        _finish_backups(ready, shared)
+    except Exception:
+        exit_code = 1
+        raise
+    finally:
+        shared.close()
+        # シャーディング時は集計用のサマリを共有フォルダに書き出す（失敗時も書き出す）
+        if shard is not None:
+            try:
+                write_shard_summary(shard_dir, shard, {
+                    "host": socket.gethostname(),
+                    "pid": os.getpid(),
+                    "started": started,
+                    "finished": time.time(),
+                    "exit_code": exit_code,
+                    "jobs": [job.summary() for job in ready],
+                })
+            except OSError as exc:
+                jobs[0].logger.info({"event": "shard_summary_error", "error": str(exc)})
+
+    if len(jobs) > 1:
+        jobs[0].logger.info({
+            "event": "batch_summary",
+            "jobs": len(jobs),
+            "failed_jobs": len(jobs) - len(ready),
+            "successes": sum(job.successes for job in ready),
+            "failures": sum(job.failures for job in ready),
+            "discovery_walks": shared.discovery.walks,
+            "discovery_reused": shared.discovery.hits,
+        })
+
+    # 変更の無い実行ではドキュメント系ライブラリを読み込まないことを確認する
+    if not any(job.files_to_process for job in ready):
+        loaded = loaded_document_libraries()
+        if loaded:
+            jobs[0].logger.info({"event": "unexpected_document_imports", "modules": loaded})
+
+    if args.startup_report:
+        report = build_startup_report("src.cli.main", backend_imports)
+        jobs[0].logger.info({"event": "startup_report", **report})
+        print(format_startup_report(report), file=sys.stderr)
+
+    return exit_code
 
 
 if __name__ == "__main__":
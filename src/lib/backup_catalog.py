@@ -0,0 +1,390 @@
+"""バックアップカタログ
+
+バックアップの一覧をSQLiteで管理し、書き込み時に増分更新します。
+統計情報はトリガーで集計済みの1行を読むだけ（O(1)）、保持期間による
+クリーンアップは作成日時インデックスの範囲削除で行うため、
+実行のたびにバックアップフォルダ全体を走査する必要がありません。
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILE_NAME = "backup_catalog.sqlite3"
+
+# 旧形式バックアップのファイル名（例: report_20250905123456.md）
+_TIMESTAMPED_NAME = re.compile(r"^(?P<stem>.+?)[_-](?P<ts>\d{14})(?P<ext>\.[^.]+)$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    path TEXT NOT NULL,
+    content_hash TEXT,
+    created_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_backups_created_at ON backups(created_at);
+CREATE INDEX IF NOT EXISTS idx_backups_source ON backups(source, created_at);
+
+CREATE TABLE IF NOT EXISTS objects (
+    path TEXT PRIMARY KEY,
+    stored_size INTEGER NOT NULL,
+    refs INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_backups INTEGER NOT NULL DEFAULT 0,
+    logical_bytes INTEGER NOT NULL DEFAULT 0,
+    unique_objects INTEGER NOT NULL DEFAULT 0,
+    stored_bytes INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO stats (id) VALUES (1);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS backups_after_insert AFTER INSERT ON backups BEGIN
+    INSERT INTO objects (path, stored_size, refs) VALUES (NEW.path, NEW.stored_size, 1)
+        ON CONFLICT(path) DO UPDATE SET refs = refs + 1;
+    UPDATE stats SET total_backups = total_backups + 1, logical_bytes = logical_bytes + NEW.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS backups_after_delete AFTER DELETE ON backups BEGIN
+    UPDATE objects SET refs = refs - 1 WHERE path = OLD.path;
+    UPDATE stats SET total_backups = total_backups - 1, logical_bytes = logical_bytes - OLD.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS objects_after_insert AFTER INSERT ON objects BEGIN
+    UPDATE stats SET unique_objects = unique_objects + 1, stored_bytes = stored_bytes + NEW.stored_size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS objects_after_delete AFTER DELETE ON objects BEGIN
+    UPDATE stats SET unique_objects = unique_objects - 1, stored_bytes = stored_bytes - OLD.stored_size WHERE id = 1;
+END;
+"""
+
+
+class BackupCatalog:
+    """SQLiteによるバックアップカタログ。
+
+    パスはすべてバックアップフォルダからの相対パスで保持する。
+    複数スレッドから利用できるよう、接続はロックで保護する。
+    """
+
+    def __init__(self, backup_folder: str):
+        """カタログを開く（存在しない場合は作成する）。
+
+        Args:
+            backup_folder: バックアップフォルダ
+        """
+        self.backup_folder = backup_folder
+        os.makedirs(backup_folder, exist_ok=True)
+        self.db_path = os.path.join(backup_folder, CATALOG_FILE_NAME)
+        existed = os.path.exists(self.db_path)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if existed and self._meta("built") is None and self.stats()["total_backups"] > 0:
+            # 完了マーカー導入前に作成されたカタログは構築済みとみなす
+            self.mark_built()
+
+    def _meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def is_built(self) -> bool:
+        """カタログの構築が完了しているかどうかを返す。
+
+        構築の途中で中断した場合は False のままとなり、次回に作り直される。
+        """
+        return self._meta("built") == "1"
+
+    def mark_built(self) -> None:
+        """カタログの構築完了を記録する。"""
+        with self._lock:
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('built', '1') "
+                               "ON CONFLICT(key) DO UPDATE SET value = excluded.value")
+
+    def close(self) -> None:
+        """カタログを閉じる。"""
+        with self._lock:
+            self._conn.close()
+
+    def add(self, source: str, path: str, created_at: float, size: int, stored_size: int,
+            content_hash: Optional[str] = None) -> None:
+        """バックアップ1件を登録する。
+
+        Args:
+            source: 元ファイルの相対パス
+            path: バックアップ本体の相対パス（同一パスは1つの本体として共有される）
+            created_at: 作成日時（UNIX タイムスタンプ）
+            size: Markdownのバイト数（非圧縮）
+            stored_size: 保存されているファイルのバイト数
+            content_hash: Markdownのハッシュ（重複排除ストアの場合）
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO backups (source, path, content_hash, created_at, size, stored_size) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (source, path, content_hash, created_at, size, stored_size),
+            )
+
+    def add_many(self, rows: List[Tuple[str, str, Optional[str], float, int, int]]) -> None:
+        """(source, path, content_hash, created_at, size, stored_size) の行を一括登録する。"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO backups (source, path, content_hash, created_at, size, stored_size) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+
+    def has_object(self, path: str) -> bool:
+        """指定の本体がカタログに登録済みかどうかを返す。"""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM objects WHERE path = ?", (path,)).fetchone()
+        return row is not None
+
+    def iter_versions(self) -> Iterator[Tuple[str, str, float, int]]:
+        """重複排除ストアのバージョンを (source, content_hash, created_at, size) で作成日時順に返す。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, content_hash, created_at, size FROM backups "
+                "WHERE content_hash IS NOT NULL ORDER BY created_at"
+            ).fetchall()
+        return iter(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        """集計済みの統計情報を返す（O(1)）。
+
+        Returns:
+            total_backups / logical_bytes / unique_objects / stored_bytes を含む辞書
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT total_backups, logical_bytes, unique_objects, stored_bytes FROM stats WHERE id = 1"
+            ).fetchone()
+        total_backups, logical_bytes, unique_objects, stored_bytes = row
+        return {
+            "total_backups": total_backups,
+            "logical_bytes": logical_bytes,
+            "unique_objects": unique_objects,
+            "stored_bytes": stored_bytes,
+            "backup_folder": self.backup_folder,
+        }
+
+    def delete_older_than(self, cutoff: float, keep_latest: bool = False) -> Tuple[int, List[str]]:
+        """作成日時が cutoff より前のバックアップをカタログから削除する。
+
+        Args:
+            cutoff: 基準日時（UNIX タイムスタンプ）
+            keep_latest: Trueの場合、各ファイルの最新バックアップは削除しない
+
+        Returns:
+            (削除した件数, どこからも参照されなくなった本体の相対パスのリスト)
+        """
+        query = "DELETE FROM backups WHERE created_at < ?"
+        if keep_latest:
+            query += (" AND created_at < (SELECT MAX(b.created_at) FROM backups AS b"
+                      " WHERE b.source = backups.source)")
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                removed = self._conn.execute(query, (cutoff,)).rowcount
+                orphaned = [row[0] for row in self._conn.execute("SELECT path FROM objects WHERE refs <= 0")]
+                self._conn.execute("DELETE FROM objects WHERE refs <= 0")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return removed, orphaned
+
+    def clear(self) -> None:
+        """カタログの内容をすべて削除する。"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            # 構築中であることを記録する（行が無いのは完了マーカー導入前のカタログ）
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('built', '0') "
+                               "ON CONFLICT(key) DO UPDATE SET value = excluded.value")
+            self._conn.execute("DELETE FROM backups")
+            self._conn.execute("DELETE FROM objects")
+            self._conn.execute("UPDATE stats SET total_backups = 0, logical_bytes = 0, "
+                               "unique_objects = 0, stored_bytes = 0 WHERE id = 1")
+            self._conn.execute("COMMIT")
+
+
+def _legacy_row(backup_folder: str, rel_path: str) -> Tuple[str, str, Optional[str], float, int, int]:
+    """旧形式（タイムスタンプ付きファイル名）のバックアップ1件をカタログの行に変換する。"""
+    st = os.stat(os.path.join(backup_folder, rel_path))
+    folder, name = os.path.split(rel_path)
+    match = _TIMESTAMPED_NAME.match(name)
+    if match:
+        source = os.path.join(folder, match.group("stem") + match.group("ext"))
+        try:
+            created_at = datetime.strptime(match.group("ts"), "%Y%m%d%H%M%S").timestamp()
+        except ValueError:
+            created_at = st.st_mtime
+    else:
+        source = rel_path
+        created_at = st.st_mtime
+    return source, rel_path, None, created_at, st.st_size, st.st_size
+
+
+def rebuild_catalog(catalog: BackupCatalog, batch_size: int = 10000) -> int:
+    """バックアップフォルダを走査してカタログを作り直す。
+
+    重複排除ストアの本体（objects/ 配下）は index.jsonl に記録された元ファイル・作成日時から
+    バージョンを取り込む。index.jsonl に記録の無い本体は、元ファイルが分からず保持期間の判定を
+    誤るため登録しない（ファイルは削除せずに残し、件数を警告する）。
+    それ以外のファイルは旧形式のタイムスタンプ付きバックアップとして登録する。
+    すべての登録が終わった時点で構築完了を記録する。
+
+    Args:
+        catalog: 再構築するカタログ
+        batch_size: 一括登録の単位
+
+    Returns:
+        登録したバックアップ件数
+    """
+    from .backup_store import INDEX_FILE_NAME, OBJECTS_DIR_NAME
+
+    backup_folder = catalog.backup_folder
+    catalog.clear()
+    count = 0
+    rows: List[Tuple[str, str, Optional[str], float, int, int]] = []
+
+    def flush() -> None:
+        nonlocal count
+        if rows:
+            catalog.add_many(rows)
+            count += len(rows)
+            rows.clear()
+
+    # 重複排除ストアのバージョン記録（JSON Lines）
+    object_paths: Dict[str, str] = {}
+    objects_dir = os.path.join(backup_folder, OBJECTS_DIR_NAME)
+    for root, _dirs, files in os.walk(objects_dir):
+        for name in files:
+            if name.endswith(".tmp"):
+                continue
+            object_paths[name.split(".", 1)[0]] = os.path.relpath(os.path.join(root, name), backup_folder)
+
+    indexed: set = set()
+    index_path = os.path.join(backup_folder, INDEX_FILE_NAME)
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    data = json.loads(line)
+                    rel_path = object_paths[data["hash"]]
+                except (ValueError, KeyError):
+                    continue
+                indexed.add(data["hash"])
+                stored_size = os.path.getsize(os.path.join(backup_folder, rel_path))
+                rows.append((data["source"], rel_path, data["hash"], float(data["ts"]), int(data["size"]), stored_size))
+                if len(rows) >= batch_size:
+                    flush()
+
+    unindexed = len(object_paths.keys() - indexed)
+    if unindexed:
+        logger.warning(f"{INDEX_FILE_NAME} に記録の無いバックアップ本体はカタログに登録しません: {unindexed}件")
+
+    # 旧形式のタイムスタンプ付きバックアップ
+    for root, dirs, files in os.walk(backup_folder):
+        if os.path.abspath(root) == os.path.abspath(backup_folder):
+            dirs[:] = [d for d in dirs if d != OBJECTS_DIR_NAME]
+        for name in files:
+            if name.startswith(CATALOG_FILE_NAME) or name.startswith(INDEX_FILE_NAME):
+                continue
+            rel_path = os.path.relpath(os.path.join(root, name), backup_folder)
+            try:
+                rows.append(_legacy_row(backup_folder, rel_path))
+            except OSError as e:
+                logger.warning(f"バックアップファイルの登録に失敗: {rel_path}: {e}")
+            if len(rows) >= batch_size:
+                flush()
+
+    flush()
+    catalog.mark_built()
+    return count
+
+
+class CatalogedBackupManager:
+    """BackupManager の書き込みをカタログに記録し、統計とクリーンアップをカタログで行うラッパー。"""
+
+    def __init__(self, manager: Any, backup_folder: str):
+        """ラッパーを初期化する。カタログの構築が完了していない場合は既存フォルダから構築する。
+
+        Args:
+            manager: BackupManager インスタンス
+            backup_folder: バックアップフォルダ
+        """
+        self._manager = manager
+        self.catalog = BackupCatalog(backup_folder)
+        if not self.catalog.is_built():
+            count = rebuild_catalog(self.catalog)
+            logger.info(f"バックアップカタログを作成しました: {count}件")
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._manager, name)
+
+    def backup_markdown(self, source_file_path: str, markdown_content: str, input_folder: str) -> str:
+        """BackupManager でバックアップし、カタログに登録する。
+
+        Returns:
+            バックアップファイルのパス
+        """
+        backup_path = self._manager.backup_markdown(source_file_path, markdown_content, input_folder)
+        size = len(markdown_content.encode("utf-8"))
+        try:
+            source = os.path.relpath(source_file_path, input_folder)
+            rel_path = os.path.relpath(backup_path, self.catalog.backup_folder)
+        except ValueError:
+            # Windowsで別ドライブの場合
+            source, rel_path = source_file_path, backup_path
+        self.catalog.add(source, rel_path, time.time(), size, size)
+        return backup_path
+
+    def get_backup_stats(self) -> Dict[str, Any]:
+        """カタログからバックアップ統計を返す。"""
+        return self.catalog.stats()
+
+    def cleanup_old_backups(self, days_to_keep: int = 30) -> int:
+        """保持期間を過ぎたバックアップをカタログの範囲削除で特定して削除する。
+
+        Args:
+            days_to_keep: 保持日数
+
+        Returns:
+            削除したバックアップ件数
+        """
+        cutoff = (datetime.now() - timedelta(days=days_to_keep)).timestamp()
+        removed, orphaned = self.catalog.delete_older_than(cutoff)
+        for rel_path in orphaned:
+            try:
+                os.remove(os.path.join(self.catalog.backup_folder, rel_path))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"バックアップの削除に失敗: {rel_path}: {e}")
+        return removed
+
+    def close(self) -> None:
+        """カタログを閉じる。"""
+        self.catalog.close()
@@ -0,0 +1,298 @@
+"""重複排除バックアップストア
+
+変換済みMarkdownをコンテンツハッシュ（SHA-256）単位で1度だけ圧縮保存し、
+ファイルごとのバージョンはバックアップカタログ（SQLite）で管理します。
+書き込みはバックグラウンドスレッドで行い、保持期間によるクリーンアップは
+ディレクトリ走査ではなくカタログの範囲削除で削除対象を決定します。
+各バージョンの元ファイル・作成日時は index.jsonl にも追記し、カタログを作り直す際に使います
+（クリーンアップ時にカタログに残ったバージョンだけで書き直します）。
+
+本体はハッシュのみをファイル名とし、圧縮方式は本体先頭のマジックナンバーで判別します。
+圧縮方式の設定を変更しても（zstd が利用できず gzip になった場合も）既存の本体はそのまま
+読み出し・重複排除・削除の対象になります。
+
+レイアウト:
+    {backup_folder}/objects/ab/abcdef...         # 圧縮済みMarkdown本体（旧形式は .md.gz 等の拡張子付き）
+    {backup_folder}/backup_catalog.sqlite3       # バックアップカタログ
+    {backup_folder}/index.jsonl                  # バージョン記録（カタログ再構築用）
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from .backup_catalog import BackupCatalog, rebuild_catalog
+
+# Optional imports
+try:
+    import zstandard
+    _has_zstd = True
+except ImportError:
+    _has_zstd = False
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = "index.jsonl"
+OBJECTS_DIR_NAME = "objects"
+
+COMPRESSIONS = ("zstd", "gzip", "none")
+# 旧バージョンが付けていた圧縮方式ごとの拡張子（読み出し・重複排除の互換用）
+_LEGACY_SUFFIXES = (".md.zst", ".md.gz", ".md")
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    if compression == "gzip":
+        return gzip.compress(data, mtime=0)
+    return data
+
+
+def _decompress(data: bytes) -> bytes:
+    """保存時の圧縮方式をマジックナンバーで判別して展開する（UTF-8 の Markdown とは衝突しない）。"""
+    if data.startswith(_ZSTD_MAGIC):
+        if not _has_zstd:
+            raise ValueError("zstandard is required to read zstd-compressed backups")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if data.startswith(_GZIP_MAGIC):
+        return gzip.decompress(data)
+    return data
+
+
+def _index_line(source: str, content_hash: str, created_at: float, size: int) -> str:
+    return json.dumps({"source": source, "hash": content_hash, "ts": created_at, "size": size},
+                      ensure_ascii=False) + "\n"
+
+
+class DedupBackupStore:
+    """コンテンツアドレス方式のバックアップストア。
+
+    BackupManager と同じ backup_markdown / get_backup_stats / cleanup_old_backups を提供する。
+    """
+
+    def __init__(self, backup_folder: str, compression: str = "gzip"):
+        """バックアップストアを初期化し、カタログを開いて書き込みスレッドを起動する。
+
+        カタログの構築が完了していない場合は、既存の本体と index.jsonl から構築する。
+
+        Args:
+            backup_folder: バックアップ保存先フォルダ
+            compression: 圧縮方式（zstd / gzip / none）
+
+        Raises:
+            ValueError: 未対応の圧縮方式が指定された場合
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported backup compression: {compression}")
+        if compression == "zstd" and not _has_zstd:
+            logger.warning("zstandard が見つからないため gzip で圧縮します")
+            compression = "gzip"
+
+        self.backup_folder = backup_folder
+        self.compression = compression
+        self.objects_dir = os.path.join(backup_folder, OBJECTS_DIR_NAME)
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+        self.catalog = BackupCatalog(backup_folder)
+        if not self.catalog.is_built():
+            count = rebuild_catalog(self.catalog)
+            logger.info(f"バックアップカタログを作成しました: {count}件")
+        self.index_path = os.path.join(backup_folder, INDEX_FILE_NAME)
+        if not os.path.exists(self.index_path):
+            # バージョン記録を持たない既存ストアはカタログから書き出しておく
+            self._rewrite_index()
+        self._index = open(self.index_path, "a", encoding="utf-8")
+
+        self._lock = threading.Lock()
+        # この実行で書き込みキューに投入済みのハッシュ → 本体の保存先
+        self._queued_paths: Dict[str, str] = {}
+        self.errors: List[str] = []
+
+        # 要素は (source, path, hash, payload, created_at, size)。None は停止の合図
+        self._queue: queue.Queue = queue.Queue(maxsize=256)
+        self._writer = threading.Thread(target=self._write_loop, name="backup-writer", daemon=True)
+        self._writer.start()
+
+    def __enter__(self) -> "DedupBackupStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def object_path(self, content_hash: str) -> str:
+        """コンテンツハッシュに対応する保存先パスを返す（圧縮方式によらない）。"""
+        return os.path.join(self.objects_dir, content_hash[:2], content_hash)
+
+    def _legacy_object_path(self, content_hash: str) -> str:
+        """旧形式（拡張子付き）で保存済みの本体があればそのパスを返す。"""
+        base = self.object_path(content_hash)
+        for suffix in _LEGACY_SUFFIXES:
+            if os.path.exists(base + suffix):
+                return base + suffix
+        return ""
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.backup_folder)
+
+    # ------------------------------------------------------------------
+    # 書き込み
+    # ------------------------------------------------------------------
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                source, path, content_hash, payload, created_at, size = item
+                if payload is not None:
+                    self._write_object(path, payload)
+                stored_size = os.path.getsize(path)
+                self.catalog.add(source, self._relative(path), created_at, size, stored_size, content_hash)
+                self._index.write(_index_line(source, content_hash, created_at, size))
+                if self._queue.empty():
+                    self._index.flush()
+            except Exception as e:
+                self.errors.append(f"{type(e).__name__}: {e}")
+                logger.warning(f"バックアップ書き込みに失敗: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _rewrite_index(self) -> None:
+        """カタログに登録されているバージョンだけで index.jsonl を書き直す。"""
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for source, content_hash, created_at, size in self.catalog.iter_versions():
+                f.write(_index_line(source, content_hash, created_at, size))
+        os.replace(tmp_path, self.index_path)
+
+    def _write_object(self, path: str, payload: bytes) -> None:
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_compress(payload, self.compression))
+        os.replace(tmp_path, path)
+
+    def backup_markdown(self, source_file_path: str, markdown_content: str, input_folder: str) -> str:
+        """Markdownをバックアップする（実際の書き込みはバックグラウンドで行う）。
+
+        同一内容のMarkdownが既に保存されている場合は本体を書き込まず、
+        カタログにバージョンのみ追加する。
+
+        Args:
+            source_file_path: 元ファイルパス
+            markdown_content: 変換されたMarkdown
+            input_folder: 入力フォルダ（相対パス計算用）
+
+        Returns:
+            Markdown本体の保存先パス
+        """
+        payload = markdown_content.encode("utf-8")
+        content_hash = hashlib.sha256(payload).hexdigest()
+        try:
+            source = os.path.relpath(source_file_path, input_folder)
+        except ValueError:
+            # Windowsで別ドライブの場合
+            source = source_file_path
+
+        # クリーンアップによる本体削除と競合しないよう、キュー投入までロック内で行う
+        with self._lock:
+            path = self._queued_paths.get(content_hash, "")
+            is_new = False
+            if not path:
+                path = self.object_path(content_hash)
+                is_new = not self.catalog.has_object(self._relative(path))
+                if is_new:
+                    # 旧形式で保存済みの本体はそのまま共有する
+                    legacy_path = self._legacy_object_path(content_hash)
+                    if legacy_path:
+                        path, is_new = legacy_path, False
+                self._queued_paths[content_hash] = path
+            self._queue.put((source, path, content_hash, payload if is_new else None, time.time(), len(payload)))
+        return path
+
+    def read_backup(self, content_hash: str) -> str:
+        """保存済みのMarkdownを読み出す。
+
+        Raises:
+            FileNotFoundError: 該当するバックアップが無い場合
+        """
+        path = self.object_path(content_hash)
+        if not os.path.exists(path):
+            path = self._legacy_object_path(content_hash) or path
+        with open(path, "rb") as f:
+            return _decompress(f.read()).decode("utf-8")
+
+    def flush(self) -> None:
+        """キューに積まれた書き込みが完了するまで待つ。"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """書き込みを完了させて書き込みスレッドを停止し、カタログを閉じる。"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+            self._index.close()
+            self.catalog.close()
+
+    # ------------------------------------------------------------------
+    # 統計・クリーンアップ
+    # ------------------------------------------------------------------
+
+    def get_backup_stats(self) -> Dict[str, Any]:
+        """カタログからバックアップ統計を返す（O(1)）。
+
+        Returns:
+            バージョン数・ユニーク本体数・論理サイズ等の辞書
+        """
+        stats = self.catalog.stats()
+        stats["compression"] = self.compression
+        return stats
+
+    def cleanup_old_backups(self, days_to_keep: int = 30) -> int:
+        """保持期間を過ぎたバージョンを削除する。
+
+        各ファイルの最新バージョンは期間に関わらず保持する。どのバージョンからも
+        参照されなくなった本体のみを削除する。
+
+        Args:
+            days_to_keep: 保持日数
+
+        Returns:
+            削除したバージョン数
+        """
+        cutoff = (datetime.now() - timedelta(days=days_to_keep)).timestamp()
+
+        with self._lock:
+            # 未登録のバージョンが残っていない状態で範囲削除する
+            self.flush()
+            removed, orphaned = self.catalog.delete_older_than(cutoff, keep_latest=True)
+            for rel_path in orphaned:
+                try:
+                    os.remove(os.path.join(self.backup_folder, rel_path))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"バックアップ本体の削除に失敗: {rel_path}: {e}")
+            self._queued_paths.clear()
+            if removed:
+                # 書き込みスレッドはキューが空でロック中のため追記しない
+                self._index.close()
+                try:
+                    self._rewrite_index()
+                finally:
+                    self._index = open(self.index_path, "a", encoding="utf-8")
+
+        return removed
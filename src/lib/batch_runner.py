@@ -0,0 +1,228 @@
+"""複数ジョブの一括実行で共有するリソース
+
+複数の設定ファイル（またはジョブ一覧形式の設定ファイル）を1プロセスで実行する際に、
+ジョブ間で以下を共有します。
+
+- ファイル探索結果（同じフォルダ・親フォルダを走査済みなら再走査しない）
+- 変換ワーカープール（ライブラリの読み込み・ワーカー起動を1回にまとめる）
+- HTTP接続プール（Dify APIへの接続を使い回す）
+- コストモデル・バックアップマネージャー（同じファイル・フォルダを指すジョブ間で共有）
+
+変換そのものの共有（同じファイルを複数ジョブが対象とする場合に1回だけ変換する）と
+ジョブ間の公平なスケジューリングは、ConverterPool の group 指定で行います。
+"""
+
+import logging
+import os
+from typing import Any, Dict, FrozenSet, Iterable, List, Tuple
+
+from .converter import discover_files
+
+logger = logging.getLogger(__name__)
+
+
+def _folder_key(folder: str) -> str:
+    return os.path.normcase(os.path.abspath(folder))
+
+
+def folder_depth(folder: str) -> int:
+    """フォルダの階層の深さを返す（親フォルダから先に探索する順序付け用）。"""
+    return _folder_key(folder).count(os.sep)
+
+
+class DiscoveryCache:
+    """ファイル探索結果のキャッシュ。
+
+    既に走査したフォルダ、またはその配下のフォルダが要求された場合は、
+    走査済みの結果から絞り込んで返す（対象拡張子が走査時の部分集合である場合のみ）。
+    返すパスは、そのフォルダを直接 discover_files した場合と同じ形式に揃える。
+    """
+
+    def __init__(self):
+        # 正規化フォルダ → (指定されたフォルダ, 拡張子集合, 発見したファイル)
+        self._walked: Dict[str, Tuple[str, FrozenSet[str], List[str]]] = {}
+        self.walks = 0
+        self.hits = 0
+
+    def discover(self, folder: str, exts: Iterable[str]) -> List[str]:
+        """フォルダ内の対象ファイルを返す。
+
+        Args:
+            folder: 探索するフォルダ
+            exts: 対象拡張子
+
+        Returns:
+            ファイルパスのリスト
+        """
+        exts = list(exts)
+        wanted = frozenset(ext.lower() for ext in exts)
+        root = _folder_key(folder)
+
+        for walked_root, (walked_folder, walked_exts, files) in self._walked.items():
+            if not wanted <= walked_exts:
+                continue
+            if root == walked_root:
+                self.hits += 1
+                if wanted == walked_exts:
+                    return list(files)
+                return [path for path in files if os.path.splitext(path)[1].lower() in wanted]
+            if root.startswith(walked_root.rstrip(os.sep) + os.sep):
+                self.hits += 1
+                relative_root = os.path.relpath(root, walked_root)
+                prefix = relative_root + os.sep
+                result = []
+                for path in files:
+                    relative = os.path.relpath(path, walked_folder)
+                    if os.path.normcase(relative).startswith(os.path.normcase(prefix)) \
+                            and os.path.splitext(path)[1].lower() in wanted:
+                        result.append(os.path.join(folder, relative[len(prefix):]))
+                return result
+
+        files = list(discover_files(folder, exts))
+        self.walks += 1
+        self._walked[root] = (folder, wanted, files)
+        return list(files)
+
+
+class SharedResources:
+    """ジョブ間で共有するリソースの置き場所。
+
+    変換ワーカー・HTTPクライアントは最初に必要になった時点で作成する
+    （変更の無い定期実行の起動時間を短く保つため）。
+    """
+
+    def __init__(self, worker_settings: Dict[str, Any], pool_size: int = 16):
+        """共有リソースを初期化する。
+
+        Args:
+            worker_settings: 変換ワーカープールの設定（WorkerSettings.as_dict()）
+            pool_size: HTTP接続プールのサイズ
+        """
+        self.discovery = DiscoveryCache()
+        self.worker_settings = worker_settings
+        self.pool_size = pool_size
+        self._pool = None
+        self._session = None
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._upload_pipelines: Dict[Tuple[str, str], Any] = {}
+        self._cost_models: Dict[str, Any] = {}
+        # 正規化フォルダ → [バックアップマネージャー, 保持日数]
+        self.backup_managers: Dict[str, List[Any]] = {}
+
+    def pool(self):
+        """共有の変換ワーカープールを返す。"""
+        if self._pool is None:
+            from .converter_pool import ConverterPool
+
+            self._pool = ConverterPool(**self.worker_settings)
+        return self._pool
+
+    def session(self):
+        """共有のHTTPセッションを返す。"""
+        if self._session is None:
+            from .dify_documents import create_session
+
+            self._session = create_session(self.pool_size)
+        return self._session
+
+    def document_api(self, cfg):
+        """共有セッションを使う DifyDocumentApi を返す。"""
+        from .dify_documents import DifyDocumentApi
+
+        return DifyDocumentApi(cfg.dify_url, cfg.api_key, pool_size=self.pool_size, session=self.session())
+
+    def dify_client(self, cfg):
+        """同じURL・APIキーのジョブ間で共有する DifyClient を返す。"""
+        key = (cfg.dify_url, cfg.api_key)
+        if key not in self._clients:
+            from .dify_client import DifyClient
+
+            self._clients[key] = DifyClient(cfg.dify_url, cfg.api_key)
+        return self._clients[key]
+
+    def upload_pipeline(self, cfg):
+        """同じURL・APIキーのジョブ間で共有する、小さなドキュメントの並列送信パイプラインを返す。
+
+        同じサーバーへの同時送信数を共有するため、上限は最初に作成したジョブの設定を使う。
+        """
+        key = (cfg.dify_url, cfg.api_key)
+        if key not in self._upload_pipelines:
+            from .upload_pipeline import UploadPipeline
+
+            client = self.dify_client(cfg)
+
+            def send(upload):
+                return client.push_markdown(upload.title, upload.markdown, metadata=upload.metadata,
+                                            chunk_settings=upload.chunk_settings)
+
+            self._upload_pipelines[key] = UploadPipeline(send, cfg.upload_settings.max_concurrency)
+        return self._upload_pipelines[key]
+
+    def flush_uploads(self) -> List[Dict[str, int]]:
+        """送信中のドキュメントがすべて完了するまで待つ（完了時のコールバックを実行する）。
+
+        Returns:
+            パイプラインごとの送信統計
+        """
+        stats = []
+        for pipeline in self._upload_pipelines.values():
+            pipeline.flush()
+            stats.append(pipeline.stats())
+        return stats
+
+    def cost_model(self, state_file: str):
+        """同じ状態ファイルを使うジョブ間で共有する CostModel を返す。"""
+        key = _folder_key(state_file)
+        if key not in self._cost_models:
+            from .scheduler import CostModel
+
+            self._cost_models[key] = CostModel(state_file)
+        return self._cost_models[key]
+
+    def backup_manager(self, cfg):
+        """同じバックアップフォルダのジョブ間で共有するバックアップマネージャーを返す。
+
+        共有するジョブの保持日数のうち最も長いものをクリーンアップに使う。
+        """
+        key = _folder_key(cfg.backup_folder)
+        entry = self.backup_managers.get(key)
+        if entry is None:
+            if cfg.backup_settings.dedup:
+                from .backup_store import DedupBackupStore
+
+                manager = DedupBackupStore(cfg.backup_folder, cfg.backup_settings.compression)
+            else:
+                from .backup_catalog import CatalogedBackupManager
+                from .backup_manager import BackupManager
+
+                manager = CatalogedBackupManager(BackupManager(cfg.backup_folder), cfg.backup_folder)
+            entry = self.backup_managers[key] = [manager, cfg.backup_settings.retention_days]
+        else:
+            entry[1] = max(entry[1], cfg.backup_settings.retention_days)
+        return entry[0]
+
+    def save_cost_models(self) -> List[str]:
+        """コストモデルを保存する。
+
+        Returns:
+            保存に失敗したエラーメッセージのリスト
+        """
+        errors = []
+        for model in self._cost_models.values():
+            try:
+                model.save()
+            except OSError as e:
+                errors.append(str(e))
+        return errors
+
+    def close(self) -> None:
+        """変換ワーカー・送信スレッド・HTTPセッションを閉じる（バックアップマネージャーは呼び出し側で閉じる）。"""
+        for pipeline in self._upload_pipelines.values():
+            pipeline.close()
+        self._upload_pipelines.clear()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
@@ -2,13 +2,20 @@
 
 アプリケーションの設定ファイル読み込みと設定管理を行います。
 v2.3.1で空白行処理設定機能を追加しました。
+
+読み込んだ Config は変更不可で、同じ設定ファイルを再度読み込む場合はファイルが
+更新されていない限りキャッシュを返します。常駐実行では ConfigWatcher で設定ファイルの
+更新を検知して読み込み直します。Config.fingerprint は変換・送信結果に影響する設定のみから
+計算するため、ログ設定等の変更では変わりません。
 """
 
+import hashlib
 import json
 import logging
 import os
-from dataclasses import dataclass, asdict
-from typing import Any, Dict, Optional, Union
+from dataclasses import dataclass, asdict, field, replace
+from pathlib import Path
+from typing import Any, ClassVar, Dict, List, Optional, Tuple, Union
 
 try:
     import yaml
@@ -102,6 +109,235 @@ class EmptyLineConfig:
         return asdict(self)
 
 
+@dataclass(frozen=True)
+class ConversionSettings:
+    """変換結果に影響する設定（変換ワーカーに渡す変更不可のオブジェクト）。
+    
+    Attributes:
+        empty_line: 空白行処理設定（作成時の値のコピー）
+    """
+    empty_line: EmptyLineConfig = field(default_factory=EmptyLineConfig)
+    
+    # 変換結果の形式を変更した場合に上げる（フィンガープリントが変わり再変換される）
+    FORMAT_VERSION: ClassVar[int] = 2
+    
+    def __post_init__(self):
+        """元の設定が後から変更されても影響しないようコピーを保持する。"""
+        object.__setattr__(self, "empty_line", replace(self.empty_line))
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """辞書形式で設定を返す。
+        
+        Returns:
+            設定の辞書
+        """
+        return {"empty_line": self.empty_line.as_dict(), "format_version": self.FORMAT_VERSION}
+    
+    @property
+    def fingerprint(self) -> str:
+        """変換結果に影響する設定のフィンガープリント。"""
+        return _fingerprint(self.as_dict())
+
+
+def _fingerprint(data: Dict[str, Any]) -> str:
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class WorkerSettings:
+    """変換ワーカープロセス設定を管理するデータクラス。
+    
+    Attributes:
+        workers: 同時実行ワーカー数（0の場合はCPU数）
+        timeout_seconds: 1ファイルあたりの変換時間上限（秒、0で無制限）
+        memory_limit_mb: ワーカー1つあたりのメモリ上限（MB、0で無制限）
+        max_tasks_per_child: ワーカーを再起動するまでの処理件数（0で無制限）
+        format_limits: 拡張子ごとの同時実行数上限（例: {".xlsx": 2}）
+    """
+    workers: int = 0
+    timeout_seconds: int = 300
+    memory_limit_mb: int = 2048
+    max_tasks_per_child: int = 20
+    format_limits: Dict[str, int] = field(default_factory=dict)
+    
+    def __post_init__(self):
+        """初期化後の検証処理。"""
+        self.validate()
+    
+    def validate(self):
+        """設定値の妥当性を検証する。
+        
+        Raises:
+            ValueError: 設定値が不正な場合
+        """
+        for name in ("workers", "timeout_seconds", "memory_limit_mb", "max_tasks_per_child"):
+            value = getattr(self, name)
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"{name} must be int, got {type(value)}")
+            if value < 0:
+                raise ValueError(f"{name} must be >= 0, got {value}")
+        
+        if not isinstance(self.format_limits, dict):
+            raise ValueError(f"format_limits must be dict, got {type(self.format_limits)}")
+        for ext, limit in self.format_limits.items():
+            if not isinstance(ext, str) or not ext.startswith("."):
+                raise ValueError(f"format_limits key must be an extension like '.xlsx', got {ext!r}")
+            if not isinstance(limit, int) or isinstance(limit, bool) or limit < 1:
+                raise ValueError(f"format_limits[{ext!r}] must be int >= 1, got {limit!r}")
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """辞書形式で設定を返す。
+        
+        Returns:
+            設定の辞書
+        """
+        return asdict(self)
+
+
+@dataclass
+class BackupSettings:
+    """バックアップ設定を管理するデータクラス。
+    
+    Attributes:
+        dedup: 重複排除・圧縮方式のバックアップストアを使用するかどうか
+        compression: 重複排除ストアの圧縮方式（zstd / gzip / none）
+        retention_days: バックアップの保持日数
+    """
+    dedup: bool = False
+    compression: str = "gzip"
+    retention_days: int = 30
+    
+    def __post_init__(self):
+        """初期化後の検証処理。"""
+        self.validate()
+    
+    def validate(self):
+        """設定値の妥当性を検証する。
+        
+        Raises:
+            ValueError: 設定値が不正な場合
+        """
+        if not isinstance(self.dedup, bool):
+            raise ValueError(f"dedup must be bool, got {type(self.dedup)} ({self.dedup})")
+        if self.compression not in ("zstd", "gzip", "none"):
+            raise ValueError(f"compression must be one of zstd/gzip/none, got {self.compression!r}")
+        if not isinstance(self.retention_days, int) or isinstance(self.retention_days, bool):
+            raise ValueError(f"retention_days must be int, got {type(self.retention_days)}")
+        if self.retention_days < 0:
+            raise ValueError(f"retention_days must be >= 0, got {self.retention_days}")
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """辞書形式で設定を返す。
+        
+        Returns:
+            設定の辞書
+        """
+        return asdict(self)
+
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+
+@dataclass
+class LogSettings:
+    """ログ出力設定を管理するデータクラス。
+    
+    Attributes:
+        batch_size: 1回の書き込みでまとめる最大件数
+        flush_interval: バッファを書き出すまでの最大待ち時間（秒）
+        max_size_mb: ログファイルをローテーションするサイズ（MB、0で無効）
+        backup_count: 保持するローテーション済みファイル数
+        compress: ローテーション済みファイルを gzip 圧縮するかどうか
+        sampling: イベント名（またはロガー名）→ 出力する割合（0 < rate <= 1）
+    """
+    batch_size: int = 256
+    flush_interval: float = 1.0
+    max_size_mb: int = 100
+    backup_count: int = 5
+    compress: bool = True
+    sampling: Dict[str, float] = field(default_factory=dict)
+    
+    def __post_init__(self):
+        """初期化後の検証処理。"""
+        self.validate()
+    
+    def validate(self):
+        """設定値の妥当性を検証する。
+        
+        Raises:
+            ValueError: 設定値が不正な場合
+        """
+        for name in ("batch_size", "max_size_mb", "backup_count"):
+            value = getattr(self, name)
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"{name} must be int, got {type(value)}")
+        if self.batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {self.batch_size}")
+        if self.max_size_mb < 0:
+            raise ValueError(f"max_size_mb must be >= 0, got {self.max_size_mb}")
+        if self.backup_count < 0:
+            raise ValueError(f"backup_count must be >= 0, got {self.backup_count}")
+        if not isinstance(self.flush_interval, (int, float)) or self.flush_interval < 0:
+            raise ValueError(f"flush_interval must be a number >= 0, got {self.flush_interval}")
+        if not isinstance(self.compress, bool):
+            raise ValueError(f"compress must be bool, got {type(self.compress)} ({self.compress})")
+        if not isinstance(self.sampling, dict):
+            raise ValueError(f"sampling must be a mapping, got {type(self.sampling)}")
+        for category, rate in self.sampling.items():
+            if not isinstance(rate, (int, float)) or isinstance(rate, bool) or not 0 < rate <= 1:
+                raise ValueError(f"sampling rate for {category} must be in (0, 1], got {rate}")
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """辞書形式で設定を返す。
+        
+        Returns:
+            設定の辞書
+        """
+        return asdict(self)
+
+
+@dataclass
+class UploadSettings:
+    """小さなドキュメントの並列送信設定を管理するデータクラス。
+    
+    Attributes:
+        pipelining: 小さなドキュメントを並列に送信するかどうか
+        max_document_kb: 並列送信の対象とする変換後のサイズ上限（KB）
+        max_concurrency: 同時送信数の上限（レート制限を受けると自動的に減らす）
+    """
+    pipelining: bool = False
+    max_document_kb: int = 64
+    max_concurrency: int = 8
+    
+    def __post_init__(self):
+        """初期化後の検証処理。"""
+        self.validate()
+    
+    def validate(self):
+        """設定値の妥当性を検証する。
+        
+        Raises:
+            ValueError: 設定値が不正な場合
+        """
+        if not isinstance(self.pipelining, bool):
+            raise ValueError(f"pipelining must be bool, got {type(self.pipelining)} ({self.pipelining})")
+        for name in ("max_document_kb", "max_concurrency"):
+            value = getattr(self, name)
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"{name} must be int, got {type(value)}")
+            if value < 1:
+                raise ValueError(f"{name} must be >= 1, got {value}")
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """辞書形式で設定を返す。
+        
+        Returns:
+            設定の辞書
+        """
+        return asdict(self)
+
+
 class Config:
     """アプリケーション設定を管理するクラス。
     
@@ -111,24 +347,46 @@ class Config:
         api_key: DifyのAPIキー
         dataset_id: DifyのデータセットID
         log_dir: ログディレクトリのパス
+        log_level: ログレベル（DEBUG/INFO/WARNING/ERROR）
+        log_settings: ログ出力設定
         backup_folder: バックアップフォルダのパス
         chunk_settings: チャンク設定
         empty_line_handling: 空白行処理設定
-        file_extensions: 対応ファイル拡張子のリスト
+        worker_settings: 変換ワーカープロセス設定
+        backup_settings: バックアップ設定
+        upload_settings: 小さなドキュメントの並列送信設定
+        delete_removed_documents: 元ファイルが削除された場合にDifyドキュメントも削除するかどうか
+        detect_renames: ファイルの移動を検出してDifyドキュメントを引き継ぐかどうか
+        file_extensions: 対応ファイル拡張子のタプル
+        job_name: ジョブ名（ジョブ一覧形式の設定ファイルで使用）
+        conversion_settings: 変換ワーカーに渡す変換設定
+        errors: 不正なためデフォルト値を使用した設定項目のエラーメッセージ
+    
+    作成後は属性を変更できません。
     """
     
     def __init__(self, data: Dict[str, Any]):
         """設定オブジェクトを初期化する。
         
+        不正なサブ設定はデフォルト値で置き換え、その内容を errors に記録する
+        （CLI は errors が空でない場合、同期を行わずに終了する）。
+        
         Args:
             data: 設定データの辞書
         """
+        errors: List[str] = []
         self.input_folder = data.get("input_folder", "./data")
         self.dify_url = data.get("dify_url", "")
         self.api_key = data.get("api_key", "")
         self.dataset_id = data.get("dataset_id", "")
         self.log_dir = data.get("log_dir", "./log")
+        self.log_level = str(data.get("log_level", "INFO")).upper()
+        if self.log_level not in LOG_LEVELS:
+            logger.warning(f"Invalid log_level, using INFO: {self.log_level}")
+            errors.append(f"log_level: {self.log_level}")
+            self.log_level = "INFO"
         self.backup_folder = data.get("backup_folder", "./backup")
+        self.job_name = data.get("name") or data.get("job_name", "")
         
         # チャンク設定の処理
         chunk_data = data.get("chunk_settings", {})
@@ -137,6 +395,7 @@ class Config:
                 self.chunk_settings = ChunkSettings(**chunk_data)
             except (TypeError, ValueError) as e:
                 logger.warning(f"Invalid chunk_settings, using defaults: {e}")
+                errors.append(f"chunk_settings: {e}")
                 self.chunk_settings = ChunkSettings()
         else:
             self.chunk_settings = None
@@ -148,14 +407,88 @@ class Config:
                 self.empty_line_handling = EmptyLineConfig(**empty_line_data)
             except (TypeError, ValueError) as e:
                 logger.warning(f"Invalid empty_line_handling settings, using defaults: {e}")
+                errors.append(f"empty_line_handling: {e}")
                 self.empty_line_handling = EmptyLineConfig()
         else:
             self.empty_line_handling = EmptyLineConfig()
         
+        # 変換ワーカープロセス設定の処理
+        worker_data = data.get("worker_settings", {})
+        if worker_data:
+            try:
+                self.worker_settings = WorkerSettings(**worker_data)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Invalid worker_settings, using defaults: {e}")
+                errors.append(f"worker_settings: {e}")
+                self.worker_settings = WorkerSettings()
+        else:
+            self.worker_settings = WorkerSettings()
+        
+        # バックアップ設定の処理（旧形式の backup_retention_days も保持日数として扱う）
+        backup_data = dict(data.get("backup_settings") or {})
+        if "backup_retention_days" in data:
+            backup_data.setdefault("retention_days", data["backup_retention_days"])
+        try:
+            self.backup_settings = BackupSettings(**backup_data)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Invalid backup_settings, using defaults: {e}")
+            errors.append(f"backup_settings: {e}")
+            self.backup_settings = BackupSettings()
+        
+        # ログ出力設定の処理
+        log_data = data.get("log_settings", {})
+        if log_data:
+            try:
+                self.log_settings = LogSettings(**log_data)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Invalid log_settings, using defaults: {e}")
+                errors.append(f"log_settings: {e}")
+                self.log_settings = LogSettings()
+        else:
+            self.log_settings = LogSettings()
+        
+        # 小さなドキュメントの並列送信設定の処理
+        upload_data = data.get("upload_settings", {})
+        if upload_data:
+            try:
+                self.upload_settings = UploadSettings(**upload_data)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Invalid upload_settings, using defaults: {e}")
+                errors.append(f"upload_settings: {e}")
+                self.upload_settings = UploadSettings()
+        else:
+            self.upload_settings = UploadSettings()
+        
+        # 元ファイル削除時のDifyドキュメント削除
+        self.delete_removed_documents = bool(data.get("delete_removed_documents", False))
+        
+        # ファイル移動（名前変更）の検出
+        self.detect_renames = bool(data.get("detect_renames", True))
+        
         # ファイル拡張子の設定
-        self.file_extensions = data.get("file_extensions", [
+        self.file_extensions = tuple(data.get("file_extensions", [
             ".md", ".txt", ".docx", ".xlsx", ".pdf", ".pptx", ".ppt", ".xls", ".doc", ".xlsm"
-        ])
+        ]))
+        
+        self.conversion_settings = ConversionSettings(self.empty_line_handling)
+        self.errors: Tuple[str, ...] = tuple(errors)
+        self._frozen = True
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"Config is immutable: cannot set {name}")
+        super().__setattr__(name, value)
+    
+    @property
+    def fingerprint(self) -> str:
+        """変換・送信結果に影響する設定（変換設定・チャンク設定）のフィンガープリント。
+        
+        この値が変わった場合、送信済みのドキュメントは内容が変わっていなくても再変換・再送信する。
+        """
+        return _fingerprint({
+            "conversion": self.conversion_settings.as_dict(),
+            "chunk_settings": self.chunk_settings.as_dict() if self.chunk_settings else None,
+        })
     
     def as_dict(self) -> Dict[str, Any]:
         """設定を辞書形式で返す。
@@ -169,9 +502,17 @@ class Config:
             "api_key": self.api_key,
             "dataset_id": self.dataset_id,
             "log_dir": self.log_dir,
+            "log_level": self.log_level,
+            "log_settings": self.log_settings.as_dict(),
             "backup_folder": self.backup_folder,
-            "file_extensions": self.file_extensions,
-            "empty_line_handling": self.empty_line_handling.as_dict()
+            "file_extensions": list(self.file_extensions),
+            "empty_line_handling": self.empty_line_handling.as_dict(),
+            "worker_settings": self.worker_settings.as_dict(),
+            "backup_settings": self.backup_settings.as_dict(),
+            "upload_settings": self.upload_settings.as_dict(),
+            "delete_removed_documents": self.delete_removed_documents,
+            "detect_renames": self.detect_renames,
+            "job_name": self.job_name
         }
         
         if self.chunk_settings:
@@ -180,9 +521,39 @@ class Config:
         return result
 
 
+# 読み込み済みの設定: (絶対パス, 読み込み方法) → (ファイルの更新時刻・サイズ, 結果)
+_config_cache: Dict[Tuple[str, str], Tuple[Tuple[int, int], Any]] = {}
+
+
+def _file_stamp(config_path: str) -> Tuple[int, int]:
+    """設定ファイルの更新検知に使う (更新時刻ns, サイズ)。"""
+    st = os.stat(config_path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _cached(config_path: str, kind: str) -> Tuple[Tuple[str, str], Optional[Tuple[int, int]], Any]:
+    """キャッシュのキー・現在のファイルの状態・（更新されていなければ）キャッシュ済みの結果を返す。"""
+    key = (os.path.abspath(config_path), kind)
+    try:
+        stamp = _file_stamp(config_path)
+    except OSError:
+        return key, None, None
+    entry = _config_cache.get(key)
+    if entry is not None and entry[0] == stamp:
+        return key, stamp, entry[1]
+    return key, stamp, None
+
+
+def clear_config_cache() -> None:
+    """読み込み済みの設定のキャッシュを破棄する。"""
+    _config_cache.clear()
+
+
 def load_config(config_path: str) -> Config:
     """設定ファイルを読み込んでConfigオブジェクトを返す。
     
+    同じファイルを再度読み込む場合、ファイルが更新されていなければ前回のConfigを返す。
+    
     Args:
         config_path: 設定ファイルのパス
         
@@ -193,6 +564,19 @@ def load_config(config_path: str) -> Config:
         FileNotFoundError: 設定ファイルが見つからない場合
         ValueError: 設定ファイルの形式が不正な場合
     """
+    key, stamp, cached = _cached(config_path, "config")
+    if cached is not None:
+        return cached
+    data = _read_config_data(config_path)
+    logger.info(f"設定ファイル読み込み完了: {config_path}")
+    config = Config(data)
+    if stamp is not None:
+        _config_cache[key] = (stamp, config)
+    return config
+
+
+def _read_config_data(config_path: str) -> Dict[str, Any]:
+    """設定ファイルを辞書として読み込む。"""
     if not os.path.exists(config_path):
         raise FileNotFoundError(f"Config file not found: {config_path}")
     
@@ -209,8 +593,105 @@ def load_config(config_path: str) -> Config:
         else:
             raise ValueError(f"Unsupported config file format: {ext}")
     
-    logger.info(f"設定ファイル読み込み完了: {config_path}")
-    return Config(data)
+    if not isinstance(data, dict):
+        raise ValueError(f"Config file must contain a mapping: {config_path}")
+    return data
+
+
+def load_job_configs(config_path: str) -> List[Config]:
+    """設定ファイルを読み込み、ジョブごとのConfigのリストを返す。
+    
+    ``jobs`` キーを持つ設定ファイルでは、トップレベルの値を共通設定とし、
+    各ジョブの値（input_folder / dataset_id 等）で上書きしたConfigを作成する。
+    ``jobs`` キーが無い場合は通常の設定ファイルとして1件のリストを返す。
+    ファイルが更新されていなければ前回と同じConfigを返す。
+    
+    Args:
+        config_path: 設定ファイルのパス
+        
+    Returns:
+        ジョブごとの設定オブジェクトのリスト
+        
+    Raises:
+        FileNotFoundError: 設定ファイルが見つからない場合
+        ValueError: 設定ファイルの形式が不正な場合
+    """
+    key, stamp, cached = _cached(config_path, "jobs")
+    if cached is not None:
+        return list(cached)
+    configs = _build_job_configs(config_path, _read_config_data(config_path))
+    if stamp is not None:
+        _config_cache[key] = (stamp, tuple(configs))
+    return configs
+
+
+def _build_job_configs(config_path: str, data: Dict[str, Any]) -> List[Config]:
+    jobs = data.pop("jobs", None)
+    if jobs is None:
+        logger.info(f"設定ファイル読み込み完了: {config_path}")
+        return [Config(data)]
+    if not isinstance(jobs, list) or not jobs:
+        raise ValueError(f"jobs must be a non-empty list: {config_path}")
+    
+    configs = []
+    for index, job in enumerate(jobs):
+        if not isinstance(job, dict):
+            raise ValueError(f"jobs[{index}] must be a mapping: {config_path}")
+        merged = {**data, **job}
+        merged.setdefault("name", f"{Path(config_path).stem}[{index}]")
+        configs.append(Config(merged))
+    logger.info(f"設定ファイル読み込み完了: {config_path}（{len(configs)}ジョブ）")
+    return configs
+
+
+class ConfigWatcher:
+    """設定ファイルの更新を検知して読み込み直す（常駐実行用）。
+    
+    不正な値を含む設定ファイルは適用せず、直前に読み込んだ設定を使い続ける。
+    """
+    
+    def __init__(self, paths: List[str]):
+        """監視を開始する（現在のファイルの状態を記録する）。
+        
+        Args:
+            paths: 設定ファイルのパスのリスト
+        """
+        self.paths = list(paths)
+        self._stamps = self._current_stamps()
+    
+    def _current_stamps(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        stamps: Dict[str, Optional[Tuple[int, int]]] = {}
+        for path in self.paths:
+            try:
+                stamps[path] = _file_stamp(path)
+            except OSError:
+                stamps[path] = None
+        return stamps
+    
+    def changed(self) -> bool:
+        """前回の確認以降にいずれかの設定ファイルが更新された場合True。"""
+        return self._current_stamps() != self._stamps
+    
+    def reload(self) -> List[Config]:
+        """すべての設定ファイルを読み込み直す。
+        
+        失敗した場合も現在のファイルの状態を記録し、同じ内容で繰り返し失敗しないようにする。
+        
+        Returns:
+            ジョブごとの設定オブジェクトのリスト
+        
+        Raises:
+            FileNotFoundError: 設定ファイルが見つからない場合
+            ValueError: 設定ファイルの形式が不正な場合、または不正な設定値を含む場合
+        """
+        self._stamps = self._current_stamps()
+        configs: List[Config] = []
+        for path in self.paths:
+            configs.extend(load_job_configs(path))
+        errors = [f"{cfg.job_name or '(default)'}: {error}" for cfg in configs for error in cfg.errors]
+        if errors:
+            raise ValueError("Invalid settings: " + "; ".join(errors))
+        return configs
 
 
 def get_empty_line_config(config: Optional[Config] = None) -> EmptyLineConfig:
@@ -4,36 +4,171 @@ Excel、Word、PDF等の各種ファイルをMarkdown形式に変換する機能
 v2.3.1で空白行処理機能を追加し、ExcelからMarkdown変換時の空白行を適切に処理します。
 """
 
+import codecs
+import io
+import json
 import logging
+import mmap
 import os
-from typing import List, Optional
+import re
+import zipfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
 
 # Configure module logger
 logger = logging.getLogger(__name__)
 empty_line_logger = logging.getLogger(f"{__name__}.empty_line")
 
-# Optional imports
-try:
-    import frontmatter
-    _has_frontmatter = True
-except ImportError:
-    _has_frontmatter = False
-
 # Import empty line handling functions
-from .config import get_empty_line_config, EmptyLineConfig
+from .config import get_empty_line_config, ConversionSettings, EmptyLineConfig
+from .lazy_import import import_backend, is_available
+from .ooxml import BLOCK_TABLE, OOXML_ERRORS, iter_docx_blocks, iter_pptx_slides
+from .records import MAX_OUTLINE_HEADINGS, ConversionResult, DocumentInfo
+
+# Optional imports（起動時間短縮のため、実際の読み込みは初回使用時まで遅延する）
+_has_frontmatter = is_available("frontmatter")
+_has_chardet = is_available("chardet")
+
+
+# エンコーディング判定に使用する先頭サンプルのサイズ（バイト）
+ENCODING_SAMPLE_SIZE = 64 * 1024
+# インクリメンタルデコード時のチャンクサイズ（バイト）
+DECODE_CHUNK_SIZE = 1024 * 1024
+# 判定できなかった場合のフォールバック（日本語共有フォルダ向け）
+FALLBACK_ENCODING = "cp932"
+
+# chardet の判定結果を実際のデコードに使うコーデックへ寄せる
+_ENCODING_ALIASES = {
+    "ascii": "utf-8",
+    "shift_jis": "cp932",
+    "windows-31j": "cp932",
+    "euc-jp": "euc_jp",
+}
+
+
+def detect_encoding(sample: bytes, complete: bool = False) -> str:
+    """先頭サンプルからファイルのエンコーディングを判定する。
+
+    BOM → UTF-8 としての妥当性 → chardet の順に判定し、
+    いずれでも決まらない場合は FALLBACK_ENCODING を返す。
+
+    Args:
+        sample: ファイル先頭のバイト列
+        complete: sample がファイル全体の場合True（末尾の途切れた多バイト文字を許容しない）
+
+    Returns:
+        codecs で利用可能なエンコーディング名
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)):
+        return "utf-32"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+
+    try:
+        # サンプル末尾で多バイト文字が途切れていてもエラーにしない
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=complete)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    if _has_chardet:
+        detected = import_backend("chardet").detect(sample).get("encoding")
+        if detected:
+            name = detected.lower()
+            name = _ENCODING_ALIASES.get(name, name)
+            try:
+                codecs.lookup(name)
+                return name
+            except LookupError:
+                logger.warning(f"未知のエンコーディングを検出したためフォールバックします: {detected}")
+
+    return FALLBACK_ENCODING
+
+
+def iter_text_lines(path: str, encoding: Optional[str] = None, errors: str = "strict") -> Iterator[str]:
+    """テキストファイルを mmap してチャンク単位でデコードし、行を順に返す。
+
+    ファイル全体の bytes と str を同時に保持しないため、大きなファイルでも
+    ピークメモリを抑えられる。改行は open() のテキストモードと同様に
+    \r\n / \r を \n に正規化し、'\n' で split した場合と同じ要素を返す
+    （最終行が改行で終わる場合は末尾に空文字列を返す）。
+
+    Args:
+        path: ファイルパス
+        encoding: エンコーディング（Noneの場合は先頭サンプルから判定）
+        errors: デコードエラー時の扱い（codecs の errors。既定は strict）
+
+    Yields:
+        改行を含まない各行の文字列
+
+    Raises:
+        UnicodeDecodeError: errors="strict" で、サンプル以降にデコードできないバイトがある場合
+            （先頭が ASCII のみの CP932 ファイル等。decode_text_lines で再試行する）
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            yield ""
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if encoding is None:
+                encoding = detect_encoding(mm[:ENCODING_SAMPLE_SIZE], complete=size <= ENCODING_SAMPLE_SIZE)
+
+            decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder(encoding)(errors=errors), translate=True
+            )
+            pending = ""
+            for offset in range(0, size, DECODE_CHUNK_SIZE):
+                chunk = mm[offset:offset + DECODE_CHUNK_SIZE]
+                final = offset + DECODE_CHUNK_SIZE >= size
+                parts = (pending + decoder.decode(chunk, final=final)).split("\n")
+                pending = parts.pop()
+                yield from parts
+            yield pending
+
+
+_T = TypeVar("_T")
+
+
+def decode_text_lines(path: str, build: Callable[[Callable[[], Iterator[str]]], _T]) -> _T:
+    """テキストファイルの行ストリームを build に渡し、デコードに失敗した場合は読み直す。
+
+    エンコーディングは先頭サンプルから判定するため、サンプル以降で判定が誤りと分かる場合がある
+    （先頭 64KB が ASCII のみの CP932 ファイル等）。その場合は FALLBACK_ENCODING で最初から
+    読み直し、それでもデコードできない場合のみ判定結果で置換文字に置き換えて読む（警告を出力する）。
+
+    Args:
+        path: ファイルパス
+        build: 行ストリームを返す関数を受け取り、結果を作る関数（再試行時は再度呼ばれる）
+
+    Returns:
+        build の戻り値
+    """
+    try:
+        return build(lambda: iter_text_lines(path))
+    except UnicodeDecodeError as e:
+        logger.warning(f"{e.encoding} でデコードできないため {FALLBACK_ENCODING} で読み直します: {path}: {e}")
+    try:
+        return build(lambda: iter_text_lines(path, FALLBACK_ENCODING))
+    except UnicodeDecodeError as e:
+        logger.warning(f"デコードできない文字を置換文字に置き換えます: {path}: {e}")
+    return build(lambda: iter_text_lines(path, errors="replace"))
 
 
 def read_text_file(path: str) -> str:
     """テキストファイルを読み込んで文字列として返す。
-    
+
+    エンコーディングは先頭サンプルから自動判定する（Shift_JIS/CP932 等に対応）。
+
     Args:
         path: ファイルパス
-        
+
     Returns:
         ファイルの内容
     """
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+    return decode_text_lines(path, lambda lines: "\n".join(lines()))
 
 
 def _maybe_markitdown_convert(text: str) -> str:
@@ -46,7 +181,7 @@ def _maybe_markitdown_convert(text: str) -> str:
         変換されたテキスト（markitdownが無い場合はそのまま）
     """
     try:
-        import markitdown
+        markitdown = import_backend("markitdown")
         md = markitdown.MarkItDown()
         result = md.convert_local(text)
         return result.text_content
@@ -229,6 +364,65 @@ def safe_empty_line_processing(content: str, config: Optional[EmptyLineConfig] =
         return content
 
 
+def iter_empty_line_filtered(lines: Iterable[str], config: EmptyLineConfig) -> Iterator[str]:
+    """行の逐次ストリームに空白行処理を適用する。
+
+    safe_empty_line_processing と同じ規則を、文字列全体を構築せずに適用する。
+    末尾の空白行は後続の非空白行が現れるまで保留し、最後まで現れなければ破棄する。
+
+    Args:
+        lines: 改行を含まない行のイテラブル
+        config: 空白行処理設定
+
+    Yields:
+        処理後の各行
+    """
+    if not config.enabled:
+        yield from lines
+        return
+
+    held: List[str] = []
+    prev_was_empty = False
+    for line in lines:
+        is_current_empty = line.strip() == ""
+
+        if is_current_empty:
+            keep = not config.remove_consecutive or (config.preserve_single_empty and not prev_was_empty)
+            prev_was_empty = True
+            if not keep:
+                continue
+            if config.remove_trailing:
+                # 末尾の空白行かどうか確定するまで保留
+                held.append(line)
+            else:
+                yield line
+            continue
+
+        prev_was_empty = False
+        if held:
+            yield from held
+            held.clear()
+        yield line
+
+    if not config.remove_trailing:
+        yield from held
+
+
+def read_text_file_filtered(path: str, config: Optional[EmptyLineConfig] = None) -> str:
+    """テキストファイルをデコードしながら空白行処理を適用して返す。
+
+    Args:
+        path: ファイルパス
+        config: 空白行処理設定（Noneの場合はデフォルト設定を取得）
+
+    Returns:
+        空白行処理済みのファイル内容
+    """
+    if config is None:
+        config = get_empty_line_config()
+    return decode_text_lines(path, lambda lines: "\n".join(iter_empty_line_filtered(lines(), config)))
+
+
 def safe_empty_line_table_processing(table_lines: List[str], config: Optional[EmptyLineConfig] = None) -> List[str]:
     """安全なテーブル空白行処理を実行する。
     
@@ -264,75 +458,337 @@ def safe_empty_line_table_processing(table_lines: List[str], config: Optional[Em
         return table_lines
 
 
+# ========================================
+# タイトル・見出しの収集
+# ========================================
+
+_HEADING_LINE = re.compile(r"^(#{1,6})[ \t]+(.+?)(?:[ \t]+#+)?[ \t]*$")
+_FENCE_LINE = re.compile(r"^(```|~~~)")
+
+
+class _Outline:
+    """変換中に出力した Markdown 行からタイトルと見出しを収集する。
+
+    変換結果を改めて走査しなくて済むよう、各形式の処理で行を出力する際に feed() を通す。
+    """
+
+    __slots__ = ("title", "headings", "_in_fence")
+
+    def __init__(self):
+        self.title: Optional[str] = None
+        self.headings: List[tuple] = []
+        self._in_fence = False
+
+    def add(self, level: int, text: str) -> None:
+        """見出しを追加する（最初の h1 をタイトルとする）。"""
+        if level == 1 and self.title is None:
+            self.title = text
+        if len(self.headings) < MAX_OUTLINE_HEADINGS:
+            self.headings.append((level, text))
+
+    def feed(self, line: str) -> str:
+        """1行を調べて見出しであれば記録し、行をそのまま返す。"""
+        if line.startswith(("```", "~~~")):
+            self._in_fence = not self._in_fence
+        elif not self._in_fence and line.startswith("#"):
+            match = _HEADING_LINE.match(line)
+            if match:
+                self.add(len(match.group(1)), match.group(2))
+        return line
+
+    def feed_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """行のストリームを調べながらそのまま返す。"""
+        for line in lines:
+            yield self.feed(line)
+
+    def info(self, frontmatter: Optional[Dict[str, Any]] = None, page_count: Optional[int] = None,
+             sheet_count: Optional[int] = None) -> DocumentInfo:
+        """収集した内容から DocumentInfo を作成する（Frontmatter の title を優先する）。"""
+        frontmatter = frontmatter or {}
+        title = frontmatter.get("title")
+        return DocumentInfo(
+            title=str(title) if title else self.title,
+            headings=self.headings,
+            page_count=page_count,
+            sheet_count=sheet_count,
+            frontmatter=frontmatter,
+        )
+
+
+def _filter_and_outline(lines: Callable[[], Iterable[str]], config: EmptyLineConfig) -> Tuple[str, _Outline]:
+    """空白行処理と見出しの収集を1回の走査で行う。
+
+    空白行処理でエラーが発生した場合は safe_empty_line_processing と同様に元の内容を使う。
+
+    Args:
+        lines: 行のイテラブルを返す関数（失敗時は再度呼ぶ）
+        config: 空白行処理設定
+
+    Returns:
+        (処理後の文字列, 収集した見出し)
+    """
+    outline = _Outline()
+    try:
+        return "\n".join(outline.feed_lines(iter_empty_line_filtered(lines(), config))), outline
+    except UnicodeDecodeError:
+        raise
+    except Exception as e:
+        empty_line_logger.warning(f"Empty line processing failed, returning original content: {e}")
+    outline = _Outline()
+    return "\n".join(outline.feed_lines(lines())), outline
+
+
+def _json_safe(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Frontmatter の値（日付等）を JSON に保存できる形に変換する。"""
+    return json.loads(json.dumps(metadata, ensure_ascii=False, default=str))
+
+
+def _scan_outline(markdown_text: str) -> _Outline:
+    outline = _Outline()
+    for line in markdown_text.split("\n"):
+        outline.feed(line)
+    return outline
+
+
+def extract_markdown_metadata(markdown_text: str) -> Dict[str, Any]:
+    """MarkdownテキストからFrontmatterメタデータを抽出する。
+
+    変換処理（convert_file）は同じ情報を変換時に収集するため、変換結果に対しては不要。
+    変換を経ずに得た Markdown を扱う場合に使用する。
+
+    Args:
+        markdown_text: Markdownテキスト
+
+    Returns:
+        Frontmatterで定義された項目と title（Frontmatterまたは最初のh1から）の辞書
+    """
+    metadata: Dict[str, Any] = {}
+    content = markdown_text
+    if _has_frontmatter and markdown_text.startswith("---"):
+        post = import_backend("frontmatter").loads(markdown_text)
+        metadata = _json_safe(post.metadata)
+        content = post.content
+    metadata["title"] = _scan_outline(content).info(metadata).title
+    return metadata
+
+
+# ========================================
+# Word / PowerPoint（OOXML ストリーミング抽出）
+# ========================================
+
+def _table_to_markdown(rows: List[List[str]], config: EmptyLineConfig) -> str:
+    """表（行ごとのセル文字列）を先頭行を見出しとする Markdown テーブルにする。
+
+    Args:
+        rows: 行ごとのセル文字列のリスト
+        config: 空白行処理設定（有効な場合は空白行を出力しない）
+
+    Returns:
+        Markdown テーブル文字列（行が無い場合は空文字列）
+    """
+    if not rows:
+        return ""
+    width = max(len(row) for row in rows) or 1
+
+    def norm(cell: str) -> str:
+        return cell.replace("|", "\\|").replace("\n", "<br>")
+
+    table_lines = []
+    for index, row in enumerate(rows):
+        row_cells = [norm(cell) for cell in row] + [""] * (width - len(row))
+        if index > 0 and config.enabled and is_empty_row_for_table(row_cells):
+            continue
+        table_lines.append("| " + " | ".join(row_cells) + " |")
+        if index == 0:
+            table_lines.append("| " + " | ".join(["---"] * width) + " |")
+    return "\n".join(table_lines)
+
+
+def _docx_to_markdown(path: str, config: EmptyLineConfig, outline: _Outline) -> str:
+    """Word 文書の段落と表を出現順に Markdown にする（python-docx を使用しない）。
+
+    Args:
+        path: .docx ファイルのパス
+        config: 空白行処理設定
+        outline: 見出しの収集先
+
+    Returns:
+        Markdown 形式の文字列
+
+    Raises:
+        OOXML_ERRORS: OOXML として読めない場合
+    """
+    blocks: List[str] = []
+    for kind, value in iter_docx_blocks(path):
+        if kind == BLOCK_TABLE:
+            table = _table_to_markdown(value, config)
+            if table:
+                blocks.append(table)
+        elif value and not is_empty_cell(value):
+            blocks.append(outline.feed(value))
+        elif config.enabled and not config.remove_consecutive:
+            # 連続する空白行の除去が無効の場合、空の段落も含める
+            blocks.append("")
+
+    # 末尾の空白行処理
+    if config.enabled and config.remove_trailing:
+        while blocks and is_empty_cell(blocks[-1]):
+            blocks.pop()
+    return "\n\n".join(blocks)
+
+
+def _pptx_to_markdown(path: str, config: EmptyLineConfig, outline: _Outline) -> tuple:
+    """スライドごとの図形テキストと表を Markdown にする（python-pptx を使用しない）。
+
+    Args:
+        path: .pptx ファイルのパス
+        config: 空白行処理設定
+        outline: 見出しの収集先（スライドごとの見出しを記録する）
+
+    Returns:
+        (テキストのあるスライドごとの Markdown 文字列のリスト, 全スライド数)
+
+    Raises:
+        OOXML_ERRORS: OOXML として読めない場合
+    """
+    slides_md = []
+    slide_count = 0
+    for slide_num, blocks in iter_pptx_slides(path):
+        slide_count = slide_num
+        slide_text = [
+            _table_to_markdown(value, config) if kind == BLOCK_TABLE else value
+            for kind, value in blocks
+        ]
+        slide_text = [text for text in slide_text if text]
+        if slide_text:
+            outline.add(3, f"スライド {slide_num}")
+            slides_md.append(f"### スライド {slide_num}\n\n" + "\n\n".join(slide_text))
+    return slides_md, slide_count
+
+
 # ========================================
 # メインの変換関数
 # ========================================
 
-def convert_file_to_markdown(path: str) -> str:
+_empty_line_config_logged: Optional[EmptyLineConfig] = None
+
+
+def _log_empty_line_config_once(config: EmptyLineConfig) -> None:
+    """空白行処理設定をログ出力する（プロセスごとに、設定が変わった時のみ）。"""
+    global _empty_line_config_logged
+    if _empty_line_config_logged == config:
+        return
+    _empty_line_config_logged = config
+    if config.enabled:
+        empty_line_logger.info("空白行処理が有効: consecutive=%s, trailing=%s, preserve_single=%s",
+                               config.remove_consecutive, config.remove_trailing, config.preserve_single_empty)
+    else:
+        empty_line_logger.info("空白行処理は無効です")
+
+
+def _result(markdown: str, outline: _Outline, raw: Optional[str] = None,
+            frontmatter: Optional[Dict[str, Any]] = None, page_count: Optional[int] = None,
+            sheet_count: Optional[int] = None) -> ConversionResult:
+    """変換結果と収集した文書情報をまとめる。
+
+    raw には markitdown に渡す前の文字列を指定する。markitdown が内容を変換した場合は
+    変換後の文字列から見出しを収集し直す。
+    """
+    if raw is not None and markdown is not raw:
+        outline = _scan_outline(markdown)
+    return ConversionResult(markdown, outline.info(frontmatter, page_count, sheet_count))
+
+
+def convert_file_to_markdown(path: str, settings: Optional[ConversionSettings] = None) -> str:
     """与えられたファイルを Markdown 文字列に変換して返す。
 
     Args:
         path: 変換対象ファイルのパス
+        settings: 変換設定（Config.conversion_settings。Noneの場合はデフォルト設定）
 
     Returns:
         Markdown 形式の文字列
 
+    Raises:
+        ValueError: 未対応の拡張子の場合
+    """
+    return convert_file(path, settings).markdown
+
+
+def convert_file(path: str, settings: Optional[ConversionSettings] = None) -> ConversionResult:
+    """与えられたファイルを Markdown に変換し、タイトル・見出し等の文書情報とともに返す。
+
+    文書情報は変換と同じ走査で収集するため、変換結果を改めて解析する必要はない。
+
+    Args:
+        path: 変換対象ファイルのパス
+        settings: 変換設定（Config.conversion_settings。Noneの場合はデフォルト設定）
+
+    Returns:
+        ConversionResult（Markdown 文字列と DocumentInfo）
+
     Raises:
         ValueError: 未対応の拡張子の場合
     """
     ext = os.path.splitext(path)[1].lower()
     file_name = os.path.basename(path)
 
-    logger.info(f"ファイル変換開始: {file_name} (形式: {ext})")
+    logger.debug("ファイル変換開始: %s (形式: %s)", file_name, ext)
 
-    # 空白行処理設定を事前に取得してログ出力
-    try:
-        empty_line_config = get_empty_line_config()
-        if empty_line_config.enabled:
-            empty_line_logger.info(f"空白行処理が有効: consecutive={empty_line_config.remove_consecutive}, "
-                                 f"trailing={empty_line_config.remove_trailing}, "
-                                 f"preserve_single={empty_line_config.preserve_single_empty}")
-        else:
-            empty_line_logger.info("空白行処理は無効です")
-    except Exception as e:
-        logger.warning(f"空白行設定の取得に失敗: {e}")
+    # 空白行処理設定はファイルごとに1回だけ取得し、各形式の処理で使い回す
+    # （設定内容のログ出力は設定が変わった時のみ）
+    if settings is not None:
+        empty_line_config = settings.empty_line
+    else:
+        try:
+            empty_line_config = get_empty_line_config()
+        except Exception as e:
+            logger.warning(f"空白行設定の取得に失敗: {e}")
+            empty_line_config = EmptyLineConfig()
+    _log_empty_line_config_once(empty_line_config)
+    outline = _Outline()
 
     # --- Markdown ---
     if ext == ".md":
         text = read_text_file(path)
-        empty_line_config = get_empty_line_config()
 
+        frontmatter_data: Dict[str, Any] = {}
         if _has_frontmatter:
-            post = frontmatter.loads(text)
+            post = import_backend("frontmatter").loads(text)
             content = post.content
+            frontmatter_data = _json_safe(post.metadata)
         else:
             content = text
 
-        # 安全な空白行処理を適用
-        content = safe_empty_line_processing(content, empty_line_config)
+        # 空白行処理と見出しの収集を1回の走査で行う
+        content, outline = _filter_and_outline(lambda: content.split("\n"), empty_line_config)
 
-        logger.info(f"Markdownファイル変換完了: {file_name}")
-        return content
+        logger.debug("Markdownファイル変換完了: %s", file_name)
+        return _result(content, outline, frontmatter=frontmatter_data)
 
     # --- Plain text ---
     if ext == ".txt":
-        text = read_text_file(path)
-        empty_line_config = get_empty_line_config()
+        # デコードしながら空白行処理を適用（全文を二重に保持しない）
+        text, outline = decode_text_lines(path, lambda lines: _filter_and_outline(lines, empty_line_config))
 
-        # 安全な空白行処理を適用
-        text = safe_empty_line_processing(text, empty_line_config)
-
-        logger.info(f"テキストファイル変換完了: {file_name}")
-        return _maybe_markitdown_convert(text)
+        logger.debug("テキストファイル変換完了: %s", file_name)
+        return _result(_maybe_markitdown_convert(text), outline, raw=text)
 
     # --- DOCX ---
     if ext == ".docx":
+        # zip 内の XML を直接読む（表も含めて抽出できる）。読めない場合のみ python-docx を使う
+        try:
+            raw = _docx_to_markdown(path, empty_line_config, outline)
+            logger.debug("DOCXファイル変換完了: %s", file_name)
+            return _result(raw, outline)
+        except OOXML_ERRORS as exc:
+            logger.warning(f"DOCXのストリーミング抽出に失敗、python-docxで変換: {file_name}: {exc}")
+
         try:
-            import docx  # type: ignore
+            docx = import_backend("docx")
         except Exception as exc:
             raise RuntimeError("python-docx is required to convert .docx files") from exc
 
-        empty_line_config = get_empty_line_config()
         doc = docx.Document(path)  # type: ignore
 
         try:
@@ -360,19 +816,17 @@ def convert_file_to_markdown(path: str) -> str:
             paragraphs = [p.text for p in doc.paragraphs if p.text]
             raw = "\n\n".join(paragraphs)
 
-        logger.info(f"DOCXファイル変換完了: {file_name}")
-        return _maybe_markitdown_convert(raw)
+        logger.debug("DOCXファイル変換完了: %s", file_name)
+        markdown = _maybe_markitdown_convert(raw)
+        return _result(markdown, _scan_outline(markdown))
 
     # --- XLSX / XLSM ---
     if ext in [".xlsx", ".xlsm"]:
         try:
-            import openpyxl  # type: ignore
+            openpyxl = import_backend("openpyxl")
         except Exception as exc:
             raise RuntimeError("openpyxl is required to convert .xlsx files") from exc
 
-        # 空白行処理設定を取得
-        empty_line_config = get_empty_line_config()
-
         wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
         sheets_md: List[str] = []
 
@@ -435,6 +889,7 @@ def convert_file_to_markdown(path: str) -> str:
                     skipped_empty_rows = 0
 
                 sheet_md = f"### {sheet.title}\n\n" + "\n".join(table_lines)
+                outline.add(3, str(sheet.title))
 
                 # 処理結果のログ情報（コメントとして追加）
                 if empty_line_config.enabled and skipped_empty_rows > 0:
@@ -456,6 +911,7 @@ def convert_file_to_markdown(path: str) -> str:
                             processed_lines += 1
 
                     sheet_md = f"### {sheet.title}\n\n" + "\n".join([f"- {l}" for l in lines])
+                    outline.add(3, str(sheet.title))
 
                     # 処理結果のログ情報（単一列の場合）
                     if empty_line_config.enabled and (original_line_count - processed_lines) > 0:
@@ -467,22 +923,31 @@ def convert_file_to_markdown(path: str) -> str:
                     # 空白行処理でエラーが発生した場合、元の処理にフォールバック
                     lines = [str(r[0]) for r in rows if r and r[0] is not None]
                     sheet_md = f"### {sheet.title}\n\n" + "\n".join([f"- {l}" for l in lines])
+                    outline.add(3, str(sheet.title))
 
             sheets_md.append(sheet_md)
 
-        logger.info(f"Excel XLSX/XLSMファイル変換完了: {file_name} ({len(sheets_md)}シート処理)")
-        return "\n\n".join(sheets_md)
+        logger.debug("Excel XLSX/XLSMファイル変換完了: %s (%sシート処理)", file_name, len(sheets_md))
+        return _result("\n\n".join(sheets_md), outline, sheet_count=len(wb.worksheets))
 
     # --- DOC ---
     if ext == ".doc":
+        # 拡張子が .doc でも中身が OOXML（.docx）の場合はストリーミング抽出する
+        if zipfile.is_zipfile(path):
+            try:
+                raw = _docx_to_markdown(path, empty_line_config, outline)
+                logger.debug("DOCファイル変換完了: %s", file_name)
+                return _result(raw, outline)
+            except OOXML_ERRORS as exc:
+                logger.warning(f"DOCのストリーミング抽出に失敗、python-docxで変換: {file_name}: {exc}")
+
         # .doc files are also supported by python-docx in newer versions
         try:
-            import docx  # type: ignore
+            docx = import_backend("docx")
         except Exception as exc:
             raise RuntimeError("python-docx is required to convert .doc files") from exc
 
         try:
-            empty_line_config = get_empty_line_config()
             doc = docx.Document(path)  # type: ignore
 
             try:
@@ -510,22 +975,22 @@ def convert_file_to_markdown(path: str) -> str:
                 paragraphs = [p.text for p in doc.paragraphs if p.text]
                 raw = "\n\n".join(paragraphs)
 
-            logger.info(f"DOCファイル変換完了: {file_name}")
-            return _maybe_markitdown_convert(raw)
+            logger.debug("DOCファイル変換完了: %s", file_name)
+            markdown = _maybe_markitdown_convert(raw)
+            return _result(markdown, _scan_outline(markdown))
         except Exception as exc:
             raise RuntimeError(f"Failed to convert .doc file: {exc}") from exc
 
     # --- XLS ---
     if ext == ".xls":
         try:
-            import xlrd  # type: ignore
+            xlrd = import_backend("xlrd")
         except Exception as exc:
             raise RuntimeError("xlrd is required to convert .xls files") from exc
 
         try:
             workbook = xlrd.open_workbook(path)
             sheets_md: List[str] = []
-            empty_line_config = get_empty_line_config()
 
             for sheet_index in range(workbook.nsheets):
                 sheet = workbook.sheet_by_index(sheet_index)
@@ -568,6 +1033,7 @@ def convert_file_to_markdown(path: str) -> str:
                         table_lines.append("| " + " | ".join(row[:len(header)]) + " |")
                     
                     sheet_md = f"### {sheet.name}\n\n" + "\n".join(table_lines)
+                    outline.add(3, str(sheet.name))
 
                     # 処理結果のログ情報（コメントとして追加）
                     if empty_line_config.enabled and skipped_empty_rows > 0:
@@ -588,6 +1054,7 @@ def convert_file_to_markdown(path: str) -> str:
                             processed_lines += 1
 
                     sheet_md = f"### {sheet.name}\n\n" + "\n".join([f"- {l}" for l in lines])
+                    outline.add(3, str(sheet.name))
 
                     # 処理結果のログ情報（単一列の場合）
                     if empty_line_config.enabled and (original_line_count - processed_lines) > 0:
@@ -597,41 +1064,54 @@ def convert_file_to_markdown(path: str) -> str:
 
                 sheets_md.append(sheet_md)
 
-            logger.info(f"Excel XLSファイル変換完了: {file_name} ({len(sheets_md)}シート処理)")
-            return "\n\n".join(sheets_md)
+            logger.debug("Excel XLSファイル変換完了: %s (%sシート処理)", file_name, len(sheets_md))
+            return _result("\n\n".join(sheets_md), outline, sheet_count=workbook.nsheets)
         except Exception as exc:
             raise RuntimeError(f"Failed to convert .xls file: {exc}") from exc
 
     # --- PDF ---
     if ext == ".pdf":
         try:
-            import PyPDF2  # type: ignore
+            PyPDF2 = import_backend("PyPDF2")
         except ImportError:
             try:
-                import pypdf  # type: ignore
-                PyPDF2 = pypdf
+                PyPDF2 = import_backend("pypdf")
             except ImportError:
-                return _maybe_markitdown_convert(path)
+                markdown = _maybe_markitdown_convert(path)
+                return _result(markdown, _scan_outline(markdown))
 
         with open(path, "rb") as f:
             reader = PyPDF2.PdfReader(f)
             pages = []
+            page_count = 0
             for page_num, page in enumerate(reader.pages, 1):
+                page_count = page_num
                 text = page.extract_text()
                 if text.strip():
+                    outline.add(2, f"Page {page_num}")
                     pages.append(f"## Page {page_num}\n\n{text}")
 
         raw = "\n\n".join(pages)
-        logger.info(f"PDFファイル変換完了: {file_name} ({len(pages)}ページ)")
-        return _maybe_markitdown_convert(raw)
+        logger.debug("PDFファイル変換完了: %s (%sページ)", file_name, len(pages))
+        return _result(_maybe_markitdown_convert(raw), outline, raw=raw, page_count=page_count)
 
     # --- PPTX ---
     if ext == ".pptx":
+        # スライドのパートを直接読む（表も含めて抽出し、スライドは並列に解析する）
+        try:
+            slides_md, slide_count = _pptx_to_markdown(path, empty_line_config, outline)
+            logger.debug("PowerPointファイル変換完了: %s (%sスライド)", file_name, len(slides_md))
+            return _result("\n\n".join(slides_md), outline, page_count=slide_count)
+        except OOXML_ERRORS as exc:
+            logger.warning(f"PPTXのストリーミング抽出に失敗、python-pptxで変換: {file_name}: {exc}")
+
         try:
-            import pptx  # type: ignore
+            pptx = import_backend("pptx")
         except ImportError:
-            return _maybe_markitdown_convert(path)
+            markdown = _maybe_markitdown_convert(path)
+            return _result(markdown, _scan_outline(markdown))
 
+        outline = _Outline()
         presentation = pptx.Presentation(path)
         slides_md = []
         for slide_num, slide in enumerate(presentation.slides, 1):
@@ -640,11 +1120,13 @@ def convert_file_to_markdown(path: str) -> str:
                 if hasattr(shape, "text") and shape.text.strip():
                     slide_text.append(shape.text)
             if slide_text:
+                outline.add(3, f"スライド {slide_num}")
                 slides_md.append(f"### スライド {slide_num}\n\n" + "\n\n".join(slide_text))
 
         raw = "\n\n".join(slides_md)
-        logger.info(f"PowerPointファイル変換完了: {file_name} ({len(slides_md)}スライド)")
-        return _maybe_markitdown_convert(raw)
+        logger.debug("PowerPointファイル変換完了: %s (%sスライド)", file_name, len(slides_md))
+        return _result(_maybe_markitdown_convert(raw), outline, raw=raw,
+                       page_count=len(presentation.slides))
 
     # --- PPT (Legacy) ---
     if ext == ".ppt":
@@ -675,8 +1157,9 @@ def convert_file_to_markdown(path: str) -> str:
 """
         
         logger.warning(f"PPT（レガシー）形式は直接サポートされていません: {file_name}")
-        return legacy_info
+        return _result(legacy_info, _scan_outline(legacy_info))
 
     # Fallback to markitdown if available
     logger.info(f"未対応拡張子のため markitdown での変換を試行: {ext}")
-    return _maybe_markitdown_convert(path)
+    markdown = _maybe_markitdown_convert(path)
+    return _result(markdown, _scan_outline(markdown))
@@ -0,0 +1,402 @@
+"""変換ワーカープロセスプール
+
+convert_file（Markdown 変換と文書情報の収集）を使い回し可能な子プロセス群で実行し、
+ファイルごとの実行時間上限（タイムアウト）とメモリ上限（RLIMIT_AS）を適用します。
+不正なファイルでハング・メモリ暴走したワーカーは強制終了して再起動するため、
+1ファイルの異常がバッチ全体を巻き込むことはありません。
+
+ワーカーは fork ではなく forkserver（利用できない環境では spawn）で起動します。
+親プロセスではログ・バックアップの書き込みスレッドが動いているため、fork すると
+それらが保持していたロックを引き継いだ子プロセスがデッドロックし得るうえ、
+RLIMIT_AS が親のアドレス空間全体を含めて数えられてしまうためです。
+"""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from multiprocessing.connection import wait
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+from .config import ConversionSettings
+from .records import DocumentInfo, WorkItem
+
+# Optional imports（Windows には resource モジュールが存在しない）
+try:
+    import resource
+    _has_resource = True
+except ImportError:
+    _has_resource = False
+
+logger = logging.getLogger(__name__)
+
+# 失敗理由
+REASON_TIMEOUT = "timeout"
+REASON_MEMORY = "memory_limit"
+REASON_CRASHED = "worker_crashed"
+REASON_EXCEPTION = "exception"
+
+
+class ConversionFailed(RuntimeError):
+    """ワーカーでの変換失敗を表す例外。
+
+    Attributes:
+        path: 変換対象ファイルのパス
+        reason: 失敗理由（REASON_* のいずれか）
+    """
+
+    def __init__(self, path: str, reason: str, message: str):
+        super().__init__(message)
+        self.path = path
+        self.reason = reason
+
+
+@dataclass(slots=True)
+class ConversionOutcome:
+    """1ファイル分の変換結果。
+
+    Attributes:
+        path: 変換対象ファイルのパス
+        markdown: 変換結果（失敗時はNone）
+        info: 変換時に収集したタイトル・見出し等の文書情報（失敗時はNone）
+        reason: 失敗理由（成功時はNone）
+        error: エラーメッセージ（成功時はNone）
+        elapsed: 変換に要した時間（秒。ワーカーが計測した変換処理のみの時間。
+            タイムアウト・異常終了時は投入からの経過時間）
+        imports: この変換でワーカーが新たに読み込んだバックエンドとその所要時間（秒）
+    """
+    path: str
+    markdown: Optional[str] = None
+    info: Optional[DocumentInfo] = None
+    reason: Optional[str] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    imports: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        """変換に成功した場合True。"""
+        return self.reason is None
+
+    @property
+    def killed(self) -> bool:
+        """ワーカーが強制終了・異常終了した場合True。"""
+        return self.reason in (REASON_TIMEOUT, REASON_MEMORY, REASON_CRASHED)
+
+    def result(self) -> str:
+        """変換結果を返す。失敗していた場合は ConversionFailed を送出する。
+
+        Returns:
+            Markdown 文字列
+
+        Raises:
+            ConversionFailed: 変換に失敗していた場合
+        """
+        if self.reason is not None:
+            raise ConversionFailed(self.path, self.reason, self.error or self.reason)
+        return self.markdown or ""
+
+
+def _start_method() -> str:
+    """ワーカーの起動方式（forkserver、利用できない場合は spawn）を返す。"""
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _apply_memory_limit(limit_bytes: int) -> None:
+    """現在のプロセスにアドレス空間の上限を設定する。"""
+    if not limit_bytes or not _has_resource:
+        return
+    try:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit_bytes = min(limit_bytes, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, hard))
+    except (ValueError, OSError) as e:
+        logger.warning(f"RLIMIT_AS の設定に失敗しました: {e}")
+
+
+def _worker_main(conn, memory_limit_bytes: int, max_tasks_per_child: int) -> None:
+    """ワーカープロセスの本体。
+
+    (パス, 変換設定) を受信して変換し、(status, reason, payload, imports, elapsed) を返送する。
+    payload は成功時は ConversionResult、失敗時はエラーメッセージ。
+    imports はその変換で新たに遅延インポートされたバックエンドの所要時間。
+    elapsed はワーカー内で計測した変換時間（親が結果を受け取るまでの待ち時間を含まない）。
+    max_tasks_per_child 件処理したら自発的に終了し、親が新しいワーカーを起動する。
+    メモリ上限は変換ライブラリを読み込む前に設定する。
+    """
+    _apply_memory_limit(memory_limit_bytes)
+    from .converter import convert_file
+    from .lazy_import import import_timings
+
+    reported: Dict[str, float] = {}
+    tasks = range(max_tasks_per_child) if max_tasks_per_child > 0 else itertools.count()
+    for _ in tasks:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+
+        path, settings = task
+        started = time.monotonic()
+        try:
+            status, reason, payload = "ok", None, convert_file(path, settings)
+        except MemoryError:
+            status, reason, payload = "error", REASON_MEMORY, "memory limit exceeded during conversion"
+        except Exception as exc:
+            status, reason, payload = "error", REASON_EXCEPTION, f"{type(exc).__name__}: {exc}"
+
+        new_imports = {name: t for name, t in import_timings().items() if name not in reported}
+        reported.update(new_imports)
+        conn.send((status, reason, payload, new_imports, time.monotonic() - started))
+
+
+class _Worker:
+    """親プロセス側から見たワーカー1つ分の状態。"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.tasks_done = 0
+        self.path: Optional[str] = None
+        self.ext = ""
+        self.started = 0.0
+
+    def kill(self) -> None:
+        """ワーカーを強制終了して後始末する。"""
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ConverterPool:
+    """タイムアウト・メモリ上限付きの変換ワーカープール。
+
+    使用例:
+        with ConverterPool(workers=4, timeout_seconds=300) as pool:
+            for outcome in pool.imap_unordered(paths):
+                ...
+    """
+
+    def __init__(
+        self,
+        workers: int = 0,
+        timeout_seconds: int = 300,
+        memory_limit_mb: int = 0,
+        max_tasks_per_child: int = 20,
+        format_limits: Optional[Dict[str, int]] = None,
+    ):
+        """ワーカープールを初期化する（プロセスは必要になった時点で起動する）。
+
+        Args:
+            workers: 同時実行ワーカー数（0の場合はCPU数）
+            timeout_seconds: 1ファイルあたりの変換時間上限（秒、0で無制限）
+            memory_limit_mb: ワーカー1つあたりのメモリ上限（MB、0で無制限）
+            max_tasks_per_child: ワーカーを再起動するまでの処理件数（0で無制限）
+            format_limits: 拡張子ごとの同時実行数上限（例: {".xlsx": 2}）
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout_seconds = timeout_seconds
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024
+        self.max_tasks_per_child = max_tasks_per_child
+        self.format_limits = {ext.lower(): limit for ext, limit in (format_limits or {}).items()}
+        self._running: Dict[str, int] = {}
+        self._ctx = multiprocessing.get_context(_start_method())
+        self._idle: List[_Worker] = []
+        self._busy: Dict[Any, _Worker] = {}
+        self._group_cursor = 0
+        self._settings: Optional[ConversionSettings] = None
+
+        if self.memory_limit_bytes and not _has_resource:
+            logger.warning("このプラットフォームでは RLIMIT_AS を利用できないため、メモリ上限は適用されません")
+
+    def __enter__(self) -> "ConverterPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.memory_limit_bytes, self.max_tasks_per_child),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _retire(self, worker: _Worker) -> None:
+        """処理上限に達したワーカーを回収する。"""
+        worker.process.join(timeout=5)
+        worker.kill()
+
+    def _dispatch(self, path: str, ext: str) -> None:
+        while True:
+            worker = self._idle.pop() if self._idle else self._spawn()
+            try:
+                worker.conn.send((path, self._settings))
+                break
+            except (OSError, ValueError):
+                # 待機中に終了したワーカー（OOM killer 等）は破棄して別のワーカーに投入する
+                logger.warning("待機中のワーカーが終了していたため再起動します")
+                worker.kill()
+        worker.path = path
+        worker.ext = ext
+        worker.started = time.monotonic()
+        self._busy[worker.conn] = worker
+        self._running[ext] = self._running.get(ext, 0) + 1
+
+    def _release(self, worker: _Worker) -> None:
+        del self._busy[worker.conn]
+        self._running[worker.ext] -= 1
+
+    def _dispatch_next(self, queues: Dict[Any, Dict[str, Deque[WorkItem]]]) -> bool:
+        """同時実行数上限に達していない形式のうち、最もコストの大きいファイルを投入する。
+
+        グループ（ジョブ）が複数ある場合は、グループ間でラウンドロビンに投入する。
+
+        Returns:
+            投入できた場合True
+        """
+        groups = list(queues)
+        for offset in range(len(groups)):
+            index = (self._group_cursor + offset) % len(groups)
+            group_queues = queues[groups[index]]
+            best = None
+            for ext, queue in group_queues.items():
+                if not queue:
+                    continue
+                limit = self.format_limits.get(ext)
+                if limit and self._running.get(ext, 0) >= limit:
+                    continue
+                if best is None or queue[0].cost > group_queues[best][0].cost:
+                    best = ext
+            if best is None:
+                continue
+            item = group_queues[best].popleft()
+            self._dispatch(item.path, item.ext)
+            self._group_cursor = index + 1
+            return True
+        return False
+
+    def _collect(self, worker: _Worker) -> ConversionOutcome:
+        """応答可能になったワーカーから結果を受け取る。"""
+        self._release(worker)
+        path = worker.path or ""
+        elapsed = time.monotonic() - worker.started
+        try:
+            status, reason, payload, imports, elapsed = worker.conn.recv()
+        except (EOFError, OSError):
+            worker.kill()
+            exitcode = worker.process.exitcode
+            return ConversionOutcome(path, reason=REASON_CRASHED,
+                                     error=f"converter worker exited unexpectedly (exitcode={exitcode})",
+                                     elapsed=elapsed)
+
+        worker.tasks_done += 1
+        if self.max_tasks_per_child and worker.tasks_done >= self.max_tasks_per_child:
+            self._retire(worker)
+        else:
+            self._idle.append(worker)
+
+        if status == "ok":
+            return ConversionOutcome(path, markdown=payload.markdown, info=payload.info,
+                                     elapsed=elapsed, imports=imports)
+        return ConversionOutcome(path, reason=reason, error=payload, elapsed=elapsed, imports=imports)
+
+    def _expire(self, now: float) -> List[ConversionOutcome]:
+        """タイムアウトしたワーカーを強制終了し、その結果を返す。
+
+        呼び出し側が結果を処理している間に変換を終えたワーカー（結果を受信可能なもの）は
+        タイムアウトとせず、次の wait() で結果を受け取る。
+        """
+        outcomes = []
+        for conn, worker in list(self._busy.items()):
+            elapsed = now - worker.started
+            if elapsed < self.timeout_seconds or conn.poll():
+                continue
+            self._release(worker)
+            worker.kill()
+            outcomes.append(ConversionOutcome(worker.path or "", reason=REASON_TIMEOUT,
+                                              error=f"conversion timed out after {self.timeout_seconds}s",
+                                              elapsed=elapsed))
+        return outcomes
+
+    def _wait_timeout(self, now: float) -> Optional[float]:
+        if not self.timeout_seconds:
+            return None
+        earliest = min(worker.started for worker in self._busy.values())
+        return max(0.0, earliest + self.timeout_seconds - now)
+
+    def imap_unordered(self, paths: Iterable[str],
+                       cost: Optional[Callable[[str], float]] = None,
+                       group: Optional[Callable[[str], Any]] = None,
+                       settings: Optional[ConversionSettings] = None) -> Iterator[ConversionOutcome]:
+        """ファイル群を並列に変換し、完了した順に結果を返す。
+
+        ファイルは拡張子ごとのキューに振り分け、format_limits の範囲内で
+        見積もりコストの大きいものから投入する（cost 未指定時は入力順）。
+        group を指定した場合はグループごとにキューを分け、グループ間で
+        交互に投入する（大きなジョブが他のジョブを待たせないため）。
+
+        Args:
+            paths: 変換対象ファイルパスのイテラブル
+            cost: ファイルパス → 見積もりコストの関数
+            group: ファイルパス → グループ（ジョブ）キーの関数
+            settings: 変換設定（Noneの場合はデフォルト設定）
+
+        Yields:
+            ConversionOutcome（失敗時も例外ではなく結果として返す）
+        """
+        queues: Dict[Any, Dict[str, Deque[WorkItem]]] = {}
+        for index, path in enumerate(paths):
+            ext = os.path.splitext(path)[1].lower()
+            item = WorkItem(cost(path) if cost else -index, path, ext)
+            key = group(path) if group else None
+            queues.setdefault(key, {}).setdefault(ext, deque()).append(item)
+        for group_queues in queues.values():
+            for ext in group_queues:
+                group_queues[ext] = deque(sorted(group_queues[ext], key=lambda item: item.cost, reverse=True))
+        self._group_cursor = 0
+        self._settings = settings
+
+        try:
+            while self._busy or any(queue for group_queues in queues.values() for queue in group_queues.values()):
+                while len(self._busy) < self.workers and self._dispatch_next(queues):
+                    pass
+
+                ready = wait(list(self._busy), timeout=self._wait_timeout(time.monotonic()))
+                for conn in ready:
+                    yield self._collect(self._busy[conn])
+
+                if self.timeout_seconds:
+                    for outcome in self._expire(time.monotonic()):
+                        logger.warning(f"変換タイムアウトのためワーカーを強制終了: {outcome.path}")
+                        yield outcome
+        finally:
+            # 途中で中断された場合は実行中のワーカーを停止する
+            for worker in self._busy.values():
+                worker.kill()
+            self._busy.clear()
+            self._running.clear()
+
+    def close(self) -> None:
+        """待機中のワーカーを終了させる。"""
+        for worker in self._idle:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+            self._retire(worker)
+        self._idle.clear()
+        for worker in self._busy.values():
+            worker.kill()
+        self._busy.clear()
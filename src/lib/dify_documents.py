@@ -0,0 +1,186 @@
+"""Dify ドキュメント管理API
+
+登録済みドキュメントの一覧取得・名前変更・メタデータ更新・削除を行う Dify Knowledge API の
+薄いラッパーです。ドキュメントの作成・更新（push_markdown）は DifyClient が担当し、
+本モジュールはファイルの移動・削除・照合に伴う管理操作のみを扱います。
+HTTP接続は requests.Session で使い回し、複数ジョブ間で共有することもできます。
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+def create_session(pool_size: int = 16) -> requests.Session:
+    """接続プール付きのHTTPセッションを作成する。
+
+    Args:
+        pool_size: ホストごとに保持する接続数
+
+    Returns:
+        requests.Session
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class DifyDocumentApi:
+    """データセット内のドキュメントを管理するAPIクライアント。"""
+
+    def __init__(self, base_url: str, api_key: str, timeout: int = 10, pool_size: int = 16,
+                 session: Optional[requests.Session] = None):
+        """APIクライアントを初期化する。
+
+        Args:
+            base_url: Dify APIのベースURL（例: https://api.dify.ai/v1）
+            api_key: API認証キー
+            timeout: リクエストタイムアウト（秒）
+            pool_size: HTTP接続プールのサイズ（session 指定時は無視）
+            session: 共有するHTTPセッション（複数ジョブで接続プールを共有する場合）
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        # 認証ヘッダーはリクエストごとに付与する（セッションを別のAPIキーと共有できるように）
+        self._headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Accept": "application/json",
+        }
+        self._owns_session = session is None
+        self.session = session if session is not None else create_session(pool_size)
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> Dict[str, Any]:
+        resp = self.session.request(method, f"{self.base_url}{path}", headers=self._headers,
+                                    timeout=self.timeout, **kwargs)
+        resp.raise_for_status()
+        if not resp.content:
+            return {}
+        return resp.json()
+
+    def list_documents(self, dataset_id: str, page: int = 1, limit: int = 100,
+                       keyword: Optional[str] = None) -> Dict[str, Any]:
+        """ドキュメント一覧の1ページを取得する。
+
+        Args:
+            dataset_id: 対象データセットID
+            page: ページ番号（1始まり）
+            limit: 1ページあたりの件数
+            keyword: 名前の検索キーワード
+
+        Returns:
+            API レスポンス（data / has_more / total 等）
+
+        Raises:
+            requests.HTTPError: API エラー
+        """
+        params: Dict[str, Any] = {"page": page, "limit": limit}
+        if keyword:
+            params["keyword"] = keyword
+        return self._request("GET", f"/datasets/{dataset_id}/documents", params=params)
+
+    def iter_documents(self, dataset_id: str, limit: int = 100) -> Iterator[Dict[str, Any]]:
+        """データセット内の全ドキュメントを順に返す。"""
+        page = 1
+        while True:
+            body = self.list_documents(dataset_id, page=page, limit=limit)
+            yield from body.get("data", [])
+            if not body.get("has_more"):
+                return
+            page += 1
+
+    def list_all_documents(self, dataset_id: str, limit: int = 100, max_workers: int = 8) -> List[Dict[str, Any]]:
+        """データセット内の全ドキュメントを、ページを並列に取得して返す。
+
+        1ページ目の total から残りのページ数を求めて並列に取得する。取得中にドキュメントが
+        追加されて最後のページに続きがある場合は、続きを順に取得する（IDで重複を除く）。
+
+        Args:
+            dataset_id: 対象データセットID
+            limit: 1ページあたりの件数（サーバー側の上限を超える場合はサーバーの値を使う）
+            max_workers: 同時リクエスト数
+
+        Returns:
+            ドキュメントのリスト
+
+        Raises:
+            requests.HTTPError: API エラー
+        """
+        first = self.list_documents(dataset_id, page=1, limit=limit)
+        pages: List[List[Dict[str, Any]]] = [first.get("data", [])]
+        has_more = bool(first.get("has_more"))
+        page_size = int(first.get("limit") or limit)
+        total = int(first.get("total") or 0)
+        last_page = 1
+        if has_more and total > page_size:
+            last_page = -(-total // page_size)
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                bodies = list(executor.map(
+                    lambda page: self.list_documents(dataset_id, page=page, limit=page_size),
+                    range(2, last_page + 1)))
+            pages.extend(body.get("data", []) for body in bodies)
+            has_more = bool(bodies[-1].get("has_more"))
+        while has_more:
+            last_page += 1
+            body = self.list_documents(dataset_id, page=last_page, limit=page_size)
+            pages.append(body.get("data", []))
+            has_more = bool(body.get("has_more"))
+
+        documents: Dict[str, Dict[str, Any]] = {}
+        for data in pages:
+            for document in data:
+                documents.setdefault(document.get("id"), document)
+        logger.info(f"Difyドキュメント一覧取得: {len(documents)}件（{last_page}ページ）")
+        return list(documents.values())
+
+    def rename_document(self, dataset_id: str, document_id: str, name: str) -> Dict[str, Any]:
+        """ドキュメント名のみを変更する（本文は再送信しないため再インデックスされない）。
+
+        Raises:
+            requests.HTTPError: API エラー
+        """
+        return self._request("POST", f"/datasets/{dataset_id}/documents/{document_id}/update-by-text",
+                             json={"name": name})
+
+    def list_metadata_fields(self, dataset_id: str) -> Dict[str, str]:
+        """データセットに定義されたメタデータ項目を取得する。
+
+        Returns:
+            項目名 → メタデータ項目ID
+
+        Raises:
+            requests.HTTPError: API エラー
+        """
+        body = self._request("GET", f"/datasets/{dataset_id}/metadata")
+        return {field["name"]: field["id"] for field in body.get("doc_metadata", [])}
+
+    def update_documents_metadata(self, dataset_id: str, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """複数ドキュメントのメタデータをまとめて更新する（本文は再インデックスされない）。
+
+        Args:
+            dataset_id: 対象データセットID
+            operations: {"document_id": ..., "metadata_list": [{"id", "name", "value"}, ...]} のリスト
+
+        Raises:
+            requests.HTTPError: API エラー
+        """
+        return self._request("POST", f"/datasets/{dataset_id}/documents/metadata",
+                             json={"operation_data": operations})
+
+    def delete_document(self, dataset_id: str, document_id: str) -> Dict[str, Any]:
+        """ドキュメントを削除する。
+
+        Raises:
+            requests.HTTPError: API エラー
+        """
+        return self._request("DELETE", f"/datasets/{dataset_id}/documents/{document_id}")
+
+    def close(self) -> None:
+        """HTTP接続を閉じる（共有セッションの場合は何もしない）。"""
+        if self._owns_session:
+            self.session.close()
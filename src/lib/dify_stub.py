@@ -0,0 +1,604 @@
+"""ローカル Dify スタブサーバー
+
+DifyClient / DifyDocumentApi が使う Knowledge API のサブセットを標準ライブラリのみで実装した
+HTTP サーバーです。実際の Dify を用意できない CI や手元の環境で、送信処理のスループットや
+レート制限・サーバーエラー時のリトライ動作を計測するために使います。
+
+- ドキュメントの作成・更新（create-by-text / update-by-text）、削除、一覧（page / limit / keyword）
+- セグメントの一覧・追加、メタデータ項目の一覧・ドキュメントメタデータの一括更新
+- 応答遅延（固定 / 一様 / 指数 / 対数正規分布）と 429 / 5xx の注入
+- エンドポイント・ステータスごとのリクエスト数、同時処理数の最大値、スループットの計測
+  （GET /_stub/stats で取得、POST /_stub/reset でデータと計測値を初期化）
+
+データはメモリ上にのみ保持します。
+
+使い方:
+    python -m src.lib.dify_stub --port 5001 --latency-ms 50 --error-429 0.05 > stats.json
+    # dify_url: "http://127.0.0.1:5001/v1"
+    # 起動メッセージは stderr に出力し、Ctrl+C で終了すると計測値を JSON で stdout に出力する
+"""
+
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/v1"
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+# セグメント分割の既定の最大文字数（process_rule で指定が無い場合）
+DEFAULT_SEGMENT_LENGTH = 500
+
+
+@dataclass
+class StubSettings:
+    """スタブサーバーの動作設定。
+
+    Attributes:
+        latency_ms: 応答遅延の平均（ミリ秒、0で遅延なし）
+        latency_distribution: 遅延の分布 fixed / uniform / exponential / lognormal
+        latency_sigma: 対数正規分布の標準偏差（対数スケール）
+        error_429_rate: 429（レート制限）を返す割合（0.0-1.0）
+        error_5xx_rate: 503 を返す割合（0.0-1.0）
+        retry_after: 429 応答の Retry-After ヘッダー（秒）
+        max_page_size: 一覧取得の limit の上限（Dify と同じく既定 100）
+        api_key: 受け付ける API キー（空の場合は Bearer ヘッダーがあれば受け付ける）
+        seed: 乱数シード（Noneの場合は固定しない）
+    """
+    latency_ms: float = 0.0
+    latency_distribution: str = "fixed"
+    latency_sigma: float = 0.5
+    error_429_rate: float = 0.0
+    error_5xx_rate: float = 0.0
+    retry_after: float = 1.0
+    max_page_size: int = 100
+    api_key: str = ""
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        """設定値の検証。"""
+        self.validate()
+
+    def validate(self):
+        """設定値の妥当性をチェックする。
+
+        Raises:
+            ValueError: 設定値が不正な場合
+        """
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_distribution must be one of {LATENCY_DISTRIBUTIONS}, "
+                             f"got {self.latency_distribution}")
+        for name in ("latency_ms", "latency_sigma", "retry_after"):
+            if getattr(self, name) < 0:
+                raise ValueError(f"{name} must be >= 0, got {getattr(self, name)}")
+        for name in ("error_429_rate", "error_5xx_rate"):
+            value = getattr(self, name)
+            if not 0.0 <= value <= 1.0:
+                raise ValueError(f"{name} must be between 0.0 and 1.0, got {value}")
+        if self.error_429_rate + self.error_5xx_rate > 1.0:
+            raise ValueError("error_429_rate + error_5xx_rate must be <= 1.0")
+        if self.max_page_size < 1:
+            raise ValueError(f"max_page_size must be >= 1, got {self.max_page_size}")
+
+    def as_dict(self) -> Dict[str, Any]:
+        """辞書形式で設定を返す。
+
+        Returns:
+            設定の辞書
+        """
+        return asdict(self)
+
+
+class StubError(Exception):
+    """API エラー応答（Dify と同じ {"code", "message", "status"} 形式）。"""
+
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def split_segments(text: str, max_length: int = DEFAULT_SEGMENT_LENGTH, separator: str = "\n\n") -> List[str]:
+    """本文をセグメントに分割する（区切り文字で分け、max_length を超える部分はさらに分割する）。"""
+    segments: List[str] = []
+    for part in text.split(separator or "\n\n"):
+        part = part.strip()
+        while len(part) > max_length:
+            segments.append(part[:max_length])
+            part = part[max_length:]
+        if part:
+            segments.append(part)
+    return segments
+
+
+class StubState:
+    """データセット・ドキュメントと計測値（複数スレッドから利用する）。"""
+
+    def __init__(self, settings: StubSettings):
+        self.settings = settings
+        self._random = random.Random(settings.seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """データと計測値を初期化する。"""
+        with self._lock:
+            # データセットID → ドキュメントID → ドキュメント（作成順）
+            self.datasets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            # データセットID → メタデータ項目のリスト
+            self.metadata_fields: Dict[str, List[Dict[str, Any]]] = {}
+            self.requests: Dict[str, int] = {}
+            self.statuses: Dict[str, int] = {}
+            self.injected: Dict[str, int] = {"429": 0, "5xx": 0}
+            self.documents_created = 0
+            self.documents_updated = 0
+            self.documents_deleted = 0
+            # 同じ名前のドキュメントを重ねて作成した回数（クライアントのリトライで重複した可能性）
+            self.duplicate_creates = 0
+            self.bytes_received = 0
+            self.inflight = 0
+            self.peak_inflight = 0
+            self.latency_total = 0.0
+            self.started = time.monotonic()
+            self.first_request: Optional[float] = None
+            self.last_response: Optional[float] = None
+
+    # ---- 計測 ----
+
+    def begin(self, endpoint: str, size: int) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self.first_request is None:
+                self.first_request = now
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.bytes_received += size
+            self.inflight += 1
+            self.peak_inflight = max(self.peak_inflight, self.inflight)
+
+    def end(self, status: int) -> None:
+        with self._lock:
+            self.inflight -= 1
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            self.last_response = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """計測値を返す（スループットは最初のリクエストから最後の応答までの時間で計算する）。"""
+        with self._lock:
+            total = sum(self.requests.values())
+            window = ((self.last_response or 0.0) - self.first_request) if self.first_request is not None else 0.0
+            return {
+                "requests": total,
+                "by_endpoint": dict(self.requests),
+                "by_status": dict(self.statuses),
+                "injected": dict(self.injected),
+                "documents": sum(len(docs) for docs in self.datasets.values()),
+                "documents_created": self.documents_created,
+                "documents_updated": self.documents_updated,
+                "documents_deleted": self.documents_deleted,
+                "duplicate_creates": self.duplicate_creates,
+                "bytes_received": self.bytes_received,
+                "peak_inflight": self.peak_inflight,
+                "mean_injected_latency_ms": round(self.latency_total / total * 1000, 3) if total else 0.0,
+                "elapsed": round(window, 3),
+                "requests_per_second": round(total / window, 2) if window > 0 else 0.0,
+            }
+
+    # ---- 障害注入 ----
+
+    def draw_latency(self) -> float:
+        """設定された分布から応答遅延（秒）を1つ選ぶ。"""
+        settings = self.settings
+        mean = settings.latency_ms / 1000
+        if mean <= 0:
+            return 0.0
+        with self._lock:
+            if settings.latency_distribution == "uniform":
+                value = self._random.uniform(0, 2 * mean)
+            elif settings.latency_distribution == "exponential":
+                value = self._random.expovariate(1 / mean)
+            elif settings.latency_distribution == "lognormal":
+                # 平均が latency_ms になるよう mu を決める
+                sigma = settings.latency_sigma
+                value = self._random.lognormvariate(math.log(mean) - sigma * sigma / 2, sigma)
+            else:
+                value = mean
+            self.latency_total += value
+        return value
+
+    def draw_fault(self) -> Optional[int]:
+        """注入するエラーのステータス（注入しない場合はNone）。"""
+        settings = self.settings
+        if not settings.error_429_rate and not settings.error_5xx_rate:
+            return None
+        with self._lock:
+            roll = self._random.random()
+            if roll < settings.error_429_rate:
+                self.injected["429"] += 1
+                return 429
+            if roll < settings.error_429_rate + settings.error_5xx_rate:
+                self.injected["5xx"] += 1
+                return 503
+        return None
+
+    # ---- Knowledge API ----
+
+    def _documents(self, dataset_id: str) -> Dict[str, Dict[str, Any]]:
+        return self.datasets.setdefault(dataset_id, {})
+
+    def _document(self, dataset_id: str, document_id: str) -> Dict[str, Any]:
+        document = self.datasets.get(dataset_id, {}).get(document_id)
+        if document is None:
+            raise StubError(404, "document_not_found", "Document not found.")
+        return document
+
+    @staticmethod
+    def _public(document: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in document.items() if key not in ("text", "segments")}
+
+    @staticmethod
+    def _segment_rule(body: Dict[str, Any]) -> Tuple[int, str]:
+        rules = ((body.get("process_rule") or {}).get("rules") or {}).get("segmentation") or {}
+        return int(rules.get("max_tokens") or DEFAULT_SEGMENT_LENGTH), rules.get("separator") or "\n\n"
+
+    def _set_text(self, document: Dict[str, Any], text: str, body: Dict[str, Any]) -> None:
+        max_length, separator = self._segment_rule(body)
+        document["text"] = text
+        document["word_count"] = len(text)
+        document["segments"] = [
+            {"id": str(uuid.uuid4()), "position": position, "content": content, "word_count": len(content),
+             "enabled": True, "status": "completed"}
+            for position, content in enumerate(split_segments(text, max_length, separator), 1)
+        ]
+
+    def create_by_text(self, dataset_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        name, text = body.get("name"), body.get("text")
+        if not name or text is None:
+            raise StubError(400, "invalid_param", "name and text are required.")
+        with self._lock:
+            documents = self._documents(dataset_id)
+            if any(document["name"] == name for document in documents.values()):
+                self.duplicate_creates += 1
+            document = {
+                "id": str(uuid.uuid4()),
+                "position": len(documents) + 1,
+                "data_source_type": "upload_file",
+                "name": name,
+                "created_from": "api",
+                "created_at": int(time.time()),
+                "indexing_status": "completed",
+                "enabled": True,
+                "archived": False,
+                "doc_form": body.get("doc_form", "text_model"),
+                "doc_metadata": [],
+            }
+            self._set_text(document, text, body)
+            documents[document["id"]] = document
+            self.documents_created += 1
+            return {"document": self._public(document), "batch": uuid.uuid4().hex}
+
+    def update_by_text(self, dataset_id: str, document_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            document = self._document(dataset_id, document_id)
+            if body.get("name"):
+                document["name"] = body["name"]
+            if body.get("text") is not None:
+                self._set_text(document, body["text"], body)
+            self.documents_updated += 1
+            return {"document": self._public(document), "batch": uuid.uuid4().hex}
+
+    def delete(self, dataset_id: str, document_id: str) -> Dict[str, Any]:
+        with self._lock:
+            self._document(dataset_id, document_id)
+            del self.datasets[dataset_id][document_id]
+            self.documents_deleted += 1
+        return {"result": "success"}
+
+    def list_documents(self, dataset_id: str, query: Dict[str, str]) -> Dict[str, Any]:
+        try:
+            page = max(1, int(query.get("page", 1)))
+            limit = min(self.settings.max_page_size, max(1, int(query.get("limit", 20))))
+        except ValueError:
+            raise StubError(400, "invalid_param", "page and limit must be integers.")
+        keyword = query.get("keyword")
+        with self._lock:
+            documents = list(self._documents(dataset_id).values())
+            if keyword:
+                documents = [document for document in documents if keyword in document["name"]]
+            # Dify と同じく新しいものから返す
+            documents.reverse()
+            start = (page - 1) * limit
+            data = [self._public(document) for document in documents[start:start + limit]]
+        return {"data": data, "has_more": start + limit < len(documents), "limit": limit,
+                "total": len(documents), "page": page}
+
+    def list_segments(self, dataset_id: str, document_id: str) -> Dict[str, Any]:
+        with self._lock:
+            document = self._document(dataset_id, document_id)
+            return {"data": [dict(segment) for segment in document["segments"]],
+                    "doc_form": document["doc_form"], "has_more": False}
+
+    def add_segments(self, dataset_id: str, document_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        items = body.get("segments")
+        if not isinstance(items, list) or not items:
+            raise StubError(400, "invalid_param", "segments is required.")
+        with self._lock:
+            segments = self._document(dataset_id, document_id)["segments"]
+            added = []
+            for item in items:
+                content = str(item.get("content", ""))
+                segment = {"id": str(uuid.uuid4()), "position": len(segments) + 1, "content": content,
+                           "word_count": len(content), "enabled": True, "status": "completed"}
+                segments.append(segment)
+                added.append(dict(segment))
+        return {"data": added, "doc_form": "text_model"}
+
+    def list_metadata(self, dataset_id: str) -> Dict[str, Any]:
+        with self._lock:
+            fields = self.metadata_fields.get(dataset_id, [])
+            return {"doc_metadata": [dict(field) for field in fields], "built_in_field_enabled": False}
+
+    def add_metadata_field(self, dataset_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        if not body.get("name"):
+            raise StubError(400, "invalid_param", "name is required.")
+        field = {"id": str(uuid.uuid4()), "name": body["name"], "type": body.get("type", "string")}
+        with self._lock:
+            self.metadata_fields.setdefault(dataset_id, []).append(field)
+        return dict(field)
+
+    def update_metadata(self, dataset_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            for operation in body.get("operation_data") or []:
+                document = self._document(dataset_id, operation.get("document_id", ""))
+                document["doc_metadata"] = list(operation.get("metadata_list") or [])
+        return {"result": "success"}
+
+
+# (メソッド, パスの正規表現, StubState のメソッド名 = 計測上のエンドポイント名)
+_ROUTES: List[Tuple[str, "re.Pattern[str]", str]] = [
+    ("POST", re.compile(r"^/datasets/([^/]+)/document/create[-_]by[-_]text$"), "create_by_text"),
+    ("POST", re.compile(r"^/datasets/([^/]+)/documents/([^/]+)/update[-_]by[-_]text$"), "update_by_text"),
+    ("GET", re.compile(r"^/datasets/([^/]+)/documents/([^/]+)/segments$"), "list_segments"),
+    ("POST", re.compile(r"^/datasets/([^/]+)/documents/([^/]+)/segments$"), "add_segments"),
+    ("POST", re.compile(r"^/datasets/([^/]+)/documents/metadata$"), "update_metadata"),
+    ("DELETE", re.compile(r"^/datasets/([^/]+)/documents/([^/]+)$"), "delete"),
+    ("GET", re.compile(r"^/datasets/([^/]+)/documents$"), "list_documents"),
+    ("GET", re.compile(r"^/datasets/([^/]+)/metadata$"), "list_metadata"),
+    ("POST", re.compile(r"^/datasets/([^/]+)/metadata$"), "add_metadata_field"),
+]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_StubHTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, method: str) -> None:
+        state = self.server.state
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+
+        # 計測値の取得・初期化（遅延・障害注入・計測の対象外）
+        if url.path == "/_stub/stats" and method == "GET":
+            self._send_json(200, state.stats())
+            return
+        if url.path == "/_stub/reset" and method == "POST":
+            state.reset()
+            self._send_json(200, {"result": "success"})
+            return
+
+        path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX + "/") else url.path
+        route = next(((pattern, name) for route_method, pattern, name in _ROUTES
+                      if route_method == method and pattern.match(path)), None)
+        endpoint = route[1] if route else "unknown"
+        state.begin(endpoint, len(raw))
+        status = 500
+        try:
+            time.sleep(state.draw_latency())
+            try:
+                status, body, headers = self._dispatch(state, method, path, url.query, raw, route)
+            except Exception as e:
+                logger.exception(f"スタブの処理に失敗: {method} {path}")
+                status, body, headers = 500, {"code": "internal_error", "message": str(e), "status": 500}, {}
+            self._send_json(status, body, headers)
+        finally:
+            state.end(status)
+
+    def _dispatch(self, state: StubState, method: str, path: str, query: str, raw: bytes,
+                  route: Optional[Tuple["re.Pattern[str]", str]]) -> Tuple[int, Dict[str, Any], Dict[str, str]]:
+        settings = state.settings
+        authorization = self.headers.get("Authorization", "")
+        if not authorization.startswith("Bearer ") or (settings.api_key and authorization[7:] != settings.api_key):
+            return 401, {"code": "unauthorized", "message": "Invalid API key.", "status": 401}, {}
+        if route is None:
+            return 404, {"code": "not_found", "message": f"{method} {path} is not supported.", "status": 404}, {}
+
+        fault = state.draw_fault()
+        if fault == 429:
+            return 429, {"code": "too_many_requests", "message": "Rate limit exceeded.", "status": 429}, {
+                "Retry-After": str(settings.retry_after)}
+        if fault is not None:
+            return fault, {"code": "service_unavailable", "message": "Injected failure.", "status": fault}, {}
+
+        pattern, name = route
+        args: List[Any] = list(pattern.match(path).groups())
+        try:
+            if method == "POST":
+                body = json.loads(raw or b"{}")
+                if not isinstance(body, dict):
+                    raise StubError(400, "invalid_param", "Request body must be a JSON object.")
+                args.append(body)
+            elif name == "list_documents":
+                args.append({key: values[-1] for key, values in parse_qs(query).items()})
+            return 200, getattr(state, name)(*args), {}
+        except ValueError:
+            return 400, {"code": "invalid_param", "message": "Invalid JSON body.", "status": 400}, {}
+        except StubError as e:
+            return e.status, {"code": e.code, "message": str(e), "status": e.status}, {}
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_DELETE(self) -> None:
+        self._handle("DELETE")
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 同時接続数の多い負荷試験で接続を取りこぼさないようにする
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], state: StubState):
+        super().__init__(address, _Handler)
+        self.state = state
+
+
+class DifyStubServer:
+    """バックグラウンドスレッドで動作するスタブサーバー。
+
+    使用例:
+        with DifyStubServer(StubSettings(latency_ms=50, error_429_rate=0.05)) as stub:
+            api = DifyDocumentApi(stub.url, "stub-key")
+            ...
+            print(stub.stats())
+    """
+
+    def __init__(self, settings: Optional[StubSettings] = None, host: str = "127.0.0.1", port: int = 0):
+        """サーバーを作成する（port=0 の場合は空いているポートを使う）。
+
+        Args:
+            settings: 動作設定（Noneの場合は遅延・障害注入なし）
+            host: 待ち受けアドレス
+            port: 待ち受けポート
+        """
+        self.state = StubState(settings or StubSettings())
+        self._server = _StubHTTPServer((host, port), self.state)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """設定ファイルの dify_url に指定するURL。"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self) -> "DifyStubServer":
+        """待ち受けを開始する。"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="dify-stub", daemon=True)
+            self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """現在のスレッドで待ち受ける（Ctrl+C 等で中断されるまで戻らない）。"""
+        self._server.serve_forever()
+
+    def stats(self) -> Dict[str, Any]:
+        """計測値を返す。"""
+        return self.state.stats()
+
+    def reset(self) -> None:
+        """データと計測値を初期化する。"""
+        self.state.reset()
+
+    def close(self) -> None:
+        """待ち受けを停止する。"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "DifyStubServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    """StubSettings の各項目をコマンドライン引数として追加する。"""
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean response latency in ms (default: 0)")
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="fixed",
+                        help="Latency distribution (default: fixed)")
+    parser.add_argument("--sigma", type=float, default=0.5, help="Sigma of the lognormal distribution (default: 0.5)")
+    parser.add_argument("--error-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-5xx", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429")
+    parser.add_argument("--max-page-size", type=int, default=100, help="Upper bound of the list page size")
+    parser.add_argument("--seed", type=int, help="Random seed for latency and fault injection")
+
+
+def stub_settings_from_args(args: argparse.Namespace, api_key: str = "") -> StubSettings:
+    """add_stub_arguments で追加した引数から StubSettings を作る。
+
+    Raises:
+        ValueError: 設定値が不正な場合
+    """
+    return StubSettings(
+        latency_ms=args.latency_ms,
+        latency_distribution=args.distribution,
+        latency_sigma=args.sigma,
+        error_429_rate=args.error_429,
+        error_5xx_rate=args.error_5xx,
+        retry_after=args.retry_after,
+        max_page_size=args.max_page_size,
+        api_key=api_key,
+        seed=args.seed,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local Dify Knowledge API stub for load testing")
+    parser.add_argument("--host", default="127.0.0.1", help="Listen address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=5001, help="Listen port (default: 5001)")
+    parser.add_argument("--api-key", default="", help="Accept only this API key (default: any Bearer token)")
+    add_stub_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        settings = stub_settings_from_args(args, args.api_key)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    # 起動メッセージ等の進行状況は stderr のログに出力し、stdout は終了時の計測値のみにする
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    server = DifyStubServer(settings, args.host, args.port)
+    logger.info(f"Dify stub listening on {server.url}  (stats: GET /_stub/stats, reset: POST /_stub/reset)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        # 終了時の計測値は JSON として stdout に出力する（リダイレクトして集計できるよう意図的に print を使う）
+        print(json.dumps(server.stats(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
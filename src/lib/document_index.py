@@ -0,0 +1,151 @@
+"""文書情報インデックス
+
+変換時に収集した文書情報（タイトル・見出し・ページ数/シート数・Frontmatter）を、
+トラッカーのメタデータファイルと並べて `<メタデータファイル名>.documents.json` に保存します。
+内容が変わっていないファイルについても、再変換せずに Dify のドキュメントメタデータを
+更新できます（`--refresh-metadata`）。
+
+エントリはトラッカーと同じ規則で正規化したパスをキーとし、送信に成功したファイルのみ保持します。
+送信時の設定のフィンガープリント（Config.fingerprint）も記録し、変換に影響する設定が
+変わったファイルを再変換の対象として検出します。
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .orphan_sweep import normalize_path
+from .records import DocumentInfo
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+
+def index_path_for(metadata_file: str) -> str:
+    """トラッカーのメタデータファイルに対応するインデックスファイルのパスを返す。"""
+    base, ext = os.path.splitext(metadata_file)
+    return f"{base}.documents{ext or '.json'}"
+
+
+class DocumentIndex:
+    """ファイルパス → (DifyドキュメントID, 文書情報) のインデックス。"""
+
+    def __init__(self, path: str):
+        """インデックスを読み込む（存在しない・壊れている場合は空で開始する）。
+
+        Args:
+            path: インデックスファイルのパス
+        """
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self._entries = dict(data.get("documents") or {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"文書情報インデックスの読み込みに失敗、空のインデックスで開始します: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: str) -> Optional[DocumentInfo]:
+        """ファイルの文書情報を返す（記録が無い場合はNone）。"""
+        entry = self._entries.get(normalize_path(path))
+        return DocumentInfo.from_dict(entry["info"]) if entry else None
+
+    def update(self, path: str, document_id: Optional[str], info: DocumentInfo,
+               fingerprint: Optional[str] = None) -> None:
+        """送信に成功したファイルの文書情報と、送信時の設定のフィンガープリントを記録する。"""
+        self._entries[normalize_path(path)] = {
+            "path": path,
+            "document_id": document_id,
+            "info": info.as_dict(),
+            "fingerprint": fingerprint,
+        }
+        self._dirty = True
+
+    def stale(self, paths: Iterable[str], fingerprint: str) -> List[str]:
+        """指定したファイルのうち、現在と異なる設定で変換・送信されたものを返す。
+
+        フィンガープリントが記録されていないエントリ（以前のバージョンで作成）は対象外とする。
+
+        Args:
+            paths: 確認するファイルパス
+            fingerprint: 現在の設定のフィンガープリント
+
+        Returns:
+            再変換が必要なファイルパスのリスト
+        """
+        stale: List[str] = []
+        for path in paths:
+            entry = self._entries.get(normalize_path(path))
+            recorded = entry.get("fingerprint") if entry else None
+            if recorded and recorded != fingerprint:
+                stale.append(path)
+        return stale
+
+    def move(self, old_path: str, new_path: str, document_id: Optional[str]) -> None:
+        """移動したファイルのエントリを引き継ぐ（記録が無い場合は何もしない）。"""
+        entry = self._entries.pop(normalize_path(old_path), None)
+        if entry is None:
+            return
+        entry["path"] = new_path
+        entry["document_id"] = document_id
+        self._entries[normalize_path(new_path)] = entry
+        self._dirty = True
+
+    def remove(self, path: str) -> None:
+        """ファイルのエントリを削除する。"""
+        if self._entries.pop(normalize_path(path), None) is not None:
+            self._dirty = True
+
+    def prune(self, existing: Iterable[str]) -> int:
+        """存在しないファイルのエントリを削除する。
+
+        Args:
+            existing: 探索で見つかったファイルパス
+
+        Returns:
+            削除したエントリ数
+        """
+        keep = {normalize_path(path) for path in existing}
+        stale = [key for key in self._entries if key not in keep]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self._dirty = True
+        return len(stale)
+
+    def entries(self, paths: Iterable[str]) -> Iterator[Tuple[str, str, DocumentInfo]]:
+        """指定したファイルのうち、DifyドキュメントIDと文書情報が記録されているものを返す。
+
+        Yields:
+            (ファイルパス, DifyドキュメントID, DocumentInfo)
+        """
+        for path in paths:
+            entry = self._entries.get(normalize_path(path))
+            if entry and entry.get("document_id"):
+                yield path, entry["document_id"], DocumentInfo.from_dict(entry["info"])
+
+    def save(self) -> None:
+        """変更があれば保存する（一時ファイル経由で置き換える）。
+
+        Raises:
+            OSError: 書き込みに失敗した場合
+        """
+        if not self._dirty:
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "documents": self._entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
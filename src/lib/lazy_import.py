@@ -0,0 +1,166 @@
+"""遅延インポートユーティリティ
+
+変換バックエンド（markitdown、python-docx、openpyxl 等）を初回使用時にのみ
+インポートし、その所要時間を記録します。変更の無い実行ではドキュメント系
+ライブラリを一切読み込まないことで、CLI の起動時間を短く保ちます。
+"""
+
+import importlib
+import importlib.util
+import subprocess
+import sys
+import time
+from types import ModuleType
+from typing import Any, Dict, List, Optional
+
+# 変換処理でのみ必要となる重いライブラリ
+DOCUMENT_LIBRARIES = (
+    "markitdown",
+    "docx",
+    "openpyxl",
+    "pdfplumber",
+    "PyPDF2",
+    "pypdf",
+    "pptx",
+    "xlrd",
+    "frontmatter",
+    "chardet",
+)
+
+# モジュール名 → インポートに要した秒数
+_import_timings: Dict[str, float] = {}
+
+
+def is_available(name: str) -> bool:
+    """モジュールをインポートせずに、インストール済みかどうかを判定する。
+
+    Args:
+        name: モジュール名
+
+    Returns:
+        インポート可能な場合True
+    """
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def import_backend(name: str) -> ModuleType:
+    """変換バックエンドを初回使用時にインポートし、所要時間を記録する。
+
+    Args:
+        name: モジュール名
+
+    Returns:
+        インポートしたモジュール
+
+    Raises:
+        ImportError: モジュールがインストールされていない場合
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    _import_timings[name] = time.perf_counter() - started
+    return module
+
+
+def import_timings() -> Dict[str, float]:
+    """このプロセスで import_backend が記録したインポート時間を返す。"""
+    return dict(_import_timings)
+
+
+def loaded_document_libraries() -> List[str]:
+    """このプロセスで既に読み込まれているドキュメント系ライブラリを返す。"""
+    return [name for name in DOCUMENT_LIBRARIES if name in sys.modules]
+
+
+def measure_import_time(module: str, top: int = 20) -> List[Dict[str, Any]]:
+    """`python -X importtime` でモジュールのコールドインポート時間を計測する。
+
+    Args:
+        module: 計測対象のモジュール名
+        top: 返す件数（累積時間の大きい順）
+
+    Returns:
+        {"module", "self_us", "cumulative_us"} の辞書のリスト
+
+    Raises:
+        RuntimeError: 計測用プロセスの実行に失敗した場合
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"failed to import {module}: {proc.stderr.strip().splitlines()[-1:]}")
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        # 形式: "import time:      self [us] |  cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        entries.append({
+            "module": parts[2].strip(),
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+        })
+
+    entries.sort(key=lambda e: e["cumulative_us"], reverse=True)
+    return entries[:top]
+
+
+def build_startup_report(module: str, backend_timings: Optional[Dict[str, float]] = None,
+                         top: int = 20) -> Dict[str, Any]:
+    """起動時間レポートを作成する。
+
+    Args:
+        module: 起動時にインポートされるモジュール名（例: "src.cli.main"）
+        backend_timings: 実行中に遅延インポートされたバックエンドの所要時間（秒）
+        top: 起動時インポートの表示件数
+
+    Returns:
+        レポートの辞書
+    """
+    report: Dict[str, Any] = {
+        "module": module,
+        "document_libraries_loaded": loaded_document_libraries(),
+        "backend_imports_ms": {
+            name: round(seconds * 1000, 1)
+            for name, seconds in sorted((backend_timings or {}).items(), key=lambda kv: kv[1], reverse=True)
+        },
+    }
+    try:
+        report["startup_imports"] = measure_import_time(module, top=top)
+    except (OSError, RuntimeError) as e:
+        report["startup_imports_error"] = str(e)
+    return report
+
+
+def format_startup_report(report: Dict[str, Any]) -> str:
+    """起動時間レポートを `-X importtime` 風のテキストに整形する。"""
+    lines = [f"startup import time for {report['module']}:",
+             f"{'self [us]':>12} | {'cumulative':>10} | imported package"]
+    for entry in report.get("startup_imports", []):
+        lines.append(f"{entry['self_us']:>12} | {entry['cumulative_us']:>10} | {entry['module']}")
+    if "startup_imports_error" in report:
+        lines.append(f"  (measurement failed: {report['startup_imports_error']})")
+
+    lines.append("lazily imported converter backends:")
+    backends = report.get("backend_imports_ms", {})
+    if backends:
+        for name, ms in backends.items():
+            lines.append(f"{ms:>10.1f} ms | {name}")
+    else:
+        lines.append("  (none)")
+    loaded = report.get("document_libraries_loaded", [])
+    lines.append(f"document libraries loaded in main process: {', '.join(loaded) if loaded else 'none'}")
+    return "\n".join(lines)
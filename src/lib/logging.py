@@ -0,0 +1,356 @@
+"""JSON構造化ログ
+
+`get_logger(name, job_id, log_dir)` で、`{log_dir}/{YYYYMMDD}/{job_id}.log` に JSON Lines 形式で
+出力するロガーを返します。辞書を渡すとそのままフィールドとしてマージされます。
+
+    logger = get_logger("dify_batch", job_id, log_dir=cfg.log_dir, level=cfg.log_level,
+                        settings=cfg.log_settings)
+    logger.info({"event": "uploaded", "path": path})
+
+大量のファイルを処理してもログ出力がボトルネックにならないよう、以下を行います。
+
+- 呼び出し側ではキューに積むだけで、整形・書き込みはバックグラウンドスレッドでまとめて行う
+- 大量に発生するイベント（uploaded 等）はカテゴリごとに間引く（WARNING以上は間引かない）
+- サイズ上限でローテーションし、ローテーションしたファイルは gzip 圧縮する
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+# ライブラリ（src.lib.*）のログも最初に作成したジョブのログファイルに出力する
+LIBRARY_LOGGER_NAME = "src"
+
+_handlers: List["AsyncJsonLinesHandler"] = []
+_handlers_lock = threading.Lock()
+_library_handler: Optional["AsyncJsonLinesHandler"] = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """ログレコードを compact な JSON オブジェクトとして整形します。"""
+
+    def __init__(self, job_id: Optional[str] = None):
+        super().__init__()
+        self.job_id = job_id
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        if self.job_id:
+            # ジョブごとのロガー（name.job_id）は元の name で出力する
+            suffix = f".{self.job_id}"
+            if record.name.endswith(suffix):
+                payload["logger"] = record.name[:-len(suffix)]
+            payload["job_id"] = self.job_id
+
+        # If the message is a structured dict, merge it
+        msg = record.msg
+        if isinstance(msg, dict):
+            payload.update(msg)
+        else:
+            payload["message"] = record.getMessage()
+
+        # Include exception info if present
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _category(record: logging.LogRecord) -> str:
+    """間引き判定に使うカテゴリ（辞書ログの event、それ以外はロガー名）。"""
+    msg = record.msg
+    if isinstance(msg, dict) and "event" in msg:
+        return str(msg["event"])
+    return record.name
+
+
+class SamplingFilter(logging.Filter):
+    """カテゴリごとにログを間引くフィルタ。
+
+    rate=0.1 のカテゴリは 10 件に 1 件（最初の1件を含む）を出力する。
+    WARNING 以上のログは間引かない。
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.every = {category: max(1, round(1 / rate)) for category, rate in rates.items() if 0 < rate < 1}
+        self.seen: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.every or record.levelno >= logging.WARNING:
+            return True
+        category = _category(record)
+        every = self.every.get(category)
+        if every is None:
+            return True
+        with self._lock:
+            count = self.seen.get(category, 0)
+            self.seen[category] = count + 1
+            if count % every == 0:
+                return True
+            self.dropped[category] = self.dropped.get(category, 0) + 1
+            return False
+
+
+class AsyncJsonLinesHandler(logging.Handler):
+    """キュー経由でバックグラウンドスレッドがまとめて書き込むファイルハンドラ。
+
+    Attributes:
+        path: 出力先ファイル
+        batch_size: 1回の書き込みでまとめる最大件数
+        flush_interval: バッファを書き出すまでの最大待ち時間（秒）
+        max_bytes: ローテーションするファイルサイズ（0で無効）
+        backup_count: 保持するローテーション済みファイル数
+        compress: ローテーション済みファイルを gzip 圧縮する場合True
+    """
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 1.0,
+                 max_bytes: int = 0, backup_count: int = 5, compress: bool = True,
+                 queue_size: int = 10000):
+        super().__init__()
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self._pid = os.getpid()
+        # 上限に達した場合は呼び出し側を待たせる（ログを黙って捨てない）
+        self._queue: "queue.Queue[Optional[logging.LogRecord]]" = queue.Queue(maxsize=queue_size)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._open()
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_loop, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._closed:
+            return
+        # fork した子プロセスには書き込みスレッドが引き継がれず、キューに積んでも
+        # 書き出されないため、ログを失わないよう stderr へ直接出力する
+        if os.getpid() != self._pid:
+            self._write_stderr(record)
+            return
+        if isinstance(record.msg, dict):
+            # 呼び出し側で後から変更されても影響しないよう浅いコピーを積む
+            record.msg = dict(record.msg)
+        # 書き込みスレッドが停止している場合はキューが空かないため、待ち続けずに stderr へ出力する
+        while self._thread.is_alive():
+            try:
+                self._queue.put(record, timeout=1.0)
+                return
+            except queue.Full:
+                continue
+        self._write_stderr(record)
+
+    def _write_stderr(self, record: logging.LogRecord) -> None:
+        try:
+            sys.stderr.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def _write_loop(self) -> None:
+        while True:
+            record = self._queue.get()
+            received = 1
+            stop = record is None
+            batch: List[str] = []
+            if not stop:
+                self._append(batch, record)
+
+            # 最初の1件から flush_interval の間、または batch_size 件に達するまでまとめる
+            deadline = time.monotonic() + self.flush_interval
+            while not stop and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                received += 1
+                if record is None:
+                    stop = True
+                else:
+                    self._append(batch, record)
+
+            try:
+                if batch:
+                    self._write(batch)
+            except Exception as e:
+                # 想定外のエラーでもスレッドを止めない（止まると呼び出し側がキュー待ちになる）
+                sys.stderr.write(f"log write failed: {self.path}: {e}\n")
+            finally:
+                # flush() で待っている呼び出し側に処理済みを通知する
+                for _ in range(received):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _append(self, batch: List[str], record: logging.LogRecord) -> None:
+        try:
+            batch.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+    def _write(self, lines: List[str]) -> None:
+        data = "\n".join(lines) + "\n"
+        try:
+            if self._stream.closed:
+                # 前回のローテーションで開き直せなかった場合
+                self._open()
+            self._stream.write(data)
+            self._stream.flush()
+            self._size += len(data.encode("utf-8"))
+            if self.max_bytes and self._size >= self.max_bytes:
+                self._rotate()
+        except Exception as e:
+            sys.stderr.write(f"log write failed: {self.path}: {e}\n")
+
+    def _open(self) -> None:
+        self._stream = open(self.path, "a", encoding="utf-8")
+        self._size = self._stream.tell()
+
+    def _rotated_name(self, index: int) -> str:
+        return f"{self.path}.{index}" + (".gz" if self.compress else "")
+
+    def _rotate(self) -> None:
+        """現在のファイルを .1(.gz) に移し、古いものを繰り下げる。
+
+        途中で失敗した場合も出力先を開き直す（失敗したファイルへの追記を続ける）。
+        """
+        self._stream.close()
+        try:
+            if self.backup_count > 0:
+                oldest = self._rotated_name(self.backup_count)
+                if os.path.exists(oldest):
+                    os.remove(oldest)
+                for index in range(self.backup_count - 1, 0, -1):
+                    source = self._rotated_name(index)
+                    if os.path.exists(source):
+                        os.replace(source, self._rotated_name(index + 1))
+                if self.compress:
+                    with open(self.path, "rb") as src, gzip.open(self._rotated_name(1), "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                    os.remove(self.path)
+                else:
+                    os.replace(self.path, self._rotated_name(1))
+            else:
+                os.remove(self.path)
+        finally:
+            self._open()
+
+    def flush(self) -> None:
+        """キューに積まれたログがすべて書き込まれるまで待つ。"""
+        if not self._closed and os.getpid() == self._pid and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self) -> None:
+        """残りのログを書き込んでスレッドを停止し、ファイルを閉じる。"""
+        if not self._closed and os.getpid() == self._pid:
+            self._closed = True
+            if self._thread.is_alive():
+                self._queue.put(None)
+                self._thread.join()
+            self._stream.close()
+        super().close()
+
+
+def _parse_level(level: Any) -> int:
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    return value if isinstance(value, int) else logging.INFO
+
+
+def get_logger(name: str, job_id: str, log_dir: str = "./log", level: Any = "INFO",
+               settings: Any = None) -> logging.Logger:
+    """指定された job_id に対応する JSON Lines ファイルハンドラを持つ Logger を返す。
+
+    Args:
+        name: ロガー名
+        job_id: ジョブ識別子（ファイル名に使用）
+        log_dir: ログ出力ディレクトリ
+        level: ログレベル（DEBUG/INFO/WARNING/ERROR）
+        settings: LogSettings（非同期書き込み・間引き・ローテーションの設定、Noneで既定値）
+
+    Returns:
+        設定済みロガーインスタンス（同じ name・job_id で呼ぶと同じものを返す）
+    """
+    global _library_handler
+
+    logger_name = f"{name}.{job_id}"
+    logger = logging.getLogger(logger_name)
+    if logger.handlers:
+        return logger
+
+    path = os.path.join(log_dir, datetime.now().strftime("%Y%m%d"), f"{job_id}.log")
+    options = settings.as_dict() if settings is not None else {}
+    handler = AsyncJsonLinesHandler(
+        path,
+        batch_size=options.get("batch_size", 256),
+        flush_interval=options.get("flush_interval", 1.0),
+        max_bytes=options.get("max_size_mb", 100) * 1024 * 1024,
+        backup_count=options.get("backup_count", 5),
+        compress=options.get("compress", True),
+    )
+    handler.setFormatter(JsonLinesFormatter(job_id))
+    sampling = SamplingFilter(options.get("sampling") or {})
+    handler.addFilter(sampling)
+    handler.sampling = sampling
+
+    logger.setLevel(_parse_level(level))
+    logger.addHandler(handler)
+    logger.propagate = False
+
+    with _handlers_lock:
+        _handlers.append(handler)
+        if _library_handler is None:
+            _library_handler = handler
+            library_logger = logging.getLogger(LIBRARY_LOGGER_NAME)
+            library_logger.setLevel(_parse_level(level))
+            library_logger.addHandler(handler)
+    return logger
+
+
+def shutdown_loggers() -> None:
+    """間引いた件数を記録し、すべてのログを書き込んでハンドラを閉じる。"""
+    global _library_handler
+
+    with _handlers_lock:
+        handlers = list(_handlers)
+        _handlers.clear()
+        if _library_handler is not None:
+            logging.getLogger(LIBRARY_LOGGER_NAME).removeHandler(_library_handler)
+            _library_handler = None
+
+    for handler in handlers:
+        sampling = getattr(handler, "sampling", None)
+        if sampling is not None and sampling.dropped and os.getpid() == handler._pid:
+            record = logging.makeLogRecord({
+                "name": "dify_batch", "levelno": logging.INFO, "levelname": "INFO",
+                "msg": {"event": "log_sampling", "dropped": dict(sampling.dropped), "seen": dict(sampling.seen)},
+            })
+            handler.handle(record)
+        handler.close()
+        for logger in list(logging.Logger.manager.loggerDict.values()):
+            if isinstance(logger, logging.Logger) and handler in logger.handlers:
+                logger.removeHandler(handler)
+
+
+atexit.register(shutdown_loggers)
@@ -0,0 +1,350 @@
+"""OOXML（.docx / .pptx）のストリーミング抽出
+
+python-docx / python-pptx のように文書全体のオブジェクトモデルを構築せず、zip 内の
+XML パートを iterparse で読みながら段落・表・スライドを順に取り出します。
+処理済みの要素はその場で破棄するため、数百スライドの資料や巨大な Word 文書でも
+メモリ使用量が文書サイズに比例して増えません。
+
+- Word: 本文（word/document.xml）の段落（見出し・箇条書きを判定）と表、続けて脚注・文末脚注。
+  脚注のパートは本文を読み進める間にスレッドで並行して解析する
+- PowerPoint: スライドごとのテキスト（グループ内の図形を含む）と表。
+  スライドはパートごとに独立しているため、スレッドで並列に解析して元の順序で返す
+
+取り出したブロックは ("paragraph", テキスト) または ("table", 行のリスト) のタプルです。
+"""
+
+import logging
+import posixpath
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+logger = logging.getLogger(__name__)
+
+# 名前空間
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+BLOCK_PARAGRAPH = "paragraph"
+BLOCK_TABLE = "table"
+
+# スライド・脚注などのパートを並列に解析するスレッド数の既定値
+PART_WORKERS = 4
+
+# 見出しスタイル名（"heading 1" 等。日本語版 Word でもスタイル名は英語で保存される）
+_HEADING_NAME = re.compile(r"^heading\s*([1-9])$", re.IGNORECASE)
+
+Block = Tuple[str, object]
+
+# 解析に失敗した場合に呼び出し側でフォールバックする例外
+OOXML_ERRORS = (zipfile.BadZipFile, KeyError, ET.ParseError)
+
+
+# ========================================
+# Word
+# ========================================
+
+def _heading_levels(zf: zipfile.ZipFile) -> Dict[str, int]:
+    """styles.xml からスタイルID → 見出しレベルの対応を作る。"""
+    levels: Dict[str, int] = {}
+    try:
+        source = zf.open("word/styles.xml")
+    except KeyError:
+        return levels
+
+    with source:
+        for _, elem in ET.iterparse(source):
+            if elem.tag != f"{_W}style":
+                continue
+            style_id = elem.get(f"{_W}styleId")
+            name = elem.find(f"{_W}name")
+            name = name.get(f"{_W}val", "") if name is not None else ""
+            match = _HEADING_NAME.match(name)
+            outline = elem.find(f"{_W}pPr/{_W}outlineLvl")
+            if match:
+                levels[style_id] = int(match.group(1))
+            elif name.lower() == "title":
+                levels[style_id] = 1
+            elif outline is not None and outline.get(f"{_W}val", "").isdigit():
+                levels[style_id] = int(outline.get(f"{_W}val")) + 1
+            elem.clear()
+    return levels
+
+
+def _word_text(elem: ET.Element) -> str:
+    """段落（またはセル）内のテキストを、タブ・改行を保ったまま連結する。"""
+    parts: List[str] = []
+    for node in elem.iter():
+        tag = node.tag
+        if tag == f"{_W}t":
+            parts.append(node.text or "")
+        elif tag == f"{_W}tab":
+            parts.append("\t")
+        elif tag in (f"{_W}br", f"{_W}cr"):
+            parts.append("\n")
+    return "".join(parts)
+
+
+def _word_paragraph(elem: ET.Element, heading_levels: Dict[str, int]) -> str:
+    """段落を Markdown の1行（見出し・箇条書きは記号付き）にする。"""
+    text = _word_text(elem)
+    if not text.strip():
+        return ""
+
+    props = elem.find(f"{_W}pPr")
+    if props is None:
+        return text
+    style = props.find(f"{_W}pStyle")
+    level = heading_levels.get(style.get(f"{_W}val")) if style is not None else None
+    outline = props.find(f"{_W}outlineLvl")
+    if level is None and outline is not None and outline.get(f"{_W}val", "").isdigit():
+        level = int(outline.get(f"{_W}val")) + 1
+    if level and level <= 6:
+        return "#" * level + " " + text.strip()
+    if props.find(f"{_W}numPr") is not None:
+        return "- " + text.strip()
+    return text
+
+
+def _word_table(elem: ET.Element) -> List[List[str]]:
+    """表を行ごとのセル文字列に変換する（入れ子の表はセル内のテキストとして扱う）。"""
+    rows: List[List[str]] = []
+    for row in elem.iterfind(f"{_W}tr"):
+        cells: List[str] = []
+        for cell in row.iterfind(f"{_W}tc"):
+            paragraphs = [_word_text(p).strip() for p in cell.iter(f"{_W}p")]
+            cells.append("\n".join(p for p in paragraphs if p))
+            # 横方向に結合されたセルは列がずれないよう空セルで埋める
+            span = cell.find(f"{_W}tcPr/{_W}gridSpan")
+            if span is not None and span.get(f"{_W}val", "").isdigit():
+                cells.extend([""] * (int(span.get(f"{_W}val")) - 1))
+        rows.append(cells)
+    return rows
+
+
+# 本文の後に続けて取り出す補助パート（脚注・文末脚注）のリレーションシップ種別
+_NOTE_REL_TYPES = ("/footnotes", "/endnotes")
+# 段落・表を直下に持つ要素（処理済みの子要素をここから外してメモリを解放する）
+_WORD_CONTAINERS = (f"{_W}body", f"{_W}footnote", f"{_W}endnote")
+
+
+def _note_parts(zf: zipfile.ZipFile) -> List[str]:
+    """document.xml.rels から脚注・文末脚注のパート名を返す。"""
+    try:
+        source = zf.open("word/_rels/document.xml.rels")
+    except KeyError:
+        return []
+
+    parts: List[str] = []
+    with source:
+        for rel in ET.parse(source).getroot().iter(f"{_PKG_REL}Relationship"):
+            target = rel.get("Target")
+            if target and rel.get("Type", "").endswith(_NOTE_REL_TYPES):
+                # Target は word/ からの相対パス（"/word/..." の絶対パスの場合もある）
+                if target.startswith("/"):
+                    parts.append(target.lstrip("/"))
+                else:
+                    parts.append(posixpath.normpath(posixpath.join("word", target)))
+    return [part for part in parts if part in zf.NameToInfo]
+
+
+def _skipped(elem: ET.Element) -> bool:
+    """読み飛ばす要素（mc:Fallback と、区切り線などの w:type 付き脚注）か判定する。"""
+    if elem.tag == f"{_MC}Fallback":
+        return True
+    return elem.tag in (f"{_W}footnote", f"{_W}endnote") and elem.get(f"{_W}type", "normal") != "normal"
+
+
+def _iter_word_part(zf: zipfile.ZipFile, part: str, heading_levels: Dict[str, int]) -> Iterator[Block]:
+    """Word の XML パート1つから段落と表を出現順に取り出す。"""
+    with zf.open(part) as source:
+        container: Optional[ET.Element] = None
+        table_depth = 0
+        # 互換用の代替表現（mc:Fallback）内のテキストボックスは本体と重複するため読み飛ばす
+        skip_depth = 0
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if _skipped(elem):
+                    skip_depth += 1
+                elif skip_depth:
+                    # 読み飛ばす範囲の中では、終了イベントと対にならないため表の深さを数えない
+                    continue
+                elif tag in _WORD_CONTAINERS:
+                    container = elem
+                elif tag == f"{_W}tbl":
+                    table_depth += 1
+                continue
+
+            if _skipped(elem):
+                skip_depth -= 1
+                elem.clear()
+                continue
+            if skip_depth:
+                continue
+            if tag == f"{_W}tbl":
+                table_depth -= 1
+                if table_depth == 0:
+                    yield BLOCK_TABLE, _word_table(elem)
+            elif tag == f"{_W}p" and table_depth == 0:
+                yield BLOCK_PARAGRAPH, _word_paragraph(elem, heading_levels)
+            else:
+                continue
+
+            # 処理済みの要素は破棄する（表内の段落は表の終わりでまとめて処理する）
+            if container is not None and table_depth == 0:
+                elem.clear()
+                if len(container) and container[-1] is elem:
+                    container.remove(elem)
+
+
+def _word_part_blocks(zf: zipfile.ZipFile, part: str, heading_levels: Dict[str, int]) -> List[Block]:
+    """Word の XML パート1つ分のブロックをリストにまとめる（スレッドで解析する補助パート用）。"""
+    return list(_iter_word_part(zf, part, heading_levels))
+
+
+def iter_docx_blocks(path: str, max_workers: int = PART_WORKERS) -> Iterator[Block]:
+    """Word 文書（.docx）の本文と脚注を先頭から順にブロックとして返す。
+
+    脚注・文末脚注は本文とは別のパートのため、本文を逐次読み進める間に
+    max_workers 個までのスレッドで並行して解析し、本文の後に続けて返す。
+
+    Args:
+        path: .docx ファイルのパス
+        max_workers: 補助パートを並列に解析するスレッド数（1で逐次処理）
+
+    Yields:
+        ("paragraph", Markdown の段落文字列) または ("table", 行ごとのセル文字列のリスト)。
+        空の段落は "" として返す（空白行処理は呼び出し側で行う）
+
+    Raises:
+        zipfile.BadZipFile / KeyError / xml.etree.ElementTree.ParseError: OOXML として読めない場合
+    """
+    with zipfile.ZipFile(path) as zf:
+        heading_levels = _heading_levels(zf)
+        notes = _note_parts(zf)
+        if max_workers <= 1 or not notes:
+            yield from _iter_word_part(zf, "word/document.xml", heading_levels)
+            for part in notes:
+                yield from _iter_word_part(zf, part, heading_levels)
+            return
+
+        # ZipFile は読み取りであれば複数スレッドから同時に利用できる
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(notes)),
+                                thread_name_prefix="docx-part") as executor:
+            futures = [executor.submit(_word_part_blocks, zf, part, heading_levels) for part in notes]
+            yield from _iter_word_part(zf, "word/document.xml", heading_levels)
+            for future in futures:
+                yield from future.result()
+
+
+# ========================================
+# PowerPoint
+# ========================================
+
+def _slide_parts(zf: zipfile.ZipFile) -> List[str]:
+    """presentation.xml に記載された表示順でスライドのパート名を返す。"""
+    with zf.open("ppt/_rels/presentation.xml.rels") as source:
+        targets = {
+            rel.get("Id"): rel.get("Target")
+            for rel in ET.parse(source).getroot().iter(f"{_PKG_REL}Relationship")
+        }
+
+    parts: List[str] = []
+    with zf.open("ppt/presentation.xml") as source:
+        for _, elem in ET.iterparse(source):
+            if elem.tag == f"{_P}sldId":
+                target = targets.get(elem.get(f"{_R}id"))
+                if target:
+                    # Target は ppt/ からの相対パス（"/ppt/..." の絶対パスの場合もある）
+                    if target.startswith("/"):
+                        parts.append(target.lstrip("/"))
+                    else:
+                        parts.append(posixpath.normpath(posixpath.join("ppt", target)))
+            elif elem.tag == f"{_P}sldIdLst":
+                break
+    return parts
+
+
+def _drawing_text(elem: ET.Element) -> str:
+    """テキストボックス内の段落を改行区切りで連結する（python-pptx の shape.text と同じ形式）。"""
+    paragraphs: List[str] = []
+    for paragraph in elem.iter(f"{_A}p"):
+        parts: List[str] = []
+        for node in paragraph.iter():
+            if node.tag == f"{_A}t":
+                parts.append(node.text or "")
+            elif node.tag == f"{_A}br":
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+def _slide_blocks(zf: zipfile.ZipFile, part: str) -> List[Block]:
+    """1スライド分の図形テキストと表を出現順に取り出す。"""
+    blocks: List[Block] = []
+    with zf.open(part) as source:
+        for _, elem in ET.iterparse(source):
+            if elem.tag == f"{_P}sp":
+                body = elem.find(f"{_P}txBody")
+                if body is not None:
+                    text = _drawing_text(body)
+                    if text.strip():
+                        blocks.append((BLOCK_PARAGRAPH, text))
+                elem.clear()
+            elif elem.tag == f"{_A}tbl":
+                rows = [
+                    [_drawing_text(cell).strip() for cell in row.iterfind(f"{_A}tc")]
+                    for row in elem.iterfind(f"{_A}tr")
+                ]
+                if rows:
+                    blocks.append((BLOCK_TABLE, rows))
+                elem.clear()
+    return blocks
+
+
+def iter_pptx_slides(path: str, max_workers: int = PART_WORKERS) -> Iterator[Tuple[int, List[Block]]]:
+    """PowerPoint（.pptx）のスライドを表示順に返す。
+
+    スライドのパートは max_workers 個のスレッドで先読みしながら解析するが、
+    結果は表示順に返し、先読みする件数も max_workers 件までに抑える。
+
+    Args:
+        path: .pptx ファイルのパス
+        max_workers: スライドを並列に解析するスレッド数（1で逐次処理）
+
+    Yields:
+        (スライド番号（1始まり）, ブロックのリスト)
+
+    Raises:
+        zipfile.BadZipFile / KeyError / xml.etree.ElementTree.ParseError: OOXML として読めない場合
+    """
+    with zipfile.ZipFile(path) as zf:
+        parts = _slide_parts(zf)
+        if max_workers <= 1 or len(parts) <= 1:
+            for number, part in enumerate(parts, 1):
+                yield number, _slide_blocks(zf, part)
+            return
+
+        # ZipFile は読み取りであれば複数スレッドから同時に利用できる
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pptx-slide") as executor:
+            pending: Deque = deque()
+            remaining = iter(enumerate(parts, 1))
+            for number, part in remaining:
+                pending.append((number, executor.submit(_slide_blocks, zf, part)))
+                if len(pending) >= max_workers:
+                    break
+            while pending:
+                number, future = pending.popleft()
+                blocks = future.result()
+                next_part = next(remaining, None)
+                if next_part is not None:
+                    pending.append((next_part[0], executor.submit(_slide_blocks, zf, next_part[1])))
+                yield number, blocks
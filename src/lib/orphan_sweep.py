@@ -0,0 +1,300 @@
+"""削除・移動ファイル検出（マーク＆スイープ）
+
+ファイル探索の結果をそのまま流しながら、FileTracker に記録済みのファイルを
+「今回見つかった」とマークし、探索完了時にマークされなかったものを削除済み
+として返します。追跡ファイルごとの os.path.exists 呼び出しや、全ファイルの
+集合を作り直す追加の走査が不要になります。
+
+消えたファイルと新しく現れたファイルのコンテンツハッシュが一致する場合は
+移動（名前変更）とみなし、Difyドキュメントを再登録せずに引き継ぎます。
+
+追跡中のファイルは実行中ずっと保持するため、トラッカーのエントリ（辞書）ではなく
+FileRecord（__slots__、フォルダ部分を intern）に変換して保持します。
+"""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .records import DocumentInfo, DocumentMetadata, FileRecord
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_path(path: str) -> str:
+    """FileTracker と同じ規則（normpath + lower）でパスを正規化する。"""
+    return os.path.normpath(path).lower()
+
+
+def _entry_field(entry: Any, *names: str) -> Any:
+    """トラッカーのエントリ（辞書またはオブジェクト）から最初に見つかった値を返す。"""
+    if entry is None:
+        return None
+    for name in names:
+        value = entry.get(name) if isinstance(entry, Mapping) else getattr(entry, name, None)
+        if value:
+            return value
+    return None
+
+
+def document_id_of(entry: Any) -> Optional[str]:
+    """トラッカーのエントリからDifyドキュメントIDを取り出す。"""
+    return _entry_field(entry, "dify_document_id", "document_id")
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """ファイル内容の SHA-256 を返す（FileTracker の content_hash と同じ形式）。"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass(slots=True)
+class Rename:
+    """検出したファイルの移動（名前変更）。
+
+    Attributes:
+        old_key: 移動前のトラッカー上のキー
+        new_path: 移動後のファイルパス
+        document_id: 引き継ぐDifyドキュメントID
+        title: 移動前に記録されていたドキュメントタイトル（不明な場合はNone）
+    """
+    old_key: str
+    new_path: str
+    document_id: str
+    title: Optional[str] = None
+
+    @property
+    def new_name(self) -> Optional[str]:
+        """変更後のドキュメント名。変更不要な場合はNone。
+
+        本文から抽出したタイトルが記録されていれば内容が同一なので名前は変わらない。
+        ファイル名由来の名前だった場合のみ、新しいファイル名に変更する。
+        """
+        if self.title:
+            return None
+        old_stem, new_stem = Path(self.old_key).stem, Path(self.new_path).stem
+        if old_stem.lower() == new_stem.lower():
+            return None
+        return new_stem
+
+
+class DiscoverySweep:
+    """探索結果に対するマーク＆スイープ。
+
+    使用例:
+        sweep = DiscoverySweep(file_tracker.get_all_metadata())
+        all_files = list(sweep.watch(discover_files(folder, exts)))
+        deleted = sweep.sweep()
+    """
+
+    def __init__(self, tracked: Mapping[str, Any]):
+        """追跡中のファイルを未マーク状態で登録する。
+
+        エントリは FileRecord に変換して保持し、tracked 自体への参照は残さない。
+
+        Args:
+            tracked: FileTracker.get_all_metadata() の結果（パス → エントリ）
+        """
+        # 正規化パス → レコード（レコードの file_path がトラッカー上のキー）
+        self._records: Dict[str, FileRecord] = {
+            normalize_path(key): FileRecord.from_entry(key, entry) for key, entry in tracked.items()
+        }
+        self._unmarked = set(self._records)
+        self._renamed: set = set()
+
+    def mark(self, path: str) -> None:
+        """ファイルが存在することを記録する。"""
+        if self._unmarked:
+            self._unmarked.discard(normalize_path(path))
+
+    def watch(self, paths: Iterable[str]) -> Iterator[str]:
+        """探索結果をそのまま返しながらマークする。
+
+        Args:
+            paths: discover_files の結果
+
+        Yields:
+            入力と同じファイルパス
+        """
+        for path in paths:
+            self.mark(path)
+            yield path
+
+    def is_tracked(self, path: str) -> bool:
+        """ファイルが前回までに追跡されていたかどうかを返す。"""
+        return normalize_path(path) in self._records
+
+    def sweep(self) -> List[str]:
+        """マークされなかった（＝削除または移動された）ファイルのトラッカー上のキーを返す。"""
+        return [self._records[norm].file_path for norm in self._unmarked]
+
+    def detect_renames(self, new_files: Iterable[str]) -> List[Rename]:
+        """消えたファイルと新しいファイルをコンテンツハッシュで照合し、移動を検出する。
+
+        ハッシュ計算はサイズが一致する新しいファイルに限定する。
+        検出した移動元は deleted_documents() の対象から除外される。
+
+        Args:
+            new_files: 今回新たに現れたファイル（追跡されていないファイル）
+
+        Returns:
+            検出した移動のリスト
+        """
+        candidates: Dict[Tuple[int, str], List[str]] = {}
+        sizes = set()
+        for norm in self._unmarked:
+            record = self._records[norm]
+            if record.content_hash and record.dify_document_id and record.file_size:
+                candidates.setdefault((record.file_size, record.content_hash), []).append(norm)
+                sizes.add(record.file_size)
+        if not candidates:
+            return []
+
+        renames: List[Rename] = []
+        for path in new_files:
+            try:
+                size = os.path.getsize(path)
+                if size not in sizes:
+                    continue
+                olds = candidates.get((size, file_sha256(path)))
+            except OSError:
+                continue
+            if not olds:
+                continue
+            norm = olds.pop()
+            record = self._records[norm]
+            self._renamed.add(norm)
+            renames.append(Rename(record.file_path, path, record.dify_document_id, record.title))
+        return renames
+
+    def cancel_rename(self, rename: Rename) -> None:
+        """移動の引き継ぎに失敗した場合に、移動元を削除扱いに戻す。"""
+        self._renamed.discard(normalize_path(rename.old_key))
+
+    def deleted_documents(self) -> List[Tuple[str, str]]:
+        """削除されたファイル（移動を除く）のうち、Difyドキュメントが紐付いているものを返す。
+
+        Returns:
+            (トラッカー上のキー, ドキュメントID) のリスト
+        """
+        result = []
+        for norm in self._unmarked - self._renamed:
+            record = self._records[norm]
+            if record.dify_document_id:
+                result.append((record.file_path, record.dify_document_id))
+        return result
+
+
+def metadata_operation(document_id: str, path: str, info: Optional[DocumentInfo],
+                       field_ids: Mapping[str, str], title: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """ドキュメント1件分のメタデータ更新操作（update_documents_metadata の要素）を作る。
+
+    送信時と同じ source_path / extracted_title に、文書情報の項目を加える。
+    データセットに定義されていない項目・値の無い項目は含めない。
+
+    Args:
+        document_id: DifyドキュメントID
+        path: 元ファイルのパス（source_path として送信する）
+        info: 保存済みの文書情報（無い場合はNone）
+        field_ids: 項目名 → メタデータ項目ID（list_metadata_fields の結果）
+        title: info が無い場合に使うタイトル
+
+    Returns:
+        {"document_id", "metadata_list"} の辞書（送信する項目が無い場合はNone）
+    """
+    fields = DocumentMetadata(path, info.title if info is not None else title).as_dict()
+    if info is not None:
+        fields.update(info.metadata_fields())
+    metadata_list = [{"id": field_ids[name], "name": name, "value": value}
+                     for name, value in fields.items() if name in field_ids and value is not None]
+    if not metadata_list:
+        return None
+    return {"document_id": document_id, "metadata_list": metadata_list}
+
+
+def update_renamed_metadata(api: Any, dataset_id: str, renames: List[Rename],
+                            info_of: Callable[[str], Optional[DocumentInfo]],
+                            batch_size: int = 100) -> Tuple[int, Dict[str, str]]:
+    """移動したドキュメントのメタデータ（source_path 等）を移動後のパスに更新する。
+
+    ドキュメント名の変更だけではメタデータの source_path が移動前のパスのまま残るため、
+    本文を再送信せずにメタデータのみをまとめて更新する。
+
+    Args:
+        api: DifyDocumentApi（list_metadata_fields / update_documents_metadata を使用）
+        dataset_id: 対象データセットID
+        renames: 引き継ぎに成功した移動のリスト
+        info_of: 移動後のパス → 保存済みの文書情報
+        batch_size: 1リクエストでまとめて更新するドキュメント数
+
+    Returns:
+        (更新したドキュメント数, 失敗したドキュメントID → エラーメッセージ)
+
+    Raises:
+        Exception: メタデータ項目の取得に失敗した場合（API エラー）
+    """
+    if not renames:
+        return 0, {}
+    field_ids = api.list_metadata_fields(dataset_id)
+    operations = [operation for operation in (
+        metadata_operation(rename.document_id, rename.new_path, info_of(rename.new_path), field_ids, rename.title)
+        for rename in renames) if operation is not None]
+
+    updated = 0
+    failed: Dict[str, str] = {}
+    for start in range(0, len(operations), batch_size):
+        batch = operations[start:start + batch_size]
+        try:
+            api.update_documents_metadata(dataset_id, batch)
+            updated += len(batch)
+        except Exception as e:
+            for operation in batch:
+                failed[operation["document_id"]] = f"{type(e).__name__}: {e}"
+            logger.warning(f"移動したドキュメントのメタデータ更新に失敗: {len(batch)}件: {e}")
+    return updated, failed
+
+
+def delete_documents_bulk(api: Any, dataset_id: str, document_ids: List[str],
+                          max_workers: int = 8, batch_size: int = 200) -> Tuple[List[str], Dict[str, str]]:
+    """Difyドキュメントをバッチ単位で並列にまとめて削除する。
+
+    Args:
+        api: DifyDocumentApi（delete_document(dataset_id, document_id) を使用）
+        dataset_id: 対象データセットID
+        document_ids: 削除するドキュメントIDのリスト
+        max_workers: 同時リクエスト数
+        batch_size: 1バッチあたりの件数（バッチごとに進捗をログ出力する）
+
+    Returns:
+        (削除に成功したID, 失敗したID → エラーメッセージ)
+    """
+    deleted: List[str] = []
+    failed: Dict[str, str] = {}
+    if not document_ids:
+        return deleted, failed
+
+    def delete(document_id: str) -> Tuple[str, Optional[str]]:
+        try:
+            api.delete_document(dataset_id, document_id)
+            return document_id, None
+        except Exception as e:
+            return document_id, f"{type(e).__name__}: {e}"
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for start in range(0, len(document_ids), batch_size):
+            batch = document_ids[start:start + batch_size]
+            for document_id, error in executor.map(delete, batch):
+                if error is None:
+                    deleted.append(document_id)
+                else:
+                    failed[document_id] = error
+                    logger.warning(f"Difyドキュメントの削除に失敗: {document_id}: {error}")
+            logger.info(f"Difyドキュメント削除: {start + len(batch)}/{len(document_ids)}")
+    return deleted, failed
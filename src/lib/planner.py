@@ -0,0 +1,190 @@
+"""実行計画（ドライラン）
+
+ファイル探索と変更検知のみを行い、実際の変換・送信・削除を行わずに
+アクションごとのファイル数・合計サイズ・工程ごとの所要時間の見積もりを作成します。
+所要時間は過去の実行で学習したコストモデル（変換・送信・削除の実測値）から見積もります。
+"""
+
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List
+
+# アクション
+ACTION_CONVERT = "convert"
+ACTION_UPLOAD = "upload"
+ACTION_UPDATE = "update"
+ACTION_RENAME = "rename"
+ACTION_DELETE = "delete"
+ACTION_SKIP = "skip"
+
+
+@dataclass
+class JobPlan:
+    """1ジョブ分の実行計画。
+
+    Attributes:
+        name: ジョブ名
+        total_files: 探索で見つかったファイル数
+        actions: アクション → ファイル数（convert / upload / update / rename / delete / skip）
+        forget: トラッカーから削除のみ行うファイル数（Difyドキュメントは削除しない）
+        convert_bytes: 変換対象ファイルの合計サイズ
+        stage_seconds: 工程 → 見積もり秒数の合計（1ワーカー換算）
+        max_convert_seconds: 最も重いファイル1件の見積もり変換秒数
+        by_extension: 拡張子 → {"files", "bytes", "convert_seconds"}
+    """
+    name: str
+    total_files: int = 0
+    actions: Dict[str, int] = field(default_factory=dict)
+    forget: int = 0
+    convert_bytes: int = 0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    max_convert_seconds: float = 0.0
+    by_extension: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """辞書形式で返す。"""
+        return asdict(self)
+
+
+def plan_job(name: str, all_files: List[str], files_to_process: List[str],
+             is_tracked: Callable[[str], bool], renames: int, deleted_files: int,
+             deleted_documents: int, delete_remote: bool, cost_model) -> JobPlan:
+    """1ジョブ分の実行計画を作成する。
+
+    Args:
+        name: ジョブ名
+        all_files: 探索で見つかったファイル
+        files_to_process: 変更検知で処理対象となったファイル（移動として引き継ぐものを除く）
+        is_tracked: 前回までに追跡していたファイルかどうかを返す関数
+        renames: 移動として引き継ぐファイル数
+        deleted_files: 削除されたファイル数（移動を含む）
+        deleted_documents: 削除されたファイルのうちDifyドキュメントが紐付くもの（移動を除く）
+        delete_remote: Difyドキュメントも削除する設定の場合True
+        cost_model: CostModel
+
+    Returns:
+        JobPlan
+    """
+    plan = JobPlan(name=name, total_files=len(all_files))
+    uploads = sum(1 for path in files_to_process if not is_tracked(path))
+    delete = deleted_documents if delete_remote else 0
+    plan.actions = {
+        ACTION_CONVERT: len(files_to_process),
+        ACTION_UPLOAD: uploads,
+        ACTION_UPDATE: len(files_to_process) - uploads,
+        ACTION_RENAME: renames,
+        ACTION_DELETE: delete,
+        ACTION_SKIP: len(all_files) - len(files_to_process) - renames,
+    }
+    plan.forget = deleted_files - renames - delete
+
+    convert_seconds = upload_seconds = 0.0
+    for path in files_to_process:
+        size = cost_model.file_size(path)
+        seconds = cost_model.estimate(path)
+        convert_seconds += seconds
+        upload_seconds += cost_model.estimate_upload(path)
+        plan.convert_bytes += size
+        plan.max_convert_seconds = max(plan.max_convert_seconds, seconds)
+
+        ext = os.path.splitext(path)[1].lower() or "(none)"
+        stats = plan.by_extension.setdefault(ext, {"files": 0, "bytes": 0, "convert_seconds": 0.0})
+        stats["files"] += 1
+        stats["bytes"] += size
+        stats["convert_seconds"] += seconds
+
+    plan.stage_seconds = {
+        ACTION_CONVERT: convert_seconds,
+        ACTION_UPLOAD: upload_seconds,
+        ACTION_RENAME: renames * cost_model.delete_seconds,
+        ACTION_DELETE: delete * cost_model.delete_seconds,
+    }
+    return plan
+
+
+def summarize_plans(plans: Iterable[JobPlan], workers: int) -> Dict[str, Any]:
+    """ジョブごとの計画を集計し、実行時間を見積もる。
+
+    変換は workers 並列で行われ、送信は変換と並行して1件ずつ行われるため、
+    変換・送信のうち長い方に削除・名前変更の時間を加えたものを全体の見積もりとする。
+
+    Args:
+        plans: ジョブごとの計画
+        workers: 変換ワーカー数
+
+    Returns:
+        アクションごとの件数・合計サイズ・工程ごとの見積もり秒数・全体の見積もり秒数の辞書
+    """
+    plans = list(plans)
+    actions: Dict[str, int] = {}
+    stages: Dict[str, float] = {}
+    by_extension: Dict[str, Dict[str, float]] = {}
+    for plan in plans:
+        for action, count in plan.actions.items():
+            actions[action] = actions.get(action, 0) + count
+        for stage, seconds in plan.stage_seconds.items():
+            stages[stage] = stages.get(stage, 0.0) + seconds
+        for ext, stats in plan.by_extension.items():
+            total = by_extension.setdefault(ext, {"files": 0, "bytes": 0, "convert_seconds": 0.0})
+            for key, value in stats.items():
+                total[key] += value
+
+    workers = max(1, workers)
+    convert_wall = max(stages.get(ACTION_CONVERT, 0.0) / workers,
+                       max((plan.max_convert_seconds for plan in plans), default=0.0))
+    upload_wall = stages.get(ACTION_UPLOAD, 0.0)
+    estimated = max(convert_wall, upload_wall) + stages.get(ACTION_RENAME, 0.0) + stages.get(ACTION_DELETE, 0.0)
+    return {
+        "workers": workers,
+        "actions": actions,
+        "forget": sum(plan.forget for plan in plans),
+        "total_files": sum(plan.total_files for plan in plans),
+        "convert_bytes": sum(plan.convert_bytes for plan in plans),
+        "stage_seconds": {stage: round(seconds, 1) for stage, seconds in stages.items()},
+        "convert_wall_seconds": round(convert_wall, 1),
+        "estimated_seconds": round(estimated, 1),
+        "by_extension": by_extension,
+        "jobs": [plan.as_dict() for plan in plans],
+    }
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+def _size(num_bytes: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TiB"
+
+
+def format_plan(summary: Dict[str, Any]) -> str:
+    """summarize_plans の結果を人が読める表形式の文字列にする。"""
+    actions = summary["actions"]
+    stages = summary["stage_seconds"]
+    lines = [f"Plan for {len(summary['jobs'])} job(s), {summary['total_files']} files discovered", ""]
+    lines.append(f"{'action':<10}{'files':>10}")
+    for action in (ACTION_CONVERT, ACTION_UPLOAD, ACTION_UPDATE, ACTION_RENAME, ACTION_DELETE, ACTION_SKIP):
+        lines.append(f"{action:<10}{actions.get(action, 0):>10}")
+    if summary["forget"]:
+        lines.append(f"{'forget':<10}{summary['forget']:>10}  (tracker only, Dify documents kept)")
+    lines.append("")
+    lines.append(f"bytes to convert: {_size(summary['convert_bytes'])}")
+    lines.append("")
+    lines.append(f"{'extension':<10}{'files':>10}{'bytes':>14}{'convert':>12}")
+    for ext, stats in sorted(summary["by_extension"].items(), key=lambda item: -item[1]["convert_seconds"]):
+        lines.append(f"{ext:<10}{int(stats['files']):>10}{_size(stats['bytes']):>14}"
+                     f"{_duration(stats['convert_seconds']):>12}")
+    lines.append("")
+    lines.append(f"{'stage':<10}{'estimate':>12}")
+    lines.append(f"{'convert':<10}{_duration(summary['convert_wall_seconds']):>12}"
+                 f"  ({summary['workers']} workers, {_duration(stages.get(ACTION_CONVERT, 0.0))} total CPU)")
+    for stage in (ACTION_UPLOAD, ACTION_RENAME, ACTION_DELETE):
+        lines.append(f"{stage:<10}{_duration(stages.get(stage, 0.0)):>12}")
+    lines.append(f"{'total':<10}{_duration(summary['estimated_seconds']):>12}  (conversion and upload overlap)")
+    return "\n".join(lines)
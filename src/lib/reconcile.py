@@ -0,0 +1,100 @@
+"""トラッカーと Dify データセットの照合（--reconcile）
+
+FileTracker に記録した DifyドキュメントID が実際にデータセットに存在するかを確認します。
+データセットのドキュメント一覧をまとめて取得し（DifyDocumentApi.list_all_documents）、
+メモリ上で ID → ドキュメント・名前 → ドキュメントの辞書を作ってトラッカーと突き合わせます。
+
+- missing: 記録したIDも同じ名前のドキュメントも無いファイル（再送信する）
+- relinked: 記録したIDは無いが、同じ名前のドキュメントが1件だけあるファイル（IDを付け替える）
+- strays: どのファイルからも参照されず、どのファイルとも名前が一致しないドキュメント（削除候補）
+
+データセットの復元や手動削除の後でも、全ファイルを --force で再送信せずに差分だけを修復できます。
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Set, Tuple
+
+from .orphan_sweep import document_id_of
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReconcilePlan:
+    """1ジョブ分の照合結果。
+
+    Attributes:
+        missing: 再送信するファイルのトラッカー上のキー
+        relinked: (トラッカー上のキー, 付け替え先のDifyドキュメントID)
+        referenced: このジョブのファイルが参照するDifyドキュメントID（付け替え後）
+    """
+    missing: List[str] = field(default_factory=list)
+    relinked: List[Tuple[str, str]] = field(default_factory=list)
+    referenced: Set[str] = field(default_factory=set)
+
+
+def index_documents(documents: Iterable[Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, List[str]]]:
+    """ドキュメント一覧から ID → ドキュメント・名前 → IDのリスト の辞書を作る。"""
+    by_id: Dict[str, Dict[str, Any]] = {}
+    by_name: Dict[str, List[str]] = {}
+    for document in documents:
+        document_id = document.get("id")
+        if not document_id:
+            continue
+        by_id[document_id] = document
+        by_name.setdefault(document.get("name") or "", []).append(document_id)
+    return by_id, by_name
+
+
+def referenced_ids(tracked: Mapping[str, Any], by_id: Mapping[str, Dict[str, Any]]) -> Set[str]:
+    """トラッカーに記録されたIDのうち、データセットに存在するものを返す。"""
+    return {document_id for document_id in map(document_id_of, tracked.values())
+            if document_id and document_id in by_id}
+
+
+def plan_reconcile(tracked: Mapping[str, Any], by_id: Mapping[str, Dict[str, Any]],
+                   by_name: Mapping[str, List[str]], title_of: Callable[[str], str],
+                   claimed: Set[str]) -> ReconcilePlan:
+    """トラッカーのエントリとデータセットのドキュメントを突き合わせる。
+
+    Args:
+        tracked: FileTracker.get_all_metadata() の結果（パス → エントリ）
+        by_id: ID → ドキュメント（index_documents の結果）
+        by_name: 名前 → IDのリスト（index_documents の結果）
+        title_of: トラッカー上のキー → 送信時のドキュメント名
+        claimed: 同じデータセットを対象とする全ジョブの referenced_ids の和集合。
+            付け替え先には使わず、付け替えたIDを追加する
+
+    Returns:
+        ReconcilePlan
+    """
+    plan = ReconcilePlan()
+    for key, entry in tracked.items():
+        document_id = document_id_of(entry)
+        if not document_id:
+            continue
+        if document_id in by_id:
+            plan.referenced.add(document_id)
+            continue
+        candidates = [candidate for candidate in by_name.get(title_of(key), []) if candidate not in claimed]
+        if len(candidates) == 1:
+            plan.relinked.append((key, candidates[0]))
+            plan.referenced.add(candidates[0])
+            claimed.add(candidates[0])
+        else:
+            plan.missing.append(key)
+    return plan
+
+
+def find_strays(by_id: Mapping[str, Dict[str, Any]], referenced: Set[str], names: Set[str]) -> List[str]:
+    """どのファイルからも参照されていないドキュメントのIDを返す。
+
+    Args:
+        by_id: ID → ドキュメント（index_documents の結果）
+        referenced: ファイルから参照されているドキュメントID
+        names: ファイルに対応するドキュメント名。送信に失敗したファイル等が作成した可能性があるため、
+            名前が一致するドキュメントは参照されていなくても除外する
+    """
+    return [document_id for document_id, document in by_id.items()
+            if document_id not in referenced and (document.get("name") or "") not in names]
@@ -0,0 +1,234 @@
+"""ファイル単位のレコード定義
+
+パイプライン内で受け渡す追跡ファイルのメタデータ・作業項目・文書情報・変換結果・
+Dify送信用メタデータを __slots__ 付きデータクラスとして定義します。
+追跡ファイルのレコード（FileRecord）は数十万件を実行中ずっと保持するため、
+辞書より小さなメモリで保持し、フォルダ部分は sys.intern で共有します
+（scripts/measure_record_memory.py で比較できます）。
+"""
+
+import os
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Tuple
+
+# 文書情報に保持する見出しの最大数（インデックスファイルのサイズを抑えるため）
+MAX_OUTLINE_HEADINGS = 100
+
+
+def split_interned(path: str) -> Tuple[str, str]:
+    """パスをフォルダ部分とファイル名に分割し、フォルダ部分を intern する。
+
+    同じフォルダに属する多数のレコードが、フォルダ文字列を1つだけ共有する。
+
+    Args:
+        path: ファイルパス
+
+    Returns:
+        (intern されたフォルダパス, ファイル名)
+    """
+    folder, name = os.path.split(path)
+    return sys.intern(folder), name
+
+
+def _to_timestamp(value: Any) -> float:
+    """datetime / ISO 8601 文字列 / 数値を UNIX タイムスタンプに変換する（不正な値は 0）。"""
+    try:
+        if isinstance(value, datetime):
+            return value.timestamp()
+        if isinstance(value, str):
+            return datetime.fromisoformat(value).timestamp()
+        return float(value or 0)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return 0.0
+
+
+@dataclass(slots=True)
+class FileRecord:
+    """追跡中ファイル1件分のメタデータ（FileTracker のエントリのコンパクト表現）。
+
+    Attributes:
+        folder: フォルダパス（intern 済み）
+        name: ファイル名
+        file_size: 最終処理時のファイルサイズ
+        last_modified: 最終処理時の更新日時（UNIX タイムスタンプ）
+        content_hash: 最終処理時のコンテンツハッシュ
+        processing_status: 最終処理結果（success, error, skipped。intern 済み）
+        dify_document_id: 対応するDifyドキュメントID
+        last_processed: 最終処理日時（UNIX タイムスタンプ）
+        title: 本文から抽出したタイトル（記録されていない場合はNone）
+    """
+    folder: str
+    name: str
+    file_size: int = 0
+    last_modified: float = 0.0
+    content_hash: str = ""
+    processing_status: str = ""
+    dify_document_id: Optional[str] = None
+    last_processed: float = 0.0
+    title: Optional[str] = None
+
+    @property
+    def file_path(self) -> str:
+        """ファイルの完全パス（作成時に渡したパスと同じ文字列）。"""
+        return os.path.join(self.folder, self.name)
+
+    @classmethod
+    def from_path(cls, path: str, **fields: Any) -> "FileRecord":
+        """ファイルパスからレコードを作成する（フォルダ部分は intern する）。"""
+        folder, name = split_interned(path)
+        return cls(folder, name, **fields)
+
+    @classmethod
+    def from_entry(cls, path: str, entry: Any) -> "FileRecord":
+        """FileTracker.get_all_metadata() のエントリ（辞書またはオブジェクト）からレコードを作成する。
+
+        Args:
+            path: トラッカー上のキー
+            entry: エントリ（file_size / content_hash / dify_document_id 等を持つ）
+
+        Returns:
+            FileRecord
+        """
+        if entry is None:
+            return cls.from_path(path)
+        if isinstance(entry, Mapping):
+            get = entry.get
+        else:
+            def get(name: str) -> Any:
+                return getattr(entry, name, None)
+        try:
+            size = int(get("file_size") or 0)
+        except (TypeError, ValueError):
+            size = 0
+        return cls.from_path(
+            path,
+            file_size=size,
+            last_modified=_to_timestamp(get("last_modified")),
+            content_hash=get("content_hash") or "",
+            processing_status=sys.intern(str(get("processing_status") or "")),
+            dify_document_id=get("dify_document_id") or get("document_id") or None,
+            last_processed=_to_timestamp(get("last_processed")),
+            title=get("title") or get("extracted_title") or None,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """FileTracker の JSON エントリ形式の辞書を返す。"""
+        return {
+            "file_path": self.file_path,
+            "last_processed": datetime.fromtimestamp(self.last_processed).isoformat(),
+            "file_size": self.file_size,
+            "last_modified": datetime.fromtimestamp(self.last_modified).isoformat(),
+            "content_hash": self.content_hash,
+            "processing_status": self.processing_status,
+            "dify_document_id": self.dify_document_id,
+        }
+
+
+@dataclass(slots=True)
+class WorkItem:
+    """変換キュー内の作業項目。
+
+    Attributes:
+        cost: 見積もりコスト（大きいものから処理する）
+        path: 変換対象ファイルのパス
+        ext: 小文字の拡張子
+    """
+    cost: float
+    path: str
+    ext: str
+
+
+@dataclass(slots=True)
+class DocumentInfo:
+    """変換時に収集した文書の構造情報。
+
+    変換と同じ走査で収集し、再変換せずにDifyのメタデータを更新できるよう保持する。
+
+    Attributes:
+        title: タイトル（Frontmatter の title、無ければ最初の h1）
+        headings: 見出しのアウトライン [(レベル, テキスト), ...]（先頭 MAX_OUTLINE_HEADINGS 件）
+        page_count: ページ数（PDF）またはスライド数（PowerPoint）
+        sheet_count: シート数（Excel）
+        frontmatter: Markdown の Frontmatter
+    """
+    title: Optional[str] = None
+    headings: List[Tuple[int, str]] = field(default_factory=list)
+    page_count: Optional[int] = None
+    sheet_count: Optional[int] = None
+    frontmatter: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DocumentInfo":
+        """as_dict() 形式の辞書から作成する。"""
+        return cls(
+            title=data.get("title"),
+            headings=[(int(level), text) for level, text in data.get("headings") or []],
+            page_count=data.get("page_count"),
+            sheet_count=data.get("sheet_count"),
+            frontmatter=dict(data.get("frontmatter") or {}),
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON に保存できる辞書形式で返す。"""
+        return {
+            "title": self.title,
+            "headings": [[level, text] for level, text in self.headings],
+            "page_count": self.page_count,
+            "sheet_count": self.sheet_count,
+            "frontmatter": self.frontmatter,
+        }
+
+    def metadata_fields(self) -> Dict[str, Any]:
+        """Difyのドキュメントメタデータとして送信できる項目を返す（値の無い項目は含めない）。
+
+        Frontmatter の項目をそのまま含め、title / headings / page_count / sheet_count で上書きする。
+        """
+        fields: Dict[str, Any] = {key: value for key, value in self.frontmatter.items()
+                                  if isinstance(value, (str, int, float)) and not isinstance(value, bool)}
+        if self.title:
+            fields["title"] = self.title
+        if self.headings:
+            fields["headings"] = " / ".join(text for _, text in self.headings)
+        if self.page_count is not None:
+            fields["page_count"] = self.page_count
+        if self.sheet_count is not None:
+            fields["sheet_count"] = self.sheet_count
+        return fields
+
+
+@dataclass(slots=True)
+class ConversionResult:
+    """1ファイル分の変換結果。
+
+    Attributes:
+        markdown: Markdown 文字列
+        info: 変換時に収集した文書の構造情報
+    """
+    markdown: str
+    info: DocumentInfo = field(default_factory=DocumentInfo)
+
+
+@dataclass(slots=True)
+class DocumentMetadata:
+    """Dify へ送信するドキュメントメタデータ。
+
+    Attributes:
+        source_path: 元ファイルのパス
+        extracted_title: Markdown から抽出したタイトル
+        dataset_id: 対象データセットID（空の場合は送信しない）
+    """
+    source_path: str
+    extracted_title: Optional[str] = None
+    dataset_id: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """DifyClient.push_markdown に渡す辞書形式で返す。"""
+        result: Dict[str, Any] = {}
+        if self.dataset_id:
+            result["dataset_id"] = self.dataset_id
+        result["source_path"] = self.source_path
+        result["extracted_title"] = self.extracted_title
+        return result
@@ -0,0 +1,183 @@
+"""変換スケジューリング用のコストモデル
+
+拡張子ごとの「1ファイルあたりの固定コスト + ファイルサイズ × 1MBあたりのコスト」で変換時間を
+見積もり、大きい（重い）ファイルから先に処理することでバッチ全体の所要時間を短縮します。
+係数は過去の実行でワーカーが計測した変換時間から学習し、JSONファイルに保存します。
+小さなファイルの計測値は固定コストの学習に、大きなファイルの計測値は1MBあたりのコストの
+学習に使います（固定コストを小さなサイズで割って1MBあたりのコストが膨らむのを防ぐため）。
+同様に、Difyへの送信・削除に掛かった時間も記録し、実行計画（--plan）の見積もりに使います。
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 学習データが無い拡張子の初期コスト係数（1MBあたりの秒数）
+DEFAULT_SECONDS_PER_MB: Dict[str, float] = {
+    ".md": 0.05,
+    ".txt": 0.05,
+    ".docx": 0.5,
+    ".doc": 0.5,
+    ".pptx": 0.5,
+    ".ppt": 0.01,
+    ".pdf": 1.5,
+    ".xls": 1.0,
+    ".xlsx": 2.0,
+    ".xlsm": 2.0,
+}
+UNKNOWN_SECONDS_PER_MB = 1.0
+# サイズによらずファイルごとに掛かる固定コストの初期値（秒）
+PER_FILE_OVERHEAD_SECONDS = 0.01
+# これより小さいファイルの計測値は固定コストの学習にのみ使う
+SMALL_FILE_BYTES = 256 * 1024
+# 計測値を反映する重み（指数移動平均）
+LEARNING_RATE = 0.3
+# 学習データが無い場合の1ファイルあたりの送信秒数・1ドキュメントあたりの削除秒数
+DEFAULT_UPLOAD_SECONDS = 1.0
+DEFAULT_DELETE_SECONDS = 0.2
+
+_MB = 1024 * 1024
+
+
+class CostModel:
+    """拡張子ごとの変換コスト係数を保持・学習するクラス。
+
+    Attributes:
+        state_file: コスト係数の保存先（Noneの場合は保存しない）
+        seconds_per_mb: 拡張子 → 1MBあたりの変換秒数
+        per_file_seconds: 拡張子 → サイズによらない1ファイルあたりの変換秒数
+        upload_seconds: 拡張子 → 1ファイルあたりの送信秒数
+        delete_seconds: 1ドキュメントあたりの削除秒数（並列削除時の実効値）
+    """
+
+    def __init__(self, state_file: Optional[str] = None):
+        """コストモデルを初期化し、保存済みの係数があれば読み込む。
+
+        Args:
+            state_file: コスト係数を保存するJSONファイルのパス
+        """
+        self.state_file = state_file
+        self.seconds_per_mb: Dict[str, float] = dict(DEFAULT_SECONDS_PER_MB)
+        self.per_file_seconds: Dict[str, float] = {}
+        self.upload_seconds: Dict[str, float] = {}
+        self.delete_seconds = DEFAULT_DELETE_SECONDS
+        self._sizes: Dict[str, int] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for ext, factor in data.get("seconds_per_mb", {}).items():
+                if isinstance(factor, (int, float)) and factor >= 0:
+                    self.seconds_per_mb[ext] = float(factor)
+            for ext, seconds in data.get("per_file_seconds", {}).items():
+                if isinstance(seconds, (int, float)) and seconds >= 0:
+                    self.per_file_seconds[ext] = float(seconds)
+            for ext, seconds in data.get("upload_seconds", {}).items():
+                if isinstance(seconds, (int, float)) and seconds >= 0:
+                    self.upload_seconds[ext] = float(seconds)
+            delete_seconds = data.get("delete_seconds")
+            if isinstance(delete_seconds, (int, float)) and delete_seconds >= 0:
+                self.delete_seconds = float(delete_seconds)
+        except (OSError, ValueError) as e:
+            logger.warning(f"コストモデルの読み込みに失敗、初期値を使用します: {e}")
+
+    def save(self) -> None:
+        """学習したコスト係数を保存する。
+
+        Raises:
+            OSError: 書き込みに失敗した場合
+        """
+        if not self.state_file:
+            return
+        tmp_path = self.state_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "seconds_per_mb": self.seconds_per_mb,
+                "per_file_seconds": self.per_file_seconds,
+                "upload_seconds": self.upload_seconds,
+                "delete_seconds": self.delete_seconds,
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+    def file_size(self, path: str) -> int:
+        """ファイルサイズを返す（取得結果はキャッシュする）。"""
+        size = self._sizes.get(path)
+        if size is None:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = 0
+            self._sizes[path] = size
+        return size
+
+    def estimate(self, path: str) -> float:
+        """ファイルの変換時間（秒）を見積もる。
+
+        Args:
+            path: ファイルパス
+
+        Returns:
+            見積もり秒数
+        """
+        ext = os.path.splitext(path)[1].lower()
+        factor = self.seconds_per_mb.get(ext, UNKNOWN_SECONDS_PER_MB)
+        overhead = self.per_file_seconds.get(ext, PER_FILE_OVERHEAD_SECONDS)
+        return overhead + self.file_size(path) / _MB * factor
+
+    def record(self, path: str, elapsed: float) -> None:
+        """実測した変換時間をコスト係数に反映する。
+
+        SMALL_FILE_BYTES 未満のファイルは固定コストを、それ以上のファイルは固定コストを
+        差し引いた残りから1MBあたりのコストを学習する。
+
+        Args:
+            path: 変換したファイルのパス
+            elapsed: ワーカーが計測した変換時間（秒）
+        """
+        ext = os.path.splitext(path)[1].lower()
+        size = self.file_size(path)
+        elapsed = max(0.0, elapsed)
+        factor = self.seconds_per_mb.get(ext, UNKNOWN_SECONDS_PER_MB)
+        overhead = self.per_file_seconds.get(ext, PER_FILE_OVERHEAD_SECONDS)
+        if size < SMALL_FILE_BYTES:
+            observed = max(0.0, elapsed - size / _MB * factor)
+            self.per_file_seconds[ext] = overhead + LEARNING_RATE * (observed - overhead)
+        else:
+            observed = max(0.0, elapsed - overhead) / (size / _MB)
+            self.seconds_per_mb[ext] = factor + LEARNING_RATE * (observed - factor)
+
+    def estimate_upload(self, path: str) -> float:
+        """ファイルの送信時間（秒）を見積もる。"""
+        ext = os.path.splitext(path)[1].lower()
+        return self.upload_seconds.get(ext, DEFAULT_UPLOAD_SECONDS)
+
+    def record_upload(self, path: str, elapsed: float) -> None:
+        """実測した送信時間を反映する。
+
+        Args:
+            path: 送信したファイルのパス
+            elapsed: 送信に要した時間（秒）
+        """
+        ext = os.path.splitext(path)[1].lower()
+        current = self.upload_seconds.get(ext, DEFAULT_UPLOAD_SECONDS)
+        self.upload_seconds[ext] = current + LEARNING_RATE * (max(0.0, elapsed) - current)
+
+    def record_delete(self, count: int, elapsed: float) -> None:
+        """まとめて削除したドキュメント数と所要時間を反映する。
+
+        Args:
+            count: 削除したドキュメント数
+            elapsed: 削除全体に要した時間（秒）
+        """
+        if count <= 0:
+            return
+        observed = max(0.0, elapsed) / count
+        self.delete_seconds += LEARNING_RATE * (observed - self.delete_seconds)
+
@@ -0,0 +1,185 @@
+"""複数ホストでの分散実行（シャーディング）
+
+`--shard i/N` 指定時に、探索したファイルを入力フォルダからの相対パスの安定ハッシュで
+N個のシャードに振り分けます。各ホストは自分のシャードのファイルだけを処理し、
+トラッカー（.file_metadata.json）もシャードごとに分けて保存します。
+
+各シャードは実行結果のサマリを共有フォルダに書き出し、コーディネーター
+（`--merge-shards N`）がそれらを集計します。
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping
+
+from .orphan_sweep import normalize_path
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PATTERN = "summary-{index}-of-{count}.json"
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    """担当するシャード。
+
+    Attributes:
+        index: シャード番号（0始まり）
+        count: シャード総数
+    """
+    index: int
+    count: int
+
+    def __post_init__(self):
+        """初期化後の検証処理。"""
+        self.validate()
+
+    def validate(self):
+        """設定値の妥当性を検証する。
+
+        Raises:
+            ValueError: 設定値が不正な場合
+        """
+        if self.count < 1:
+            raise ValueError(f"shard count must be >= 1, got {self.count}")
+        if not 0 <= self.index < self.count:
+            raise ValueError(f"shard index must be in 0..{self.count - 1}, got {self.index}")
+
+    @property
+    def label(self) -> str:
+        """ファイル名等に使うラベル（例: shard-0-of-4）。"""
+        return f"shard-{self.index}-of-{self.count}"
+
+    def owns(self, path: str, root: str) -> bool:
+        """ファイルがこのシャードの担当かどうかを返す。"""
+        return shard_of(path, root, self.count) == self.index
+
+
+def parse_shard(value: str) -> ShardSpec:
+    """`i/N` 形式の文字列を ShardSpec に変換する。
+
+    Raises:
+        ValueError: 形式が不正な場合
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", value or "")
+    if not match:
+        raise ValueError(f"shard must be given as i/N (e.g. 0/4), got {value!r}")
+    return ShardSpec(int(match.group(1)), int(match.group(2)))
+
+
+def shard_key(path: str, root: str) -> str:
+    """ホスト間で共通のシャード判定用キー（入力フォルダからの正規化された相対パス）。
+
+    マウント位置やOSが異なるホストでも同じ値になるよう、区切り文字は "/" に揃える。
+    """
+    try:
+        relative = os.path.relpath(path, root)
+    except ValueError:
+        # Windowsで別ドライブの場合
+        relative = path
+    return normalize_path(relative).replace(os.sep, "/")
+
+
+def shard_of(path: str, root: str, count: int) -> int:
+    """ファイルの担当シャード番号を返す。
+
+    組み込みの hash() はプロセスごとに値が変わるため、SHA-1 の先頭8バイトを使う。
+    """
+    digest = hashlib.sha1(shard_key(path, root).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def shard_metadata_file(metadata_file: str, spec: ShardSpec) -> str:
+    """シャード用のトラッカーファイルのパスを返す。
+
+    シャード用のファイルがまだ無く、シャード分割前のファイルがある場合はそれをコピーして
+    引き継ぐ（分割開始時に全ファイルが再処理されないように）。他シャードの分のエントリは
+    削除検出の対象外とし、次回以降のクリーンアップで取り除かれる。
+
+    Args:
+        metadata_file: シャード分割前のトラッカーファイルのパス
+        spec: 担当シャード
+
+    Returns:
+        シャード用のトラッカーファイルのパス
+    """
+    base, ext = os.path.splitext(metadata_file)
+    path = f"{base}.{spec.label}{ext or '.json'}"
+    if not os.path.exists(path) and os.path.exists(metadata_file):
+        try:
+            shutil.copyfile(metadata_file, path)
+            logger.info(f"シャード用メタデータを初期化しました: {path}")
+        except OSError as e:
+            logger.warning(f"シャード用メタデータの初期化に失敗: {e}")
+    return path
+
+
+def owned_entries(tracked: Mapping[str, Any], root: str, spec: ShardSpec) -> Dict[str, Any]:
+    """トラッカーのエントリのうち、担当シャードのものだけを返す。"""
+    return {path: entry for path, entry in tracked.items() if spec.owns(path, root)}
+
+
+def write_shard_summary(shard_dir: str, spec: ShardSpec, summary: Dict[str, Any]) -> str:
+    """シャードの実行サマリを書き出す（一時ファイル経由で置き換える）。
+
+    Returns:
+        書き出したファイルのパス
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    path = os.path.join(shard_dir, SUMMARY_PATTERN.format(index=spec.index, count=spec.count))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"shard": spec.index, "count": spec.count, **summary}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def merge_shard_summaries(shard_dir: str, count: int) -> Dict[str, Any]:
+    """各シャードのサマリを集計する（コーディネーター）。
+
+    Args:
+        shard_dir: サマリの保存先フォルダ
+        count: シャード総数
+
+    Returns:
+        シャード数・未報告シャード・合計件数・ジョブごとの合計件数の辞書
+    """
+    totals: Dict[str, int] = {}
+    jobs: Dict[str, Dict[str, int]] = {}
+    reported: List[Dict[str, Any]] = []
+    missing: List[int] = []
+
+    for index in range(count):
+        path = os.path.join(shard_dir, SUMMARY_PATTERN.format(index=index, count=count))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            missing.append(index)
+            continue
+
+        reported.append({key: summary.get(key) for key in ("shard", "host", "finished", "exit_code")})
+        for job in summary.get("jobs", []):
+            job_totals = jobs.setdefault(str(job.get("name")), {})
+            for key, value in job.items():
+                if isinstance(value, int) and not isinstance(value, bool):
+                    job_totals[key] = job_totals.get(key, 0) + value
+                    totals[key] = totals.get(key, 0) + value
+
+    stale = sorted(set(glob.glob(os.path.join(shard_dir, "summary-*-of-*.json")))
+                   - {os.path.join(shard_dir, SUMMARY_PATTERN.format(index=i, count=count)) for i in range(count)})
+    return {
+        "shards": count,
+        "reported": reported,
+        "missing": missing,
+        "failed": [entry["shard"] for entry in reported if entry.get("exit_code")],
+        "totals": totals,
+        "jobs": jobs,
+        "other_summaries": [os.path.basename(path) for path in stale],
+    }
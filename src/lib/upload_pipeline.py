@@ -0,0 +1,161 @@
+"""小さなドキュメントの並列送信パイプライン
+
+数万件の小さな .txt / .md を1件ずつ送信すると、帯域ではなくリクエストごとの往復時間が
+処理時間を支配します。Dify の Knowledge API には複数ドキュメントをまとめて作成する
+エンドポイントが無いため、小さなドキュメントは同時実行数を制限したスレッドで並列に
+送信し、往復時間を重ね合わせます。
+
+同時実行数は AIMD で調整します。成功が続くと1ずつ増やし（上限 max_concurrency）、
+429（レート制限）や 5xx が返ると半分に減らします。
+
+送信結果のコールバックは submit() / flush() を呼んだスレッド（メインスレッド）で実行されるため、
+トラッカーの更新などスレッドセーフでない処理をそのまま行えます。
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 同時実行数を減らすきっかけとなる HTTP ステータス
+THROTTLE_STATUS = 429
+
+
+@dataclass(slots=True)
+class PendingUpload:
+    """送信待ちのドキュメント1件。
+
+    Attributes:
+        path: 元ファイルのパス
+        title: ドキュメントタイトル
+        markdown: 送信する Markdown
+        metadata: push_markdown に渡すメタデータ
+        chunk_settings: push_markdown に渡すチャンク設定
+    """
+    path: str
+    title: str
+    markdown: str
+    metadata: Dict[str, Any]
+    chunk_settings: Any = None
+
+
+# (APIレスポンス, 例外, 送信に要した秒数) を受け取るコールバック
+UploadCallback = Callable[[Optional[Dict[str, Any]], Optional[BaseException], float], Any]
+
+
+def _is_throttled(exc: BaseException) -> bool:
+    """レート制限・サーバー過負荷を示すエラーかどうか。"""
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    return status is not None and (status == THROTTLE_STATUS or status >= 500)
+
+
+class UploadPipeline:
+    """同時実行数を自動調整しながらドキュメントを並列に送信する。"""
+
+    def __init__(self, send: Callable[[PendingUpload], Dict[str, Any]], max_concurrency: int = 8,
+                 initial_concurrency: Optional[int] = None):
+        """パイプラインを初期化する（スレッドは最初の送信時に起動する）。
+
+        Args:
+            send: 1件を送信してAPIレスポンスを返す関数（複数スレッドから呼ばれる）
+            max_concurrency: 同時実行数の上限
+            initial_concurrency: 同時実行数の初期値（Noneの場合は上限の半分）
+        """
+        self.send = send
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency = min(self.max_concurrency,
+                               max(1, initial_concurrency or (self.max_concurrency + 1) // 2))
+        self.submitted = 0
+        self.failed = 0
+        self.throttled = 0
+        self.peak_concurrency = self.concurrency
+        self._successes_since_increase = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # 送信中の Future → (コールバック, 投入時刻)
+        self._inflight: Dict[Future, Tuple[UploadCallback, float]] = {}
+
+    def _timed_send(self, upload: PendingUpload) -> Tuple[Dict[str, Any], float]:
+        started = time.monotonic()
+        return self.send(upload), time.monotonic() - started
+
+    def submit(self, upload: PendingUpload, callback: UploadCallback) -> None:
+        """ドキュメントを送信キューに投入する。
+
+        同時実行数に達している場合は、いずれかの送信が完了するまで待つ（完了分のコールバックを実行する）。
+
+        Args:
+            upload: 送信するドキュメント
+            callback: 送信完了時に呼ぶ関数
+        """
+        while len(self._inflight) >= self.concurrency:
+            self._harvest(block=True)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="dify-upload")
+        future = self._executor.submit(self._timed_send, upload)
+        self._inflight[future] = (callback, time.monotonic())
+        self.submitted += 1
+        self._harvest(block=False)
+
+    def _harvest(self, block: bool) -> None:
+        """完了した送信のコールバックを実行し、同時実行数を調整する。"""
+        if not self._inflight:
+            return
+        if block:
+            done, _ = wait(list(self._inflight), return_when=FIRST_COMPLETED)
+        else:
+            done = [future for future in self._inflight if future.done()]
+        for future in done:
+            callback, submitted = self._inflight.pop(future)
+            exc = future.exception()
+            if exc is None:
+                response, elapsed = future.result()
+                self._on_success()
+                callback(response, None, elapsed)
+            else:
+                self.failed += 1
+                if _is_throttled(exc):
+                    self._on_throttled()
+                callback(None, exc, time.monotonic() - submitted)
+
+    def _on_success(self) -> None:
+        # 同時実行数分の成功ごとに1増やす（加算増加）
+        self._successes_since_increase += 1
+        if self._successes_since_increase >= self.concurrency and self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+            self._successes_since_increase = 0
+            self.peak_concurrency = max(self.peak_concurrency, self.concurrency)
+
+    def _on_throttled(self) -> None:
+        # レート制限・過負荷時は半分に減らす（乗算減少）
+        self.throttled += 1
+        self._successes_since_increase = 0
+        new_concurrency = max(1, self.concurrency // 2)
+        if new_concurrency != self.concurrency:
+            logger.info({"event": "upload_concurrency_reduced", "from": self.concurrency, "to": new_concurrency})
+        self.concurrency = new_concurrency
+
+    def flush(self) -> None:
+        """送信中のドキュメントがすべて完了するまで待ち、コールバックを実行する。"""
+        while self._inflight:
+            self._harvest(block=True)
+
+    def stats(self) -> Dict[str, int]:
+        """送信件数・失敗件数・レート制限の回数・同時実行数を返す。"""
+        return {
+            "submitted": self.submitted,
+            "failed": self.failed,
+            "throttled": self.throttled,
+            "concurrency": self.concurrency,
+            "peak_concurrency": self.peak_concurrency,
+        }
+
+    def close(self) -> None:
+        """残りの送信を完了させてスレッドを停止する。"""
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,263 @@
+"""リース方式の共有ワークキュー
+
+シャーディング実行時に、共有フォルダ上の SQLite ファイルを介してホスト間で作業を
+融通します。各ホストは自分のシャードの処理対象ファイルを登録し、自分の分を優先して
+リース（期限付きで確保）しながら処理します。自分の分が無くなったら他シャードの
+未処理分を引き受けます。リース期限内に完了しなかった作業（ホスト停止など）は
+他のホストが再度確保できます。
+
+他ホストが処理したファイルの結果（ステータス・ドキュメントID）はキューに記録され、
+担当シャードのホストが自分のトラッカーに反映します。
+
+注意: ネットワークファイルシステム上では WAL モードが使えないため、通常のジャーナルと
+排他トランザクション（BEGIN IMMEDIATE）で排他制御を行います。
+"""
+
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATE_PENDING = "pending"
+STATE_LEASED = "leased"
+STATE_DONE = "done"
+
+# 反映済みの完了作業を保持する期間（秒）
+DONE_RETENTION_SECONDS = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    job TEXT NOT NULL,
+    path TEXT NOT NULL,
+    shard INTEGER NOT NULL,
+    shards INTEGER NOT NULL,
+    signature TEXT NOT NULL,
+    cost REAL NOT NULL DEFAULT 0,
+    state TEXT NOT NULL,
+    owner TEXT,
+    lease_until REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    status TEXT,
+    document_id TEXT,
+    error TEXT,
+    finished REAL,
+    applied INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job, path)
+);
+CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (shards, state, lease_until);
+"""
+
+# tasks.path はホスト間で共通のキー（shard_key）。実際の相対パスは relpath に保持する
+# （relpath 列の無い旧バージョンのキューファイルには列を追加する）
+_ADD_RELPATH = "ALTER TABLE tasks ADD COLUMN relpath TEXT"
+
+
+@dataclass(slots=True)
+class Task:
+    """キュー上の作業1件。
+
+    Attributes:
+        job: ジョブ名（全ホストで同じジョブ一覧を実行している前提）
+        key: ホスト間で共通のキー（sharding.shard_key。小文字化済みのため実パスには使わない）
+        path: 入力フォルダからの相対パス（区切り文字は "/"）
+        shard: 担当シャード番号
+    """
+    job: str
+    key: str
+    path: str
+    shard: int
+
+
+@dataclass(slots=True)
+class TaskResult:
+    """他ホストが処理した作業の結果。"""
+    job: str
+    key: str
+    path: str
+    status: str
+    document_id: Optional[str]
+    owner: str
+
+
+class LeaseQueue:
+    """共有 SQLite ファイル上のリース方式ワークキュー。"""
+
+    def __init__(self, db_path: str, owner: str, shards: int, lease_seconds: float = 900):
+        """キューを開く（存在しない場合は作成する）。
+
+        Args:
+            db_path: 共有フォルダ上のキューファイルのパス
+            owner: このホスト・プロセスの識別子（例: host:pid）
+            shards: シャード総数（総数が異なる実行の作業は対象外とする）
+            lease_seconds: リース期間（秒）。変換タイムアウト＋送信時間より長くすること
+        """
+        self.db_path = db_path
+        self.owner = owner
+        self.shards = shards
+        self.lease_seconds = lease_seconds
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+        if "relpath" not in columns:
+            self._conn.execute(_ADD_RELPATH)
+
+    def __enter__(self) -> "LeaseQueue":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _transaction(self):
+        """書き込みロックを先に取得する排他トランザクションを開始する。"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        return self._conn
+
+    def enqueue(self, shard: int, items: Iterable[Tuple[str, str, str, str, float]]) -> int:
+        """担当シャードの処理対象を登録する。
+
+        同じファイルの作業が既にある場合は未処理に戻す。ただし内容が同じで、
+        完了済みで未反映のもの・他ホストがリース中のものはそのまま残す。
+
+        Args:
+            shard: 担当シャード番号
+            items: (ジョブ名, キー, 相対パス, 内容の識別子, 見積もりコスト) のイテラブル
+
+        Returns:
+            登録（または未処理に戻した）件数
+        """
+        now = time.time()
+        conn = self._transaction()
+        try:
+            conn.execute(
+                "DELETE FROM tasks WHERE shard = ? AND state = ? AND applied = 1 AND finished < ?",
+                (shard, STATE_DONE, now - DONE_RETENTION_SECONDS),
+            )
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT INTO tasks (job, path, relpath, shard, shards, signature, cost, state)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 'pending')
+                ON CONFLICT (job, path) DO UPDATE SET
+                    relpath = excluded.relpath, shard = excluded.shard, shards = excluded.shards, signature = excluded.signature,
+                    cost = excluded.cost, state = 'pending', owner = NULL, lease_until = 0,
+                    attempts = 0, status = NULL, document_id = NULL, error = NULL,
+                    finished = NULL, applied = 0
+                WHERE NOT (tasks.signature = excluded.signature AND tasks.shards = excluded.shards AND (
+                    (tasks.state = 'done' AND tasks.applied = 0)
+                    OR (tasks.state = 'leased' AND tasks.lease_until > ?)))
+                """,
+                ((job, key, path, shard, self.shards, signature, cost, now)
+                 for job, key, path, signature, cost in items),
+            )
+            count = conn.total_changes - before
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def claim(self, shard: int, limit: int, jobs: Sequence[str]) -> List[Task]:
+        """作業をリースする。自分のシャードの作業を優先し、無ければ他シャードの作業を引き受ける。
+
+        このホストで実行していないジョブ（準備に失敗したジョブなど）の作業はリースしない。
+
+        Args:
+            shard: 自分の担当シャード番号
+            limit: 最大件数
+            jobs: リースの対象とするジョブ名
+
+        Returns:
+            リースした作業のリスト（見積もりコストの大きい順）
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return []
+        now = time.time()
+        conn = self._transaction()
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT job, path, COALESCE(relpath, path), shard FROM tasks
+                WHERE shards = ? AND job IN ({", ".join("?" * len(jobs))})
+                    AND (state = 'pending' OR (state = 'leased' AND lease_until <= ?))
+                ORDER BY shard = ? DESC, cost DESC
+                LIMIT ?
+                """,
+                (self.shards, *jobs, now, shard, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE tasks SET state = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE job = ? AND path = ?",
+                ((self.owner, now + self.lease_seconds, job, key) for job, key, _, _ in rows),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [Task(*row) for row in rows]
+
+    def complete(self, task: Task, status: str, document_id: Optional[str] = None,
+                 error: Optional[str] = None, applied: bool = False) -> bool:
+        """作業の完了を記録する。
+
+        Args:
+            task: 完了した作業
+            status: 処理結果（success / error）
+            document_id: DifyドキュメントID
+            error: エラーメッセージ
+            applied: 結果を担当シャードのトラッカーへ反映済みの場合True
+
+        Returns:
+            記録できた場合True（リースが失効して他ホストに確保し直されていた場合False）
+        """
+        cursor = self._conn.execute(
+            "UPDATE tasks SET state = 'done', status = ?, document_id = ?, error = ?, finished = ?, applied = ? "
+            "WHERE job = ? AND path = ? AND owner = ? AND state = 'leased'",
+            (status, document_id, error, time.time(), int(applied), task.job, task.key, self.owner),
+        )
+        return cursor.rowcount > 0
+
+    def outstanding(self, shard: int, jobs: Sequence[str]) -> int:
+        """担当シャードの指定ジョブの未完了の作業数を返す。"""
+        jobs = list(jobs)
+        if not jobs:
+            return 0
+        row = self._conn.execute(
+            f"SELECT COUNT(*) FROM tasks WHERE shards = ? AND shard = ? AND state != 'done' "
+            f"AND job IN ({', '.join('?' * len(jobs))})",
+            (self.shards, shard, *jobs),
+        ).fetchone()
+        return row[0]
+
+    def unapplied_results(self, shard: int) -> List[TaskResult]:
+        """担当シャードの作業のうち、他ホストが完了させてまだトラッカーに反映していないものを返す。"""
+        rows = self._conn.execute(
+            "SELECT job, path, COALESCE(relpath, path), status, document_id, owner FROM tasks "
+            "WHERE shards = ? AND shard = ? AND state = 'done' AND applied = 0",
+            (self.shards, shard),
+        ).fetchall()
+        return [TaskResult(*row) for row in rows]
+
+    def mark_applied(self, results: Iterable[TaskResult]) -> None:
+        """結果をトラッカーに反映済みとして記録する。"""
+        self._conn.executemany(
+            "UPDATE tasks SET applied = 1 WHERE job = ? AND path = ? AND state = 'done'",
+            ((result.job, result.key) for result in results),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """状態ごとの作業数を返す。"""
+        rows = self._conn.execute(
+            "SELECT state, COUNT(*) FROM tasks WHERE shards = ? GROUP BY state", (self.shards,)
+        ).fetchall()
+        return {state: count for state, count in rows}
+
+    def close(self) -> None:
+        """データベース接続を閉じる。"""
+        self._conn.close()
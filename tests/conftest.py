@@ -0,0 +1,6 @@
+"""pytest 共通設定: リポジトリルートを import パスに追加する（`src.lib.*` を import するため）。"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
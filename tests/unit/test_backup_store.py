@@ -0,0 +1,87 @@
+"""重複排除バックアップストア（DedupBackupStore）のテスト。"""
+
+import hashlib
+import json
+import os
+
+import pytest
+
+from src.lib import backup_store
+from src.lib.backup_store import DedupBackupStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(backup_store.time, "time", lambda: now[0])
+    return now
+
+
+def _hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _objects(folder):
+    return sorted(name for _, _, files in os.walk(os.path.join(folder, "objects")) for name in files)
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    folder = str(tmp_path / "backup")
+    with DedupBackupStore(folder) as store:
+        first = store.backup_markdown(str(tmp_path / "in" / "a.md"), "# same", str(tmp_path / "in"))
+        second = store.backup_markdown(str(tmp_path / "in" / "b.md"), "# same", str(tmp_path / "in"))
+        store.backup_markdown(str(tmp_path / "in" / "a.md"), "# changed", str(tmp_path / "in"))
+        store.flush()
+
+        assert first == second == store.object_path(_hash("# same"))
+        assert store.read_backup(_hash("# same")) == "# same"
+        stats = store.get_backup_stats()
+        assert (stats["total_backups"], stats["unique_objects"]) == (3, 2)
+        assert store.errors == []
+    assert _objects(folder) == sorted([_hash("# same"), _hash("# changed")])
+
+
+def test_cleanup_keeps_latest_version_and_removes_unreferenced_objects(tmp_path, clock):
+    folder = str(tmp_path / "backup")
+    inputs = str(tmp_path / "in")
+    with DedupBackupStore(folder) as store:
+        clock[0] -= 60 * 86400
+        store.backup_markdown(os.path.join(inputs, "a.md"), "old a", inputs)
+        store.backup_markdown(os.path.join(inputs, "b.md"), "only b", inputs)
+        store.backup_markdown(os.path.join(inputs, "c.md"), "shared", inputs)
+        clock[0] += 60 * 86400
+        store.backup_markdown(os.path.join(inputs, "a.md"), "new a", inputs)
+        store.backup_markdown(os.path.join(inputs, "d.md"), "shared", inputs)
+        store.flush()
+
+        # 古いバージョンのうち、各ファイルの最新でない a.md の1件のみ削除される
+        assert store.cleanup_old_backups(days_to_keep=30) == 1
+        assert store.get_backup_stats()["total_backups"] == 4
+
+    assert _hash("old a") not in _objects(folder)
+    assert _hash("shared") in _objects(folder)
+    with open(os.path.join(folder, "index.jsonl"), encoding="utf-8") as f:
+        hashes = [json.loads(line)["hash"] for line in f]
+    assert sorted(hashes) == sorted(_hash(text) for text in ("only b", "shared", "new a", "shared"))
+
+
+def test_catalog_is_rebuilt_from_index(tmp_path):
+    folder = str(tmp_path / "backup")
+    inputs = str(tmp_path / "in")
+    with DedupBackupStore(folder) as store:
+        store.backup_markdown(os.path.join(inputs, "a.md"), "a", inputs)
+        store.backup_markdown(os.path.join(inputs, "b.md"), "a", inputs)
+
+    for name in os.listdir(folder):
+        if name.startswith("backup_catalog.sqlite3"):
+            os.remove(os.path.join(folder, name))
+
+    with DedupBackupStore(folder) as store:
+        stats = store.get_backup_stats()
+        assert (stats["total_backups"], stats["unique_objects"]) == (2, 1)
+        assert store.read_backup(_hash("a")) == "a"
+
+
+def test_unsupported_compression_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        DedupBackupStore(str(tmp_path), compression="lzma")
@@ -0,0 +1,38 @@
+"""Config のフィンガープリントと不正な設定の記録のテスト。"""
+
+from src.lib.config import Config
+
+
+BASE = {
+    "input_folder": "./data",
+    "dataset_id": "dataset",
+    "chunk_settings": {"max_chunk_length": 1000, "overlap_size": 100},
+    "empty_line_handling": {"enabled": True},
+}
+
+
+def _config(**overrides):
+    data = {key: dict(value) if isinstance(value, dict) else value for key, value in BASE.items()}
+    data.update(overrides)
+    return Config(data)
+
+
+def test_fingerprint_is_stable_for_same_settings():
+    assert _config().fingerprint == _config().fingerprint
+
+
+def test_fingerprint_ignores_settings_that_do_not_affect_output():
+    assert _config(log_level="DEBUG", input_folder="./other").fingerprint == _config().fingerprint
+
+
+def test_fingerprint_changes_with_chunk_settings():
+    changed = _config(chunk_settings={"max_chunk_length": 2000, "overlap_size": 100})
+
+    assert changed.fingerprint != _config().fingerprint
+
+
+def test_invalid_settings_are_recorded_in_errors():
+    cfg = _config(chunk_settings={"max_chunk_length": 0})
+
+    assert [error.split(":")[0] for error in cfg.errors] == ["chunk_settings"]
+    assert not _config().errors
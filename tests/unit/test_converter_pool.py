@@ -0,0 +1,22 @@
+"""変換ワーカープールのテスト。"""
+
+import multiprocessing
+
+from src.lib.converter_pool import ConverterPool
+
+
+def test_workers_are_not_forked_from_the_parent(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"{i}.txt"
+        path.write_text(f"# title {i}\n\n\nbody", encoding="utf-8")
+        paths.append(str(path))
+
+    with ConverterPool(workers=2, timeout_seconds=30, memory_limit_mb=1024) as pool:
+        outcomes = {outcome.path: outcome for outcome in pool.imap_unordered(paths)}
+        start_method = pool._ctx.get_start_method()
+
+    assert start_method in ("forkserver", "spawn")
+    assert start_method in multiprocessing.get_all_start_methods()
+    assert all(outcome.ok for outcome in outcomes.values())
+    assert outcomes[paths[1]].info.title == "title 1"
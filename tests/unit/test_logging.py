@@ -0,0 +1,53 @@
+"""非同期 JSON Lines ハンドラのテスト。"""
+
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+from src.lib.logging import AsyncJsonLinesHandler, JsonLinesFormatter
+
+
+@pytest.fixture
+def handler(tmp_path):
+    handler = AsyncJsonLinesHandler(str(tmp_path / "job.log"), flush_interval=0.01)
+    handler.setFormatter(JsonLinesFormatter("job"))
+    yield handler
+    handler.close()
+
+
+def _record(event):
+    return logging.makeLogRecord({"name": "dify_batch.job", "levelno": logging.INFO,
+                                  "levelname": "INFO", "msg": {"event": event}})
+
+
+def test_records_are_written_as_json_lines(handler):
+    handler.handle(_record("first"))
+    handler.handle(_record("second"))
+    handler.flush()
+
+    with open(handler.path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["event"] for line in lines] == ["first", "second"]
+    assert lines[0]["logger"] == "dify_batch"
+    assert lines[0]["job_id"] == "job"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork が使えない環境")
+def test_forked_child_falls_back_to_stderr(handler, capfd):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            handler.handle(_record("from_child"))
+            sys.stderr.flush()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    handler.flush()
+
+    err = capfd.readouterr().err
+    assert json.loads(err.strip())["event"] == "from_child"
+    with open(handler.path, encoding="utf-8") as f:
+        assert f.read() == ""
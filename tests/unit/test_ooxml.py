@@ -0,0 +1,142 @@
+"""OOXML（.docx / .pptx）ストリーミング抽出のテスト。"""
+
+import zipfile
+
+import pytest
+
+from src.lib.ooxml import BLOCK_PARAGRAPH, BLOCK_TABLE, iter_docx_blocks, iter_pptx_slides
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+MC_NS = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+P_NS = "http://schemas.openxmlformats.org/presentationml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+
+def _p(text, style=None):
+    props = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f"<w:p>{props}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def _tbl(*rows):
+    cells = "".join(
+        "<w:tr>" + "".join(f"<w:tc>{_p(cell)}</w:tc>" for cell in row) + "</w:tr>" for row in rows
+    )
+    return f"<w:tbl>{cells}</w:tbl>"
+
+
+def _write_docx(path, body, footnotes=None):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", (
+            f'<w:document xmlns:w="{W_NS}" xmlns:mc="{MC_NS}"><w:body>{body}</w:body></w:document>'
+        ))
+        zf.writestr("word/styles.xml", (
+            f'<w:styles xmlns:w="{W_NS}"><w:style w:styleId="Heading1">'
+            f'<w:name w:val="heading 1"/></w:style></w:styles>'
+        ))
+        if footnotes is not None:
+            zf.writestr("word/_rels/document.xml.rels", (
+                f'<Relationships xmlns="{PKG_NS}"><Relationship Id="rId1" Target="footnotes.xml" '
+                f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/footnotes"/>'
+                f'</Relationships>'
+            ))
+            zf.writestr("word/footnotes.xml", f'<w:footnotes xmlns:w="{W_NS}">{footnotes}</w:footnotes>')
+    return str(path)
+
+
+def test_docx_paragraphs_headings_and_tables_in_order(tmp_path):
+    path = _write_docx(tmp_path / "doc.docx",
+                       _p("Title", "Heading1") + _p("before") + _tbl(["a", "b"], ["c", "d"]) + _p("after"))
+
+    assert list(iter_docx_blocks(path)) == [
+        (BLOCK_PARAGRAPH, "# Title"),
+        (BLOCK_PARAGRAPH, "before"),
+        (BLOCK_TABLE, [["a", "b"], ["c", "d"]]),
+        (BLOCK_PARAGRAPH, "after"),
+    ]
+
+
+def test_docx_table_inside_fallback_does_not_hide_following_blocks(tmp_path):
+    body = (
+        _p("before")
+        + "<w:p><w:r><mc:AlternateContent>"
+        + f"<mc:Choice>{_p('box')}</mc:Choice>"
+        + f"<mc:Fallback>{_tbl(['dup'])}{_p('dup')}</mc:Fallback>"
+        + "</mc:AlternateContent></w:r></w:p>"
+        + _tbl(["x"])
+        + _p("after")
+    )
+    path = _write_docx(tmp_path / "fallback.docx", body)
+
+    blocks = list(iter_docx_blocks(path))
+
+    assert (BLOCK_TABLE, [["x"]]) in blocks
+    assert blocks[-1] == (BLOCK_PARAGRAPH, "after")
+    assert all("dup" not in str(value) for _, value in blocks)
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_docx_footnotes_follow_body(tmp_path, max_workers):
+    footnotes = (
+        f'<w:footnote w:type="separator" w:id="-1">{_p("----")}</w:footnote>'
+        f'<w:footnote w:id="1">{_p("note one")}</w:footnote>'
+        f'<w:footnote w:id="2">{_tbl(["n"])}</w:footnote>'
+    )
+    path = _write_docx(tmp_path / "notes.docx", _p("body"), footnotes)
+
+    assert list(iter_docx_blocks(path, max_workers=max_workers)) == [
+        (BLOCK_PARAGRAPH, "body"),
+        (BLOCK_PARAGRAPH, "note one"),
+        (BLOCK_TABLE, [["n"]]),
+    ]
+
+
+def _write_pptx(path, slides):
+    with zipfile.ZipFile(path, "w") as zf:
+        rels = "".join(
+            f'<Relationship Id="rId{i}" Target="slides/slide{i}.xml" Type="slide"/>'
+            for i in range(1, len(slides) + 1)
+        )
+        zf.writestr("ppt/_rels/presentation.xml.rels", f'<Relationships xmlns="{PKG_NS}">{rels}</Relationships>')
+        # 表示順はファイル名の順序とは逆にする
+        ids = "".join(
+            f'<p:sldId id="{255 + i}" r:id="rId{i}"/>' for i in reversed(range(1, len(slides) + 1))
+        )
+        zf.writestr("ppt/presentation.xml", (
+            f'<p:presentation xmlns:p="{P_NS}" xmlns:r="{R_NS}"><p:sldIdLst>{ids}</p:sldIdLst></p:presentation>'
+        ))
+        for i, content in enumerate(slides, 1):
+            zf.writestr(f"ppt/slides/slide{i}.xml", (
+                f'<p:sld xmlns:p="{P_NS}" xmlns:a="{A_NS}"><p:cSld><p:spTree>{content}</p:spTree></p:cSld></p:sld>'
+            ))
+    return str(path)
+
+
+def _sp(*paragraphs):
+    body = "".join(f"<a:p><a:r><a:t>{text}</a:t></a:r></a:p>" for text in paragraphs)
+    return f"<p:sp><p:txBody>{body}</p:txBody></p:sp>"
+
+
+def _a_tbl(*rows):
+    cells = "".join(
+        "<a:tr>" + "".join(f"<a:tc><a:txBody><a:p><a:r><a:t>{c}</a:t></a:r></a:p></a:txBody></a:tc>" for c in row)
+        + "</a:tr>" for row in rows
+    )
+    return f"<p:graphicFrame><a:graphic><a:graphicData><a:tbl>{cells}</a:tbl></a:graphicData></a:graphic></p:graphicFrame>"
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_pptx_slides_in_presentation_order(tmp_path, max_workers):
+    path = _write_pptx(tmp_path / "deck.pptx", [
+        _sp("first file", "second line"),
+        _sp("   ") + _a_tbl(["h1", "h2"], ["v1", "v2"]),
+        "<p:grpSp>" + _sp("grouped") + "</p:grpSp>",
+    ])
+
+    slides = list(iter_pptx_slides(path, max_workers=max_workers))
+
+    assert [number for number, _ in slides] == [1, 2, 3]
+    assert slides[0][1] == [(BLOCK_PARAGRAPH, "grouped")]
+    assert slides[1][1] == [(BLOCK_TABLE, [["h1", "h2"], ["v1", "v2"]])]
+    assert slides[2][1] == [(BLOCK_PARAGRAPH, "first file\nsecond line")]
@@ -0,0 +1,93 @@
+"""削除・移動ファイル検出（DiscoverySweep）と移動時のメタデータ更新のテスト。"""
+
+import hashlib
+
+from src.lib.orphan_sweep import DiscoverySweep, Rename, update_renamed_metadata
+from src.lib.records import DocumentInfo
+
+
+def _write(path, content: bytes):
+    path.write_bytes(content)
+    return str(path)
+
+
+def _entry(content: bytes, document_id, title=None):
+    return {"file_size": len(content), "content_hash": hashlib.sha256(content).hexdigest(),
+            "dify_document_id": document_id, "title": title}
+
+
+def test_detect_renames_matches_vanished_files_by_content(tmp_path):
+    old = str(tmp_path / "old" / "report.md")
+    gone = str(tmp_path / "gone.md")
+    new = _write(tmp_path / "renamed.md", b"same content")
+    other = _write(tmp_path / "other.md", b"different!!!")
+    sweep = DiscoverySweep({old: _entry(b"same content", "doc-1"), gone: _entry(b"gone", "doc-2")})
+    list(sweep.watch([new, other]))
+
+    renames = sweep.detect_renames([new, other])
+
+    assert renames == [Rename(old, new, "doc-1", None)]
+    assert renames[0].new_name == "renamed"
+    # 移動元は削除の対象にならない
+    assert sweep.deleted_documents() == [(gone, "doc-2")]
+
+
+def test_detect_renames_ignores_entries_without_document_or_with_other_size(tmp_path):
+    new = _write(tmp_path / "b.md", b"content")
+    sweep = DiscoverySweep({
+        str(tmp_path / "a.md"): _entry(b"content", None),
+        str(tmp_path / "c.md"): _entry(b"content longer", "doc-3"),
+    })
+
+    assert sweep.detect_renames([new]) == []
+
+
+def test_cancelled_rename_is_deleted_again(tmp_path):
+    old = str(tmp_path / "a.md")
+    new = _write(tmp_path / "b.md", b"content")
+    sweep = DiscoverySweep({old: _entry(b"content", "doc-1", title="Title")})
+
+    [rename] = sweep.detect_renames([new])
+    assert rename.new_name is None  # 本文由来のタイトルは変わらない
+    sweep.cancel_rename(rename)
+
+    assert sweep.deleted_documents() == [(old, "doc-1")]
+
+
+class _FakeApi:
+    def __init__(self, fields, fail=False):
+        self.fields = fields
+        self.fail = fail
+        self.calls = []
+
+    def list_metadata_fields(self, dataset_id):
+        return self.fields
+
+    def update_documents_metadata(self, dataset_id, operations):
+        if self.fail:
+            raise RuntimeError("boom")
+        self.calls.append((dataset_id, operations))
+        return {}
+
+
+def test_update_renamed_metadata_sends_the_new_source_path():
+    api = _FakeApi({"source_path": "f-path", "extracted_title": "f-title", "page_count": "f-pages"})
+    renames = [Rename("old/a.pdf", "new/a.pdf", "doc-1", "Title"), Rename("old/b.md", "new/c.md", "doc-2")]
+    infos = {"new/a.pdf": DocumentInfo(title="Title", page_count=3)}
+
+    updated, failed = update_renamed_metadata(api, "ds", renames, infos.get, batch_size=1)
+
+    assert (updated, failed) == (2, {})
+    sent = {operation["document_id"]: {item["name"]: item["value"] for item in operation["metadata_list"]}
+            for _, [operation] in api.calls}
+    assert sent["doc-1"] == {"source_path": "new/a.pdf", "extracted_title": "Title", "page_count": 3}
+    assert sent["doc-2"] == {"source_path": "new/c.md"}
+
+
+def test_update_renamed_metadata_reports_failures():
+    api = _FakeApi({"source_path": "f-path"}, fail=True)
+
+    updated, failed = update_renamed_metadata(api, "ds", [Rename("a.md", "b.md", "doc-1")], lambda path: None)
+
+    assert updated == 0
+    assert list(failed) == ["doc-1"]
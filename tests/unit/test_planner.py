@@ -0,0 +1,79 @@
+"""実行計画（plan_job / summarize_plans）の見積もりのテスト。"""
+
+import os
+
+from src.lib.planner import (
+    ACTION_CONVERT, ACTION_DELETE, ACTION_RENAME, ACTION_SKIP, ACTION_UPDATE, ACTION_UPLOAD,
+    format_plan, plan_job, summarize_plans,
+)
+
+
+class FixedCostModel:
+    """拡張子ごとに固定の見積もりを返すコストモデル。"""
+
+    delete_seconds = 0.5
+    sizes = {".pdf": 1000, ".md": 10}
+    convert = {".pdf": 20.0, ".md": 1.0}
+
+    def _ext(self, path):
+        return os.path.splitext(path)[1]
+
+    def file_size(self, path):
+        return self.sizes[self._ext(path)]
+
+    def estimate(self, path):
+        return self.convert[self._ext(path)]
+
+    def estimate_upload(self, path):
+        return 2.0
+
+
+def _plan(name="job", files_to_process=("a.pdf", "b.md", "c.md"), delete_remote=True):
+    all_files = ["a.pdf", "b.md", "c.md", "moved.md", "same.md"]
+    return plan_job(name, all_files, list(files_to_process), lambda path: path != "c.md",
+                    renames=1, deleted_files=4, deleted_documents=2, delete_remote=delete_remote,
+                    cost_model=FixedCostModel())
+
+
+def test_plan_job_counts_actions_and_sizes():
+    plan = _plan()
+
+    assert plan.actions == {
+        ACTION_CONVERT: 3, ACTION_UPLOAD: 1, ACTION_UPDATE: 2,
+        ACTION_RENAME: 1, ACTION_DELETE: 2, ACTION_SKIP: 1,
+    }
+    assert plan.forget == 1
+    assert plan.convert_bytes == 1020
+    assert plan.max_convert_seconds == 20.0
+    assert plan.by_extension[".md"] == {"files": 2, "bytes": 20, "convert_seconds": 2.0}
+    assert plan.stage_seconds == {ACTION_CONVERT: 22.0, ACTION_UPLOAD: 6.0, ACTION_RENAME: 0.5, ACTION_DELETE: 1.0}
+
+
+def test_plan_job_only_forgets_when_remote_delete_is_disabled():
+    plan = _plan(delete_remote=False)
+
+    assert plan.actions[ACTION_DELETE] == 0
+    assert plan.forget == 3
+    assert plan.stage_seconds[ACTION_DELETE] == 0.0
+
+
+def test_summary_bounds_conversion_by_the_heaviest_file():
+    summary = summarize_plans([_plan("a"), _plan("b", files_to_process=("b.md",))], workers=8)
+
+    # 合計 23 秒を8並列にしても、最も重いファイル1件（20秒）より短くはならない
+    assert summary["stage_seconds"][ACTION_CONVERT] == 23.0
+    assert summary["convert_wall_seconds"] == 20.0
+    # 変換と送信は並行するため長い方（変換）に名前変更・削除の時間を加える
+    assert summary["estimated_seconds"] == 20.0 + 1.0 + 2.0
+    assert summary["actions"][ACTION_CONVERT] == 4
+    assert summary["by_extension"][".md"]["files"] == 3
+    assert len(summary["jobs"]) == 2
+
+
+def test_summary_uses_upload_time_when_it_dominates():
+    summary = summarize_plans([_plan(files_to_process=("b.md",) * 10)], workers=0)
+
+    assert summary["workers"] == 1
+    assert summary["convert_wall_seconds"] == 10.0
+    assert summary["estimated_seconds"] == 20.0 + 0.5 + 1.0
+    assert "total" in format_plan(summary)
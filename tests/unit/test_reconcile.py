@@ -0,0 +1,73 @@
+"""トラッカーとデータセットの照合（plan_reconcile / find_strays）のテスト。"""
+
+from src.lib.reconcile import find_strays, index_documents, plan_reconcile, referenced_ids
+
+
+DOCUMENTS = [
+    {"id": "doc-a", "name": "a.md"},
+    {"id": "doc-b2", "name": "b.md"},
+    {"id": "doc-dup1", "name": "dup.md"},
+    {"id": "doc-dup2", "name": "dup.md"},
+    {"id": "doc-stray", "name": "manual.md"},
+    {"id": "doc-failed", "name": "failed.md"},
+    {"name": "no-id.md"},
+]
+
+TRACKED = {
+    "a.md": {"dify_document_id": "doc-a"},
+    "b.md": {"dify_document_id": "doc-b"},
+    "dup.md": {"dify_document_id": "doc-dup"},
+    "gone.md": {"dify_document_id": "doc-gone"},
+    "new.md": {"dify_document_id": None},
+}
+
+
+def _plan(tracked=TRACKED, claimed=None):
+    by_id, by_name = index_documents(DOCUMENTS)
+    claimed = referenced_ids(tracked, by_id) if claimed is None else claimed
+    return plan_reconcile(tracked, by_id, by_name, lambda key: key, claimed), by_id
+
+
+def test_index_documents_skips_documents_without_id():
+    by_id, by_name = index_documents(DOCUMENTS)
+
+    assert "no-id.md" not in by_name
+    assert by_name["dup.md"] == ["doc-dup1", "doc-dup2"]
+    assert len(by_id) == 6
+
+
+def test_plan_relinks_unique_names_and_resends_the_rest():
+    plan, _ = _plan()
+
+    assert plan.relinked == [("b.md", "doc-b2")]
+    # 同名のドキュメントが複数ある・見つからない場合は再送信する（IDの無いエントリは対象外）
+    assert plan.missing == ["dup.md", "gone.md"]
+    assert plan.referenced == {"doc-a", "doc-b2"}
+
+
+def test_plan_does_not_relink_to_a_document_claimed_by_another_job():
+    claimed = {"doc-a", "doc-b2"}
+
+    plan, _ = _plan(claimed=claimed)
+
+    assert plan.relinked == []
+    assert "b.md" in plan.missing
+
+
+def test_relinked_id_is_claimed_for_later_jobs():
+    by_id, by_name = index_documents(DOCUMENTS)
+    claimed = set()
+    first = plan_reconcile({"b.md": {"dify_document_id": "x"}}, by_id, by_name, lambda key: key, claimed)
+    second = plan_reconcile({"b.md": {"dify_document_id": "y"}}, by_id, by_name, lambda key: key, claimed)
+
+    assert first.relinked == [("b.md", "doc-b2")]
+    assert second.missing == ["b.md"]
+
+
+def test_find_strays_excludes_referenced_and_known_names():
+    plan, by_id = _plan()
+    names = set(TRACKED) | {"failed.md"}
+
+    strays = find_strays(by_id, plan.referenced, names)
+
+    assert strays == ["doc-stray"]
@@ -0,0 +1,70 @@
+"""追跡ファイルのレコード（FileRecord）と DiscoverySweep での保持のテスト。"""
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from src.lib.orphan_sweep import DiscoverySweep
+from src.lib.records import FileRecord
+
+
+def _entry(path, size=10, content_hash="h", document_id="doc", **extra):
+    entry = {
+        "file_path": path,
+        "last_processed": "2025-01-02T03:04:05",
+        "file_size": size,
+        "last_modified": "2025-01-01T00:00:00",
+        "content_hash": content_hash,
+        "processing_status": "success",
+        "dify_document_id": document_id,
+    }
+    entry.update(extra)
+    return entry
+
+
+def test_from_entry_keeps_the_tracker_key_and_fields():
+    path = os.path.join("share", "dept", "Report.docx")
+    record = FileRecord.from_entry(path, _entry(path, title="タイトル"))
+
+    assert record.file_path == path
+    assert record.file_size == 10
+    assert record.content_hash == "h"
+    assert record.dify_document_id == "doc"
+    assert record.title == "タイトル"
+    assert record.last_processed > record.last_modified > 0
+    assert not hasattr(record, "__dict__")
+
+
+def test_folders_are_shared_between_records():
+    folder = os.path.join("share", "dept")
+    first = FileRecord.from_entry(os.path.join(folder, "a.md"), _entry("a"))
+    # 別に組み立てた同じフォルダの文字列
+    second = FileRecord.from_entry(os.path.join("".join(["sha", "re"]), "dept", "b.md"), _entry("b"))
+
+    assert first.folder is second.folder
+
+
+def test_from_entry_accepts_objects_and_bad_values():
+    @dataclass
+    class Metadata:
+        file_size: int
+        content_hash: str
+        dify_document_id: Optional[str]
+        last_modified: str = "not a date"
+
+    record = FileRecord.from_entry("a.md", Metadata(5, "x", None))
+
+    assert (record.file_size, record.content_hash, record.dify_document_id) == (5, "x", None)
+    assert record.last_modified == 0.0
+
+
+def test_sweep_reports_deleted_files_from_records():
+    kept, gone, untracked = (os.path.join("in", name) for name in ("Kept.md", "Gone.md", "NoDoc.md"))
+    tracked = {kept: _entry(kept), gone: _entry(gone, document_id="doc-gone"),
+               untracked: _entry(untracked, document_id=None)}
+    sweep = DiscoverySweep(tracked)
+
+    assert list(sweep.watch([kept.lower()])) == [kept.lower()]
+    assert sorted(sweep.sweep()) == sorted([gone, untracked])
+    assert sweep.deleted_documents() == [(gone, "doc-gone")]
+    assert sweep.is_tracked(kept.upper())
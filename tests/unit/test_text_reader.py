@@ -0,0 +1,87 @@
+"""テキストファイルの読み込み（エンコーディング判定・逐次空白行処理）のテスト。"""
+
+import itertools
+
+import pytest
+
+from src.lib import converter
+from src.lib.config import EmptyLineConfig
+
+SAMPLES = [
+    "",
+    "a",
+    "a\n",
+    "a\n\n\nb",
+    "\n\n\na\n\n",
+    "a\n \n\t\nb\n\n\n",
+    "# title\n\n\n\n## h2\ntext\n\n",
+    "\n",
+    "\n\n",
+    "x\n\ny\n\nz",
+]
+
+
+def _configs():
+    for enabled, consecutive, trailing, single in itertools.product([True, False], repeat=4):
+        yield EmptyLineConfig(enabled, consecutive, trailing, single)
+
+
+@pytest.mark.parametrize("content", SAMPLES)
+def test_streaming_filter_matches_baseline_rules(content):
+    for config in _configs():
+        expected = converter.safe_empty_line_processing(content, config)
+        actual = "\n".join(converter.iter_empty_line_filtered(content.split("\n"), config))
+        assert actual == expected, config
+
+
+def test_read_text_file_detects_cp932(tmp_path):
+    path = tmp_path / "sjis.txt"
+    path.write_bytes("日本語のテキスト\r\n2行目\r\n".encode("cp932"))
+    assert converter.read_text_file(str(path)) == "日本語のテキスト\n2行目\n"
+
+
+def test_cp932_after_ascii_sample_is_reread_with_fallback(tmp_path):
+    path = tmp_path / "late.txt"
+    prefix = b"a" * (converter.ENCODING_SAMPLE_SIZE + 10) + b"\n"
+    path.write_bytes(prefix + "後半の日本語\n".encode("cp932"))
+
+    text = converter.read_text_file(str(path))
+
+    assert text.endswith("後半の日本語\n")
+    assert "�" not in text
+
+
+def test_undecodable_bytes_are_replaced_as_last_resort(tmp_path):
+    path = tmp_path / "broken.txt"
+    # UTF-8 としても CP932 としても不正なバイト列
+    path.write_bytes(b"a" * (converter.ENCODING_SAMPLE_SIZE + 10) + b"\n\x81\x7f\xff\n")
+
+    text = converter.read_text_file(str(path))
+
+    assert "�" in text
+
+
+def test_txt_conversion_applies_empty_line_rules_after_reread(tmp_path):
+    path = tmp_path / "doc.txt"
+    prefix = b"a" * (converter.ENCODING_SAMPLE_SIZE + 10) + b"\n"
+    path.write_bytes(prefix + "# 見出し\n\n\n\n本文\n\n\n".encode("cp932"))
+    settings = converter.ConversionSettings()
+
+    result = converter.convert_file(str(path), settings)
+
+    assert result.markdown.endswith("\n# 見出し\n\n本文")
+
+
+def test_md_conversion_keeps_content_when_empty_line_processing_fails(tmp_path, monkeypatch):
+    path = tmp_path / "doc.md"
+    path.write_text("# タイトル\n\n\n\n本文\n", encoding="utf-8")
+
+    def broken(lines, config):
+        raise RuntimeError("boom")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(converter, "iter_empty_line_filtered", broken)
+    result = converter.convert_file(str(path), converter.ConversionSettings())
+
+    assert result.markdown.startswith("# タイトル\n\n\n\n本文")
+    assert result.info.title == "タイトル"
@@ -0,0 +1,90 @@
+"""リース方式の共有ワークキュー（LeaseQueue）のテスト。"""
+
+import pytest
+
+from src.lib import work_queue
+from src.lib.work_queue import LeaseQueue
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "queue.sqlite3")
+
+
+def _items(job, *paths, cost=1.0):
+    return [(job, path.lower(), path, "sig", cost) for path in paths]
+
+
+def test_claim_prefers_own_shard_then_steals(db_path):
+    with LeaseQueue(db_path, "host-a", shards=2) as a, LeaseQueue(db_path, "host-b", shards=2) as b:
+        a.enqueue(0, _items("job", "A/One.md", "A/Two.md"))
+        b.enqueue(1, _items("job", "B/Three.md"))
+
+        own = a.claim(0, 1, ["job"])
+        assert own[0].shard == 0
+        assert own[0].path in ("A/One.md", "A/Two.md")
+        assert own[0].key == own[0].path.lower()
+
+        # 自分の分が残っていれば他シャードの分より先に確保する
+        assert a.claim(0, 1, ["job"])[0].shard == 0
+        stolen = a.claim(0, 5, ["job"])
+        assert [(task.shard, task.path) for task in stolen] == [(1, "B/Three.md")]
+        assert b.claim(1, 5, ["job"]) == []
+
+
+def test_claim_orders_by_cost_and_filters_jobs(db_path):
+    with LeaseQueue(db_path, "host", shards=1) as queue:
+        queue.enqueue(0, _items("job", "small.md", cost=1.0) + _items("job", "big.md", cost=9.0)
+                      + _items("other", "x.md", cost=99.0))
+
+        tasks = queue.claim(0, 10, ["job"])
+
+        assert [task.path for task in tasks] == ["big.md", "small.md"]
+        assert queue.claim(0, 10, []) == []
+        assert queue.outstanding(0, ["job"]) == 2
+        assert queue.stats() == {"leased": 2, "pending": 1}
+
+
+def test_expired_lease_is_claimed_again(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(work_queue.time, "time", lambda: now[0])
+    with LeaseQueue(db_path, "host-a", shards=1, lease_seconds=60) as a, \
+            LeaseQueue(db_path, "host-b", shards=1, lease_seconds=60) as b:
+        a.enqueue(0, _items("job", "a.md"))
+        [task] = a.claim(0, 1, ["job"])
+        assert b.claim(0, 1, ["job"]) == []
+
+        now[0] += 61
+        [again] = b.claim(0, 1, ["job"])
+        assert again.key == task.key
+
+        # リースを失った元のホストは完了を記録できない
+        assert not a.complete(task, "success", "doc-a")
+        assert b.complete(again, "success", "doc-b")
+        assert a.outstanding(0, ["job"]) == 0
+
+
+def test_peer_results_keep_the_real_path(db_path):
+    with LeaseQueue(db_path, "owner", shards=2) as owner, LeaseQueue(db_path, "peer", shards=2) as peer:
+        owner.enqueue(0, _items("job", "Dir/Report.DOCX"))
+        [task] = peer.claim(1, 1, ["job"])
+        peer.complete(task, "success", "doc-1")
+
+        [result] = owner.unapplied_results(0)
+        assert (result.path, result.key, result.document_id, result.owner) == \
+            ("Dir/Report.DOCX", "dir/report.docx", "doc-1", "peer")
+
+        owner.mark_applied([result])
+        assert owner.unapplied_results(0) == []
+
+
+def test_reenqueue_keeps_unapplied_results(db_path):
+    with LeaseQueue(db_path, "owner", shards=2) as owner, LeaseQueue(db_path, "peer", shards=2) as peer:
+        owner.enqueue(0, _items("job", "a.md"))
+        [task] = peer.claim(1, 1, ["job"])
+        peer.complete(task, "success", "doc-1")
+
+        # 内容が同じなら未反映の結果を残し、変わっていれば未処理に戻す
+        assert owner.enqueue(0, _items("job", "a.md")) == 0
+        assert owner.enqueue(0, [("job", "a.md", "a.md", "changed", 1.0)]) == 1
+        assert owner.unapplied_results(0) == []